@@ -26,9 +26,12 @@
 
 # stdlib imports
 import argparse
+import concurrent.futures
 import fnmatch
+import json
 import logging
 import logging.handlers
+import multiprocessing
 import os
 import pathlib
 # non-stdlib imports
@@ -37,6 +40,9 @@ import azure.batch.batch_service_client as batch
 
 # create logger
 logger = logging.getLogger(__name__)
+# global defines
+_MAX_CONCURRENCY = min((multiprocessing.cpu_count() * 4, 32))
+_MANIFEST_FILE = '.shipyard-tfm-manifest.json'
 
 
 def _setup_logger() -> None:
@@ -64,55 +70,142 @@ def _create_credentials():
     return batch_client
 
 
-def get_all_files_via_task(batch_client, job_id, task_id, incl, excl, dst):
-    # type: (batch.BatchServiceClient, str, str, list, list, str) -> None
+def _load_manifest(dst):
+    # type: (str) -> dict
+    """Load file manifest of a destination
+    :param str dst: local destination path
+    :rtype: dict
+    :return: manifest
+    """
+    mp = pathlib.Path(dst, _MANIFEST_FILE)
+    try:
+        with mp.open('r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as ex:
+        if mp.exists():
+            logger.warning('ignoring invalid manifest {}: {}'.format(mp, ex))
+        return {}
+
+
+def _save_manifest(dst, manifest):
+    # type: (str, dict) -> None
+    """Atomically save file manifest of a destination
+    :param str dst: local destination path
+    :param dict manifest: manifest
+    """
+    mp = pathlib.Path(dst, _MANIFEST_FILE)
+    tmp = mp.with_name(mp.name + '.tmp')
+    with tmp.open('w') as f:
+        json.dump(manifest, f, sort_keys=True)
+    os.replace(str(tmp), str(mp))
+
+
+def _download_file(batch_client, job_id, task_id, name, fp):
+    # type: (batch.BatchServiceClient, str, str, str, pathlib.Path) -> int
+    """Download a task file
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param str job_id: job id
+    :param str task_id: task id
+    :param str name: task file name
+    :param pathlib.Path fp: local file path
+    :rtype: int
+    :return: bytes written
+    """
+    written = 0
+    stream = batch_client.file.get_from_task(job_id, task_id, name)
+    with fp.open('wb') as f:
+        for data in stream:
+            f.write(data)
+            written += len(data)
+    return written
+
+
+def get_all_files_via_task(
+        batch_client, job_id, task_id, incl, excl, dst,
+        concurrency=_MAX_CONCURRENCY):
+    # type: (batch.BatchServiceClient, str, str, list, list, str,
+    #        int) -> None
     """Get all files from a task
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param str job_id: job id
+    :param str task_id: task id
+    :param str incl: include filters separated by ;
+    :param str excl: exclude filters separated by ;
+    :param str dst: local destination path
+    :param int concurrency: maximum number of concurrent downloads
     """
     # prepare incl/excl filters
     if incl is not None:
         incl = incl.split(';')
     if excl is not None:
         excl = excl.split(';')
+    # load manifest of previously moved files for this job/task
+    manifest = _load_manifest(dst)
+    mkey = '{},{}'.format(job_id, task_id)
+    prev = manifest.get(mkey, {})
+    curr = {}
     # iterate through all files in task and download them
     logger.debug('downloading files to {}'.format(dst))
     files = batch_client.file.list_from_task(job_id, task_id, recursive=True)
     i = 0
+    skipped = 0
+    total_size = 0
     dirs_created = set('.')
-    for file in files:
-        if file.is_directory:
-            continue
-        if excl is not None:
-            inc = not any([fnmatch.fnmatch(file.name, x) for x in excl])
-        else:
-            inc = True
-        if incl is not None:
-            inc = any([fnmatch.fnmatch(file.name, x) for x in incl])
-        if not inc:
-            logger.debug('skipping file {} due to filters'.format(
-                file.name))
-            continue
-        fp = pathlib.Path(dst, file.name)
-        if str(fp.parent) not in dirs_created:
-            fp.parent.mkdir(mode=0o750, parents=True, exist_ok=True)
-            dirs_created.add(str(fp.parent))
-        stream = batch_client.file.get_from_task(job_id, task_id, file.name)
-        with fp.open('wb') as f:
-            for data in stream:
-                f.write(data)
-        i += 1
+    pending = {}
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency) as executor:
+        for file in files:
+            if file.is_directory:
+                continue
+            if excl is not None:
+                inc = not any([fnmatch.fnmatch(file.name, x) for x in excl])
+            else:
+                inc = True
+            if incl is not None:
+                inc = any([fnmatch.fnmatch(file.name, x) for x in incl])
+            if not inc:
+                logger.debug('skipping file {} due to filters'.format(
+                    file.name))
+                continue
+            i += 1
+            size = file.properties.content_length
+            lmt = str(file.properties.last_modified)
+            fp = pathlib.Path(dst, file.name)
+            # skip files already present with matching size, unless the
+            # manifest records a different last modified time
+            if fp.exists() and fp.stat().st_size == size:
+                entry = prev.get(file.name)
+                if entry is None or entry['last_modified'] == lmt:
+                    logger.debug('skipping existing file {}'.format(fp))
+                    curr[file.name] = {'size': size, 'last_modified': lmt}
+                    skipped += 1
+                    continue
+            if str(fp.parent) not in dirs_created:
+                fp.parent.mkdir(mode=0o750, parents=True, exist_ok=True)
+                dirs_created.add(str(fp.parent))
+            pending[executor.submit(
+                _download_file, batch_client, job_id, task_id, file.name,
+                fp)] = (file.name, size, lmt)
+        for fut in concurrent.futures.as_completed(pending):
+            name, size, lmt = pending[fut]
+            total_size += fut.result()
+            curr[name] = {'size': size, 'last_modified': lmt}
     if i == 0:
         logger.error(
             'no files found for task {} job {} include={} exclude={}'.format(
                 task_id, job_id, incl if incl is not None else '',
                 excl if excl is not None else '', ))
     else:
+        manifest[mkey] = curr
+        _save_manifest(dst, manifest)
         logger.info(
             'all task files retrieved from job={} task={} include={} '
-            'exclude={}'.format(
-                task_id, job_id, incl if incl is not None else '',
-                excl if excl is not None else '', ))
+            'exclude={} files={} skipped={} bytes={}'.format(
+                job_id, task_id, incl if incl is not None else '',
+                excl if excl is not None else '', i - skipped, skipped,
+                total_size))
 
 
 def main():
@@ -124,7 +217,7 @@ def main():
 
     get_all_files_via_task(
         batch_client, args.jobid, args.taskid, args.include,
-        args.exclude, args.dst)
+        args.exclude, args.dst, args.concurrency)
 
 
 def parseargs():
@@ -134,12 +227,14 @@ def parseargs():
     """
     parser = argparse.ArgumentParser(
         description='tfm: Azure Batch Shipyard task file mover')
-    parser.set_defaults(dst='.')
+    parser.set_defaults(dst='.', concurrency=_MAX_CONCURRENCY)
     parser.add_argument('jobid', help='job id')
     parser.add_argument('taskid', help='task id')
     parser.add_argument('--include', help='include filter')
     parser.add_argument('--exclude', help='exclude filter')
     parser.add_argument('--dst', help='local destination path')
+    parser.add_argument(
+        '--concurrency', type=int, help='maximum concurrent downloads')
     return parser.parse_args()
 
 
@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# compat imports
+from __future__ import absolute_import, division, print_function
+# stdlib imports
+import argparse
+import collections
+import datetime
+import getpass
+import json
+import logging
+import os
+try:
+    import pathlib2 as pathlib
+except ImportError:
+    import pathlib
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# global defines
+_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+sys.path.insert(0, _ROOT_PATH)
+_MEGABYTE = 1048576
+_DATASETS = ('small', 'large', 'mixed')
+_METHODS = (
+    'scp', 'rsync+ssh', 'multinode_scp', 'multinode_rsync+ssh',
+    'multinode_tar+ssh',
+)
+_SSHD_CONFIG = '''Port {port}
+ListenAddress 127.0.0.1
+HostKey {hostkey}
+PidFile {pidfile}
+AuthorizedKeysFile {authkeys}
+AllowUsers {username}
+PasswordAuthentication no
+ChallengeResponseAuthentication no
+UsePAM no
+StrictModes no
+MaxSessions 64
+MaxStartups 64:30:128
+'''
+# local imports
+import convoy.crypto  # noqa
+import convoy.data  # noqa
+import convoy.settings  # noqa
+
+RemoteLoginSettings = collections.namedtuple(
+    'RemoteLoginSettings', [
+        'remote_login_ip_address', 'remote_login_port',
+    ]
+)
+
+
+class LocalNodes(object):
+    """sshd instances on the loopback interface standing in for compute
+    nodes of a pool with a shared data volume"""
+    def __init__(self, workdir, count, base_port, sshd, username):
+        # type: (LocalNodes, str, int, int, str, str) -> None
+        """Ctor for LocalNodes
+        :param LocalNodes self: this
+        :param str workdir: working directory
+        :param int count: number of nodes
+        :param int base_port: port of the first node
+        :param str sshd: path to sshd
+        :param str username: username
+        """
+        self._parent = workdir
+        self._workdir = None
+        self._count = count
+        self._base_port = base_port
+        self._sshd = sshd
+        self._username = username
+        self._procs = []
+        self.ssh_private_key = None
+
+    def start(self):
+        # type: (LocalNodes) -> dict
+        """Generate keys, start sshd instances and wait for them to accept
+        connections
+        :param LocalNodes self: this
+        :rtype: dict
+        :return: remote login settings per node
+        """
+        # keys and configuration are created per run such that a working
+        # directory may be reused for datasets
+        self._workdir = tempfile.mkdtemp(prefix='nodes-', dir=self._parent)
+        self.ssh_private_key = os.path.join(self._workdir, 'id_rsa_shipyard')
+        subprocess.check_call(
+            ['ssh-keygen', '-q', '-t', 'rsa', '-b', '2048', '-N', '',
+             '-f', self.ssh_private_key])
+        hostkey = os.path.join(self._workdir, 'ssh_host_rsa_key')
+        subprocess.check_call(
+            ['ssh-keygen', '-q', '-t', 'rsa', '-b', '2048', '-N', '',
+             '-f', hostkey])
+        authkeys = '{}.pub'.format(self.ssh_private_key)
+        rls = collections.OrderedDict()
+        for i in range(self._count):
+            port = self._base_port + i
+            conf = os.path.join(self._workdir, 'sshd_config-{}'.format(i))
+            with open(conf, 'w') as f:
+                f.write(_SSHD_CONFIG.format(
+                    port=port, hostkey=hostkey, authkeys=authkeys,
+                    username=self._username,
+                    pidfile=os.path.join(
+                        self._workdir, 'sshd-{}.pid'.format(i))))
+            self._procs.append(subprocess.Popen(
+                [self._sshd, '-D', '-e', '-f', conf],
+                stderr=open(os.path.join(
+                    self._workdir, 'sshd-{}.log'.format(i)), 'wb')))
+            rls['node-{:03d}'.format(i)] = RemoteLoginSettings(
+                '127.0.0.1', port)
+        for nkey in rls:
+            _wait_for_ssh(
+                rls[nkey], self._username, self.ssh_private_key)
+        return rls
+
+    def cpu_times(self):
+        # type: (LocalNodes) -> list
+        """Get CPU seconds consumed by sessions of each sshd instance,
+        including the remote scp, rsync and tar processes
+        :param LocalNodes self: this
+        :rtype: list
+        :return: list of CPU seconds per node
+        """
+        hz = float(os.sysconf('SC_CLK_TCK'))
+        times = []
+        for proc in self._procs:
+            with open('/proc/{}/stat'.format(proc.pid)) as f:
+                # skip past the command name which may contain spaces
+                fields = f.read().rsplit(')', 1)[1].split()
+            # cutime and cstime of reaped session processes
+            times.append((int(fields[13]) + int(fields[14])) / hz)
+        return times
+
+    def stop(self):
+        # type: (LocalNodes) -> None
+        """Stop sshd instances and remove their keys and configuration
+        :param LocalNodes self: this
+        """
+        for proc in self._procs:
+            if proc.poll() is None:
+                proc.terminate()
+                proc.wait()
+        self._procs = []
+        if self._workdir is not None:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+            self._workdir = None
+
+
+def _ssh_command(rls, username, ssh_private_key, command):
+    # type: (RemoteLoginSettings, str, str, str) -> list
+    """Construct SSH command
+    :param RemoteLoginSettings rls: remote login settings
+    :param str username: username
+    :param str ssh_private_key: SSH private key
+    :param str command: remote command
+    :rtype: list
+    :return: ssh command
+    """
+    return [
+        'ssh', '-T', '-x', '-o', 'StrictHostKeyChecking=no',
+        '-o', 'UserKnownHostsFile={}'.format(os.devnull),
+        '-o', 'BatchMode=yes', '-i', ssh_private_key,
+        '-p', str(rls.remote_login_port),
+        '{}@{}'.format(username, rls.remote_login_ip_address), command,
+    ]
+
+
+def _wait_for_ssh(rls, username, ssh_private_key, timeout=30):
+    # type: (RemoteLoginSettings, str, str, int) -> None
+    """Wait for a node to accept SSH connections
+    :param RemoteLoginSettings rls: remote login settings
+    :param str username: username
+    :param str ssh_private_key: SSH private key
+    :param int timeout: timeout in seconds
+    """
+    cmd = _ssh_command(rls, username, ssh_private_key, 'true')
+    deadline = time.time() + timeout
+    with open(os.devnull, 'w') as devnull:
+        while subprocess.call(cmd, stdout=devnull, stderr=devnull) != 0:
+            if time.time() > deadline:
+                raise RuntimeError(
+                    'node at {}:{} did not accept SSH connections'.format(
+                        rls.remote_login_ip_address, rls.remote_login_port))
+            time.sleep(0.5)
+
+
+def _write_file(path, size):
+    # type: (str, int) -> None
+    """Write a file of random data
+    :param str path: file path
+    :param int size: size in bytes
+    """
+    with open(path, 'wb') as f:
+        while size > 0:
+            chunk = min((size, 4 * _MEGABYTE))
+            f.write(os.urandom(chunk))
+            size -= chunk
+
+
+def _generate_dataset(path, kind, scale):
+    # type: (str, str, float) -> None
+    """Generate a synthetic dataset if it does not exist
+    :param str path: dataset path
+    :param str kind: dataset kind
+    :param float scale: dataset scale factor
+    """
+    if os.path.isdir(path):
+        return
+    rand = random.Random(kind)
+    if kind == 'small':
+        # many small files in a nested directory structure
+        sizes = [4096] * int(10000 * scale)
+    elif kind == 'large':
+        # few huge files
+        sizes = [int(256 * _MEGABYTE * scale)] * 4
+    elif kind == 'mixed':
+        # log-uniform sizes between 1KiB and 16MiB
+        sizes = [
+            int(2 ** rand.uniform(10, 24)) for _ in range(int(500 * scale))
+        ]
+    else:
+        raise ValueError('unknown dataset: {}'.format(kind))
+    tmp = '{}.tmp'.format(path)
+    shutil.rmtree(tmp, ignore_errors=True)
+    for i, size in enumerate(sizes):
+        dirname = os.path.join(
+            tmp, 'd{:03d}'.format(i // 1000), 'd{:03d}'.format(i // 100 % 10))
+        if i % 100 == 0:
+            os.makedirs(dirname)
+        _write_file(os.path.join(dirname, 'f{:06d}'.format(i)), size)
+    os.rename(tmp, path)
+
+
+def _dataset_size(path):
+    # type: (str) -> tuple
+    """Compute number of files and total size of a dataset
+    :param str path: dataset path
+    :rtype: tuple
+    :return: (number of files, total bytes)
+    """
+    count = 0
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            count += 1
+            total += os.path.getsize(os.path.join(root, name))
+    return count, total
+
+
+def _remote_files(rls, username, ssh_private_key, dst):
+    # type: (dict, str, str, str) -> dict
+    """Get the union of files and sizes at the destination of all nodes
+    :param dict rls: remote login settings per node
+    :param str username: username
+    :param str ssh_private_key: SSH private key
+    :param str dst: destination path
+    :rtype: dict
+    :return: dict of relative path to size
+    """
+    files = {}
+    for nkey in rls:
+        out = subprocess.check_output(_ssh_command(
+            rls[nkey], username, ssh_private_key,
+            'test ! -d {0} || find {0} -type f -printf "%s %P\\n"'.format(
+                dst)))
+        for line in out.decode('utf8').splitlines():
+            size, path = line.split(' ', 1)
+            files[path] = int(size)
+    return files
+
+
+def _clean_destination(rls, username, ssh_private_key, dst):
+    # type: (dict, str, str, str) -> None
+    """Remove and recreate the destination on all nodes
+    :param dict rls: remote login settings per node
+    :param str username: username
+    :param str ssh_private_key: SSH private key
+    :param str dst: destination path
+    """
+    for nkey in rls:
+        subprocess.check_call(_ssh_command(
+            rls[nkey], username, ssh_private_key,
+            'rm -rf {0} && mkdir -p {0}'.format(dst)))
+
+
+def _destination_settings(args, method, mpt, split):
+    # type: (argparse.Namespace, str, int, int) ->
+    #        convoy.settings.DestinationSettings
+    """Construct destination settings for a shared data volume ingress
+    :param argparse.Namespace args: parsed arguments
+    :param str method: transfer method
+    :param int mpt: max parallel transfers per node
+    :param int split: split files megabytes
+    :rtype: convoy.settings.DestinationSettings
+    :return: destination settings
+    """
+    return convoy.settings.DestinationSettings(
+        storage_account_settings=None,
+        shared_data_volume='benchmark',
+        relative_destination_path=None,
+        data_transfer=convoy.settings.DataTransferSettings(
+            method=method,
+            ssh_private_key=None,
+            scp_ssh_extra_options='-C' if args.ssh_compression else '',
+            rsync_extra_options='',
+            split_files_megabytes=(
+                split * _MEGABYTE if split is not None else None),
+            max_parallel_transfers_per_node=mpt,
+            is_file_share=False,
+            remote_path=None,
+            blobxfer_extra_options=None,
+            tar_batch_megabytes=args.tar_batch_megabytes * _MEGABYTE,
+            tar_batch_files=args.tar_batch_files,
+            compression=None,
+            incremental=False,
+            delete_removed=False,
+        ),
+    )
+
+
+class _PlanRecorder(object):
+    """Record the bytes assigned to each node by the multinode transfer
+    planner"""
+    def __init__(self):
+        # type: (_PlanRecorder) -> None
+        """Ctor for _PlanRecorder
+        :param _PlanRecorder self: this
+        """
+        self._planner = convoy.data._plan_multinode_transfer
+        self.buckets = None
+
+    def __call__(self, items, nodes):
+        # type: (_PlanRecorder, list, list) -> tuple
+        """Invoke the planner and record node buckets
+        :param _PlanRecorder self: this
+        :param list items: list of items
+        :param list nodes: list of nodes
+        :rtype: tuple
+        :return: files and buckets
+        """
+        files, buckets = self._planner(items, nodes)
+        self.buckets = dict(buckets)
+        return files, buckets
+
+
+def _imbalance(values):
+    # type: (list) -> float
+    """Compute imbalance as the ratio of the maximum to the mean
+    :param list values: list of values
+    :rtype: float
+    :return: imbalance or None if not computable
+    """
+    values = list(values)
+    if len(values) == 0 or sum(values) <= 0:
+        return None
+    return max(values) / (sum(values) / len(values))
+
+
+def _run(args, nodes, rls, username, ssh_private_key, dataset, method, mpt,
+         split):
+    # type: (argparse.Namespace, LocalNodes, dict, str, str, str, str, int,
+    #        int) -> dict
+    """Ingress a dataset with a transfer method and measure it
+    :param argparse.Namespace args: parsed arguments
+    :param LocalNodes nodes: local nodes or None for remote targets
+    :param dict rls: remote login settings per node
+    :param str username: username
+    :param str ssh_private_key: SSH private key
+    :param str dataset: dataset path
+    :param str method: transfer method
+    :param int mpt: max parallel transfers per node
+    :param int split: split files megabytes
+    :rtype: dict
+    :return: result
+    """
+    _clean_destination(rls, username, ssh_private_key, args.destination)
+    dest = _destination_settings(args, method, mpt, split)
+    source = convoy.settings.SourceSettings(
+        path=dataset, include=None, exclude=None)
+    key = pathlib.Path(ssh_private_key)
+    recorder = _PlanRecorder()
+    convoy.data._plan_multinode_transfer = recorder
+    remote_start = nodes.cpu_times() if nodes is not None else None
+    local_start = os.times()
+    start = time.time()
+    try:
+        # dispatch in the same manner as data ingress to a shared data
+        # volume, single node methods transfer to the first node
+        if method == 'scp' or method == 'rsync+ssh':
+            srls = dict([next(iter(rls.items()))])
+            if split is not None:
+                success = convoy.data._multinode_transfer(
+                    'multinode_' + method, dest, source, args.destination,
+                    username, key, srls, 1)
+            else:
+                success = convoy.data._singlenode_transfer(
+                    dest, dataset, args.destination, username, key, srls)
+        else:
+            success = convoy.data._multinode_transfer(
+                method, dest, source, args.destination, username, key, rls,
+                mpt)
+    finally:
+        elapsed = time.time() - start
+        convoy.data._plan_multinode_transfer = recorder._planner
+    local_end = os.times()
+    local_cpu = sum(local_end[:4]) - sum(local_start[:4])
+    if nodes is not None:
+        remote = [
+            e - s for s, e in zip(remote_start, nodes.cpu_times())
+        ]
+    else:
+        remote = None
+    # verify transferred data against the dataset
+    count, total = _dataset_size(dataset)
+    files = _remote_files(rls, username, ssh_private_key, args.destination)
+    verified = (
+        success and len(files) == count and sum(files.values()) == total
+    )
+    return {
+        'dataset': os.path.basename(dataset),
+        'method': method,
+        'mpt': mpt,
+        'split_megabytes': split,
+        'files': count,
+        'bytes': total,
+        'elapsed': elapsed,
+        'throughput': total / _MEGABYTE / elapsed,
+        'local_cpu': local_cpu,
+        'remote_cpu': sum(remote) if remote is not None else None,
+        'node_bytes': recorder.buckets,
+        'node_cpu': remote,
+        'byte_imbalance': _imbalance(
+            recorder.buckets.values() if recorder.buckets else []),
+        'cpu_imbalance': _imbalance(remote or []),
+        'verified': verified,
+    }
+
+
+def _format(value, fmt):
+    # type: (object, str) -> str
+    """Format a value or a placeholder if not available
+    :param object value: value
+    :param str fmt: format
+    :rtype: str
+    :return: formatted value
+    """
+    return '-' if value is None else fmt.format(value)
+
+
+def _report(result):
+    # type: (dict) -> None
+    """Print a result row
+    :param dict result: result
+    """
+    print('{:<12} {:<20} {:>4} {:>6} {:>10.1f} {:>8} {:>9.2f} {:>9.2f} '
+          '{:>9.2f} {:>9} {:>7} {:>7} {:>3}'.format(
+              result['dataset'], result['method'], result['mpt'],
+              _format(result['split_megabytes'], '{}'),
+              result['bytes'] / _MEGABYTE, result['files'],
+              result['elapsed'], result['throughput'], result['local_cpu'],
+              _format(result['remote_cpu'], '{:.2f}'),
+              _format(result['byte_imbalance'], '{:.3f}'),
+              _format(result['cpu_imbalance'], '{:.3f}'),
+              'ok' if result['verified'] else 'ERR'))
+    sys.stdout.flush()
+
+
+def main():
+    """Main function"""
+    args = parseargs()
+    if not args.verbose:
+        convoy.data.logger.setLevel(logging.WARNING)
+    if args.workdir is None:
+        workdir = tempfile.mkdtemp(prefix='shipyard-ingress-')
+    else:
+        workdir = args.workdir
+        if not os.path.isdir(workdir):
+            os.makedirs(workdir)
+    username = args.username or getpass.getuser()
+    if args.destination is None:
+        args.destination = os.path.join(workdir, 'destination')
+    # destination paths of shared data volumes have a trailing separator
+    if not args.destination.endswith('/'):
+        args.destination += '/'
+    nodes = None
+    if args.target:
+        if args.ssh_private_key is None:
+            raise ValueError('--ssh-private-key must be specified with '
+                             '--target')
+        ssh_private_key = args.ssh_private_key
+        rls = collections.OrderedDict()
+        for i, target in enumerate(args.target):
+            host, _, port = target.rpartition(':')
+            rls['node-{:03d}'.format(i)] = RemoteLoginSettings(
+                host, int(port))
+    else:
+        nodes = LocalNodes(
+            workdir, args.nodes, args.base_port, args.sshd, username)
+    results = []
+    try:
+        if nodes is not None:
+            rls = nodes.start()
+            ssh_private_key = nodes.ssh_private_key
+        print('{:<12} {:<20} {:>4} {:>6} {:>10} {:>8} {:>9} {:>9} {:>9} {:>9} '
+              '{:>7} {:>7} {:>3}'.format(
+                  'dataset', 'method', 'mpt', 'split', 'MiB', 'files',
+                  'wall(s)', 'MiB/s', 'lcpu(s)', 'rcpu(s)', 'bytes',
+                  'cpu', 'ok'))
+        for kind in args.dataset or _DATASETS:
+            dataset = os.path.join(
+                workdir, 'datasets', '{}-{}'.format(kind, args.scale))
+            _generate_dataset(dataset, kind, args.scale)
+            for method in args.method or _METHODS:
+                single = method == 'scp' or method == 'rsync+ssh'
+                for mpt in ([1] if single else args.mpt or [1, 4]):
+                    for split in args.split_megabytes or [None]:
+                        if split == 0:
+                            split = None
+                        for _ in range(args.runs):
+                            result = _run(
+                                args, nodes, rls, username, ssh_private_key,
+                                dataset, method, mpt, split)
+                            _report(result)
+                            results.append(result)
+    finally:
+        convoy.crypto.close_ssh_control_masters()
+        if nodes is not None:
+            nodes.stop()
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    if args.history is not None:
+        with open(args.history, 'a') as f:
+            f.write(json.dumps({
+                'timestamp': datetime.datetime.utcnow().isoformat(),
+                'python': platform.python_version(),
+                'nodes': len(rls),
+                'scale': args.scale,
+                'results': results,
+            }, sort_keys=True))
+            f.write('\n')
+
+
+def parseargs():
+    """Parse program arguments
+    :rtype: argparse.Namespace
+    :return: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark data ingress methods against local sshd '
+        'instances or existing SSH targets standing in for compute nodes')
+    parser.set_defaults(
+        nodes=4, base_port=22200, sshd='/usr/sbin/sshd', scale=1.0, runs=1,
+        destination=None, tar_batch_megabytes=64, tar_batch_files=4096)
+    parser.add_argument(
+        '--nodes', type=int, help='number of local sshd instances')
+    parser.add_argument(
+        '--base-port', type=int, help='port of the first local sshd')
+    parser.add_argument('--sshd', help='path to sshd')
+    parser.add_argument(
+        '--target', action='append',
+        help='host:port of an existing SSH target to use instead of local '
+        'sshd instances, may be specified multiple times')
+    parser.add_argument('--username', help='SSH username')
+    parser.add_argument(
+        '--ssh-private-key', help='SSH private key for --target')
+    parser.add_argument(
+        '--destination',
+        help='destination path on the nodes, defaults to a directory in '
+        'the working directory')
+    parser.add_argument(
+        '--workdir',
+        help='working directory, datasets are kept and reused if specified')
+    parser.add_argument(
+        '--dataset', action='append', choices=_DATASETS,
+        help='dataset to generate and ingress, may be specified multiple '
+        'times')
+    parser.add_argument(
+        '--scale', type=float, help='dataset size scale factor')
+    parser.add_argument(
+        '--method', action='append', choices=_METHODS,
+        help='transfer method, may be specified multiple times')
+    parser.add_argument(
+        '--mpt', action='append', type=int,
+        help='max parallel transfers per node, may be specified multiple '
+        'times')
+    parser.add_argument(
+        '--split-megabytes', action='append', type=int,
+        help='split files megabytes, 0 for no split, may be specified '
+        'multiple times')
+    parser.add_argument(
+        '--tar-batch-megabytes', type=int,
+        help='tar batch megabytes for multinode_tar+ssh')
+    parser.add_argument(
+        '--tar-batch-files', type=int,
+        help='tar batch files for multinode_tar+ssh')
+    parser.add_argument(
+        '--ssh-compression', action='store_true',
+        help='enable SSH compression for scp and rsync')
+    parser.add_argument(
+        '--runs', type=int, help='number of runs per configuration')
+    parser.add_argument(
+        '--history', help='append results as a JSON line to this file')
+    parser.add_argument(
+        '-v', '--verbose', action='store_true', help='log ingress output')
+    args = parser.parse_args()
+    if args.destination is None:
+        if args.target:
+            parser.error('--destination must be specified with --target')
+    return args
+
+
+if __name__ == '__main__':
+    main()
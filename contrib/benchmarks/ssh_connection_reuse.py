@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# compat imports
+from __future__ import absolute_import, division, print_function
+# stdlib imports
+import argparse
+import os
+import subprocess
+import sys
+import time
+# local imports
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)))))
+import convoy.crypto  # noqa
+
+
+def _ssh_command(args, reuse):
+    # type: (argparse.Namespace, bool) -> list
+    """Construct SSH command
+    :param argparse.Namespace args: parsed arguments
+    :param bool reuse: reuse connections
+    :rtype: list
+    :return: ssh command
+    """
+    cmd = [
+        'ssh', '-T', '-x', '-o', 'StrictHostKeyChecking=no',
+        '-o', 'UserKnownHostsFile={}'.format(os.devnull),
+        '-i', args.ssh_private_key, '-p', str(args.port),
+    ]
+    if reuse:
+        cmd.extend(convoy.crypto.get_ssh_connection_reuse_options())
+    cmd.append('{}@{}'.format(args.username, args.host))
+    cmd.append(args.command)
+    return cmd
+
+
+def _run(args, reuse):
+    # type: (argparse.Namespace, bool) -> list
+    """Execute the command sequentially and time each invocation
+    :param argparse.Namespace args: parsed arguments
+    :param bool reuse: reuse connections
+    :rtype: list
+    :return: list of elapsed seconds per command
+    """
+    cmd = _ssh_command(args, reuse)
+    elapsed = []
+    with open(os.devnull, 'w') as devnull:
+        for _ in range(args.count):
+            start = time.time()
+            rc = subprocess.call(cmd, stdout=devnull, stderr=devnull)
+            elapsed.append(time.time() - start)
+            if rc != 0:
+                raise RuntimeError(
+                    'command failed with return code {}: {}'.format(
+                        rc, ' '.join(cmd)))
+    return elapsed
+
+
+def _report(name, elapsed):
+    # type: (str, list) -> float
+    """Print timing statistics
+    :param str name: name of run
+    :param list elapsed: list of elapsed seconds per command
+    :rtype: float
+    :return: mean seconds per command
+    """
+    ordered = sorted(elapsed)
+    mean = sum(ordered) / len(ordered)
+    print('{:<20} n={} mean={:.1f}ms median={:.1f}ms min={:.1f}ms '
+          'max={:.1f}ms total={:.2f}s'.format(
+              name, len(ordered), mean * 1e3,
+              ordered[len(ordered) // 2] * 1e3, ordered[0] * 1e3,
+              ordered[-1] * 1e3, sum(ordered)))
+    return mean
+
+
+def main():
+    """Main function"""
+    args = parseargs()
+    baseline = _report('new connection', _run(args, False))
+    try:
+        # the first command establishes the control master, report it
+        # separately from the commands which reuse the connection
+        elapsed = _run(args, True)
+        _report('control master', elapsed[:1])
+        if len(elapsed) > 1:
+            reuse = _report('reused connection', elapsed[1:])
+            print('per-command overhead reduced by {:.1f}ms ({:.1f}x)'.format(
+                (baseline - reuse) * 1e3, baseline / reuse))
+    finally:
+        convoy.crypto.close_ssh_control_masters()
+
+
+def parseargs():
+    """Parse program arguments
+    :rtype: argparse.Namespace
+    :return: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark per-command SSH overhead with and without '
+        'connection reuse')
+    parser.set_defaults(port=22, count=50, command='true')
+    parser.add_argument('host', help='remote host')
+    parser.add_argument('username', help='remote username')
+    parser.add_argument('ssh_private_key', help='SSH private key')
+    parser.add_argument('--port', type=int, help='remote port')
+    parser.add_argument(
+        '--count', type=int, help='number of commands to execute per run')
+    parser.add_argument('--command', help='remote command to execute')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
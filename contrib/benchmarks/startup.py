@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# compat imports
+from __future__ import absolute_import, division, print_function
+# stdlib imports
+import argparse
+import datetime
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import time
+
+# global defines
+_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+_DEFAULT_COMMANDS = [
+    '--help',
+    'pool --help',
+    'jobs tasks list --help',
+    'data files tail --help',
+]
+
+
+def _time_command(cmd, runs, env):
+    # type: (list, int, dict) -> list
+    """Execute a command in a new process and time each run
+    :param list cmd: command
+    :param int runs: number of runs
+    :param dict env: environment
+    :rtype: list
+    :return: list of elapsed seconds per run
+    """
+    elapsed = []
+    with open(os.devnull, 'w') as devnull:
+        for _ in range(runs):
+            start = time.time()
+            rc = subprocess.call(
+                cmd, cwd=_ROOT_PATH, env=env, stdout=devnull,
+                stderr=devnull)
+            elapsed.append(time.time() - start)
+            if rc != 0:
+                raise RuntimeError(
+                    'command failed with return code {}: {}'.format(
+                        rc, ' '.join(cmd)))
+    return elapsed
+
+
+def main():
+    """Main function"""
+    args = parseargs()
+    commands = args.command or _DEFAULT_COMMANDS
+    targets = [
+        (x, [sys.executable, 'shipyard.py'] + shlex.split(x))
+        for x in commands
+    ]
+    # track the cost of importing the SDK dependent modules separately
+    targets.append((
+        'import convoy.fleet',
+        [sys.executable, '-c', 'import convoy.fleet'],
+    ))
+    env = dict(os.environ)
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    results = {}
+    print('{:<40} {:>10} {:>10} {:>10}'.format(
+        'command', 'median(s)', 'min(s)', 'max(s)'))
+    for name, cmd in targets:
+        elapsed = sorted(_time_command(cmd, args.runs, env))
+        results[name] = {
+            'median': elapsed[len(elapsed) // 2],
+            'min': elapsed[0],
+            'max': elapsed[-1],
+        }
+        print('{:<40} {:>10.3f} {:>10.3f} {:>10.3f}'.format(
+            name, results[name]['median'], results[name]['min'],
+            results[name]['max']))
+    if args.history is not None:
+        with open(args.history, 'a') as f:
+            f.write(json.dumps({
+                'timestamp': datetime.datetime.utcnow().isoformat(),
+                'python': platform.python_version(),
+                'runs': args.runs,
+                'results': results,
+            }, sort_keys=True))
+            f.write('\n')
+
+
+def parseargs():
+    """Parse program arguments
+    :rtype: argparse.Namespace
+    :return: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark cold start latency of shipyard.py commands')
+    parser.set_defaults(runs=5)
+    parser.add_argument(
+        '--command', action='append',
+        help='shipyard.py command line to time, may be specified multiple '
+        'times')
+    parser.add_argument(
+        '--runs', type=int, help='number of runs per command')
+    parser.add_argument(
+        '--history', help='append results as a JSON line to this file')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# compat imports
+from __future__ import absolute_import, division, print_function
+# stdlib imports
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import time
+
+# global defines
+_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+sys.path.insert(0, _ROOT_PATH)
+# local imports
+import convoy.settings  # noqa
+
+
+def _generate_config(vm_size):
+    # type: (str) -> dict
+    """Generate a synthetic configuration with data volumes and a job
+    :param str vm_size: vm size of the pool
+    :rtype: dict
+    :return: configuration
+    """
+    return {
+        'global_resources': {
+            'volumes': {
+                'data_volumes': {
+                    'scratch': {
+                        'host_path': '/mnt/scratch',
+                        'container_path': '/scratch',
+                    },
+                    'inputs': {
+                        'container_path': '/inputs',
+                        'bind_options': 'ro',
+                    },
+                },
+                'shared_data_volumes': {
+                    'nfs': {
+                        'volume_driver': 'storage_cluster',
+                        'container_path': '/shared',
+                    },
+                },
+            },
+        },
+        'pool_specification': {
+            'id': 'benchmark',
+            'vm_size': vm_size,
+            'vm_count': {'dedicated': 1},
+            'vm_configuration': {
+                'platform_image': {
+                    'publisher': 'Canonical',
+                    'offer': 'UbuntuServer',
+                    'sku': '16.04-LTS',
+                },
+            },
+        },
+        'job_specifications': [
+            {
+                'id': 'benchmark',
+                'shm_size': '256m',
+                'retention_time': '1.00:00:00',
+                'data_volumes': ['scratch', 'inputs'],
+                'shared_data_volumes': ['nfs'],
+                'user_identity': {
+                    'specific_user': {'uid': 1000, 'gid': 1000},
+                },
+                'tasks': [],
+            },
+        ],
+    }
+
+
+def _generate_tasks(count):
+    # type: (int) -> list
+    """Generate task specifications
+    :param int count: number of tasks
+    :rtype: list
+    :return: task specifications
+    """
+    return [
+        {
+            'id': 'task-{:07d}'.format(i),
+            'docker_image': 'busybox',
+            'command': 'echo {}'.format(i),
+        } for i in range(count)
+    ]
+
+
+def _time_task_settings(config, pool, jobspec, tasks, precompute):
+    # type: (dict, convoy.settings.PoolSettings, dict, list, bool) -> float
+    """Time task settings retrieval for all tasks of a job
+    :param dict config: configuration
+    :param convoy.settings.PoolSettings pool: pool settings
+    :param dict jobspec: job specification
+    :param list tasks: task specifications
+    :param bool precompute: precompute the task context once per job
+    :rtype: float
+    :return: elapsed seconds
+    """
+    start = time.time()
+    context = None
+    if precompute:
+        context = convoy.settings.task_context_settings(
+            None, config, pool, jobspec)
+    for task in tasks:
+        convoy.settings.task_settings(
+            None, config, pool, jobspec, task, context=context)
+    return time.time() - start
+
+
+def main():
+    """Main function"""
+    args = parseargs()
+    config = _generate_config(args.vm_size)
+    pool = convoy.settings.pool_settings(config)
+    jobspec = config['job_specifications'][0]
+    tasks = _generate_tasks(args.tasks)
+    print('{:<24} {:>10} {:>14}'.format('mode', 'total(s)', 'per-task(us)'))
+    for name, precompute in (
+            ('context per task', False), ('context per job', True)):
+        if args.profile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        elapsed = _time_task_settings(
+            config, pool, jobspec, [dict(x) for x in tasks], precompute)
+        if args.profile:
+            profiler.disable()
+        print('{:<24} {:>10.3f} {:>14.2f}'.format(
+            name, elapsed, elapsed * 1e6 / len(tasks)))
+        if args.profile:
+            pstats.Stats(profiler, stream=sys.stdout).sort_stats(
+                'cumulative').print_stats(args.profile)
+
+
+def parseargs():
+    """Parse program arguments
+    :rtype: argparse.Namespace
+    :return: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark per-task cost of task settings retrieval')
+    parser.set_defaults(tasks=100000, vm_size='STANDARD_NC6', profile=0)
+    parser.add_argument(
+        '--tasks', type=int, help='number of tasks in the job')
+    parser.add_argument('--vm-size', help='vm size of the pool')
+    parser.add_argument(
+        '--profile', type=int,
+        help='print this number of entries of a cProfile report per mode')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
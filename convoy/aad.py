@@ -40,11 +40,8 @@ except ImportError:
     import pathlib
 import os
 # non-stdlib imports
-import adal
-import azure.common.credentials
 import dateutil.parser
 import msrest.authentication
-import msrestazure.azure_exceptions
 # local imports
 from . import settings
 from . import util
@@ -52,6 +49,11 @@ from . import util
 # create logger
 logger = logging.getLogger(__name__)
 util.setup_logger(logger)
+# authentication libraries are imported on first use as importing them is
+# expensive and they are only required for aad authentication
+adal = util.LazyModule('adal')
+azurecredentials = util.LazyModule('azure.common.credentials')
+azureactivedirectory = util.LazyModule('msrestazure.azure_active_directory')
 # global defines
 _LOGIN_AUTH_URI = 'https://login.microsoftonline.com'
 _CLIENT_ID = '04b07795-8ddb-461a-bbee-02f9e1bf7b46'  # xplat-cli
@@ -230,7 +232,7 @@ def create_aad_credentials(ctx, aad_settings):
                      aad_cert_thumbprint))
         context = adal.AuthenticationContext(
             '{}/{}'.format(_LOGIN_AUTH_URI, aad_directory_id))
-        return msrestazure.azure_active_directory.AdalAuthentication(
+        return azureactivedirectory.AdalAuthentication(
             lambda: context.acquire_token_with_client_certificate(
                 endpoint,
                 aad_application_id,
@@ -247,7 +249,7 @@ def create_aad_credentials(ctx, aad_settings):
                 ('using aad auth with key, endpoint={} directoryid={} '
                  'appid={}').format(
                      endpoint, aad_directory_id, aad_application_id))
-        return azure.common.credentials.ServicePrincipalCredentials(
+        return azurecredentials.ServicePrincipalCredentials(
             aad_application_id,
             aad_auth_key,
             tenant=aad_directory_id,
@@ -260,7 +262,7 @@ def create_aad_credentials(ctx, aad_settings):
                  'directoryid={} username={}').format(
                      endpoint, aad_directory_id, aad_user))
         try:
-            return azure.common.credentials.UserPassCredentials(
+            return azurecredentials.UserPassCredentials(
                 username=aad_user,
                 password=aad_password,
                 resource=endpoint,
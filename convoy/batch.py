@@ -30,19 +30,25 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import calendar
 import collections
+import concurrent.futures
 import datetime
 import fnmatch
 import getpass
+import json
 import logging
+import multiprocessing
 import os
 try:
     import pathlib2 as pathlib
 except ImportError:
     import pathlib
 import pickle
+import random
 import ssl
 import tempfile
+import threading
 import time
 # non-stdlib imports
 import azure.batch.models as batchmodels
@@ -64,6 +70,21 @@ util.setup_logger(logger)
 _MAX_REBOOT_RETRIES = 5
 _SSH_TUNNEL_SCRIPT = 'ssh_docker_tunnel_shipyard.sh'
 _TASKMAP_PICKLE_FILE = 'taskmap.pickle'
+_MAX_EXECUTOR_WORKERS = min((multiprocessing.cpu_count() * 4, 32))
+_MAX_FILTER_IDS = 20
+_MAX_THROTTLE_RETRIES = 8
+_MAX_ADD_USER_RETRIES = 3
+_DOCKER_KILL_SSH_TIMEOUT = 120
+_TAIL_POLL_INTERVAL_MIN = 1
+_TAIL_POLL_INTERVAL_MAX = 16
+_TAIL_TASK_DISCOVERY_INTERVAL = 15
+_MEGABYTE = 1048576
+_DOWNLOAD_RANGE_BYTES = 33554432
+_PARTIAL_DOWNLOAD_SUFFIX = '.shipyard-partial'
+_RLS_CACHE_TTL_SECONDS = 120
+_RLS_CACHE_FILE = '.shipyard-rls-{}.json'
+_RLS_CACHE = {}
+_RLS_CACHE_LOCK = threading.Lock()
 _RUN_ELEVATED = batchmodels.UserIdentity(
     auto_user=batchmodels.AutoUserSpecification(
         scope=batchmodels.AutoUserScope.pool,
@@ -269,11 +290,11 @@ def _retrieve_outputs_from_failed_nodes(batch_client, config, nodeid=None):
 
 def _block_for_nodes_ready(
         batch_client, config, stopping_states, end_states, pool_id,
-        reboot_on_failed):
+        reboot_on_failed, node_ready_callback=None):
     # type: (batch.BatchServiceClient, dict,
     #        List[batchmodels.ComputeNodeState],
     #        List[batchmodels.ComputeNodeState], str,
-    #        bool) -> List[batchmodels.ComputeNode]
+    #        bool, function) -> List[batchmodels.ComputeNode]
     """Wait for pool to enter steady state and all nodes to enter stopping
     states
     :param batch_client: The batch client to use.
@@ -283,6 +304,8 @@ def _block_for_nodes_ready(
     :param list end_states: list of acceptable end states
     :param str pool_id: pool id
     :param bool reboot_on_failed: reboot node on failed start state
+    :param function node_ready_callback: non-blocking callback invoked with
+        the node list on every poll
     :rtype: list
     :return: list of nodes
     """
@@ -333,6 +356,8 @@ def _block_for_nodes_ready(
             # is reusing the SSL connection improperly
             nodes = []
             failed_node_list_count += 1
+        if node_ready_callback is not None:
+            node_ready_callback(nodes)
         # check if any nodes are in start task failed state
         if (any(node.state == batchmodels.ComputeNodeState.start_task_failed
                 for node in nodes)):
@@ -486,15 +511,20 @@ def _node_state_counts(nodes):
     )
 
 
-def wait_for_pool_ready(batch_client, config, pool_id, addl_end_states=None):
+def wait_for_pool_ready(
+        batch_client, config, pool_id, addl_end_states=None,
+        node_ready_callback=None):
     # type: (batch.BatchServiceClient, dict, str,
-    #        List[batchmodels.ComputeNode]) -> List[batchmodels.ComputeNode]
+    #        List[batchmodels.ComputeNode],
+    #        function) -> List[batchmodels.ComputeNode]
     """Wait for pool to enter steady state and all nodes in end states
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param dict config: configuration dict
     :param str pool_id: pool id
     :param list addl_end_states: additional end states
+    :param function node_ready_callback: non-blocking callback invoked with
+        the node list on every poll
     :rtype: list
     :return: list of nodes
     """
@@ -515,7 +545,8 @@ def wait_for_pool_ready(batch_client, config, pool_id, addl_end_states=None):
     end_states = frozenset(base_end_states)
     nodes = _block_for_nodes_ready(
         batch_client, config, stopping_states, end_states, pool_id,
-        settings.pool_settings(config).reboot_on_start_task_failed)
+        settings.pool_settings(config).reboot_on_start_task_failed,
+        node_ready_callback=node_ready_callback)
     pool_stats(batch_client, config, pool_id=pool_id)
     return nodes
 
@@ -543,14 +574,16 @@ def check_pool_nodes_runnable(batch_client, config):
     return False
 
 
-def create_pool(batch_client, config, pool):
-    # type: (batch.BatchServiceClient, dict, batchmodels.PoolAddParameter) ->
-    #        List[batchmodels.ComputeNode]
+def create_pool(batch_client, config, pool, node_ready_callback=None):
+    # type: (batch.BatchServiceClient, dict, batchmodels.PoolAddParameter,
+    #        function) -> List[batchmodels.ComputeNode]
     """Create pool if not exists
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param dict config: configuration dict
     :param batchmodels.PoolAddParameter pool: pool addparameter object
+    :param function node_ready_callback: non-blocking callback invoked with
+        the node list while waiting for the pool
     :rtype: list
     :return: list of nodes
     """
@@ -568,16 +601,18 @@ def create_pool(batch_client, config, pool):
         else:
             logger.error('Pool {!r} already exists'.format(pool.id))
     # wait for pool idle
-    return wait_for_pool_ready(batch_client, config, pool.id)
+    return wait_for_pool_ready(
+        batch_client, config, pool.id,
+        node_ready_callback=node_ready_callback)
 
 
 def _add_admin_user_to_compute_node(
         batch_client, pool, node, username, ssh_public_key_data, rdp_password,
         expiry=None):
     # type: (batch.BatchServiceClient, dict, str, batchmodels.ComputeNode,
-    #        str, str, datetime.datetime) -> None
+    #        str, str, datetime.datetime) -> bool
     """Adds an administrative user to the Batch Compute Node with a default
-    expiry time of 7 days if not specified.
+    expiry time of 7 days if not specified. Transient failures are retried.
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
     :param settings.PoolSpecification pool: pool settings
@@ -587,32 +622,212 @@ def _add_admin_user_to_compute_node(
     :param str ssh_public_key_data: ssh rsa public key data
     :param str rdp_password: rdp password
     :param datetime.datetime expiry: expiry
+    :rtype: bool
+    :return: user was added or already exists
     """
     if expiry is None:
         expiry = datetime.datetime.utcnow() + datetime.timedelta(
             pool.ssh.expiry_days)
-    logger.info('adding user {} to node {} in pool {}, expiry={}'.format(
+    logger.debug('adding user {} to node {} in pool {}, expiry={}'.format(
         username, node.id, pool.id, expiry))
-    try:
-        batch_client.compute_node.add_user(
-            pool.id,
-            node.id,
-            batchmodels.ComputeNodeUser(
-                username,
-                is_admin=True,
-                expiry_time=expiry,
-                password=rdp_password,
-                ssh_public_key=ssh_public_key_data,
+    retries = 0
+    while True:
+        try:
+            _invoke_with_throttle_backoff(
+                batch_client.compute_node.add_user,
+                pool.id,
+                node.id,
+                batchmodels.ComputeNodeUser(
+                    username,
+                    is_admin=True,
+                    expiry_time=expiry,
+                    password=rdp_password,
+                    ssh_public_key=ssh_public_key_data,
+                )
             )
-        )
-    except batchmodels.batch_error.BatchErrorException as ex:
-        if 'The specified node user already exists' in ex.message.value:
-            logger.warning('user {} already exists on node {}'.format(
-                username, node.id))
+            return True
+        except batchmodels.batch_error.BatchErrorException as ex:
+            if 'The specified node user already exists' in ex.message.value:
+                logger.warning('user {} already exists on node {}'.format(
+                    username, node.id))
+                return True
+            retries += 1
+            if retries > _MAX_ADD_USER_RETRIES:
+                # log as error instead of raising the exception in case
+                # of low-priority removal
+                logger.error('could not add user {} to node {}: {}'.format(
+                    username, node.id, ex.message.value))
+                return False
+            logger.debug(
+                'retrying add user {} to node {} (retry {} of {}): {}'.format(
+                    username, node.id, retries, _MAX_ADD_USER_RETRIES,
+                    ex.message.value))
+            time.sleep(retries + random.random())
+
+
+class AdminUserProvisioner(object):
+    """Provision RDP and SSH admin users on compute nodes of a pool
+    concurrently, optionally as nodes become ready"""
+    def __init__(self, batch_client, config, rdp=True, ssh=True):
+        """Ctor for AdminUserProvisioner
+        :param AdminUserProvisioner self: this
+        :param batch_client: The batch client to use.
+        :type batch_client:
+            `azure.batch.batch_service_client.BatchServiceClient`
+        :param dict config: configuration dict
+        :param bool rdp: provision RDP user if configured
+        :param bool ssh: provision SSH user if configured
+        """
+        self._batch_client = batch_client
+        self._pool = settings.pool_settings(config)
+        self._users = []
+        self._ssh_priv_key = None
+        self._gen_tunnel_script = False
+        self._executor = None
+        self._pending = {}
+        self._submitted = set()
+        self._ready_states = frozenset((
+            batchmodels.ComputeNodeState.idle,
+            batchmodels.ComputeNodeState.running,
+        ))
+        is_windows = settings.is_windows_pool(config)
+        if rdp:
+            self._add_rdp_user(is_windows)
+        if ssh:
+            self._add_ssh_user(is_windows)
+
+    def _add_rdp_user(self, is_windows):
+        """Add RDP user to provision
+        :param AdminUserProvisioner self: this
+        :param bool is_windows: pool is a windows pool
+        """
+        pool = self._pool
+        if not is_windows:
+            logger.debug('skipping rdp config for linux pool {}'.format(
+                pool.id))
+            return
+        if util.is_none_or_empty(pool.rdp.username):
+            logger.info('not creating rdp user on pool {}'.format(pool.id))
+            return
+        password = pool.rdp.password
+        if util.is_none_or_empty(password):
+            password = crypto.generate_rdp_password().decode('ascii')
+            logger.info(
+                ('randomly generated password for RDP user {} on pool {} '
+                 'is {}').format(
+                     pool.rdp.username, pool.id, password))
+        expiry = datetime.datetime.utcnow() + datetime.timedelta(
+            pool.rdp.expiry_days)
+        self._users.append((pool.rdp.username, None, password, expiry))
+
+    def _add_ssh_user(self, is_windows):
+        """Add SSH user to provision, generating an SSH key pair if required
+        :param AdminUserProvisioner self: this
+        :param bool is_windows: pool is a windows pool
+        """
+        pool = self._pool
+        if is_windows:
+            logger.debug('skipping ssh config for windows pool {}'.format(
+                pool.id))
+            return
+        if util.is_none_or_empty(pool.ssh.username):
+            logger.info('not creating ssh user on pool {}'.format(pool.id))
+            return
+        # read public key data from settings if available
+        if util.is_not_empty(pool.ssh.ssh_public_key_data):
+            ssh_pub_key_data = pool.ssh.ssh_public_key_data
+            ssh_priv_key = pool.ssh.ssh_private_key
         else:
-            # log as error instead of raising the exception in case
-            # of low-priority removal
-            logger.error(ex.message.value)
+            # generate ssh key pair if not specified
+            if pool.ssh.ssh_public_key is None:
+                ssh_priv_key, ssh_pub_key = crypto.generate_ssh_keypair(
+                    pool.ssh.generated_file_export_path)
+            else:
+                ssh_pub_key = pool.ssh.ssh_public_key
+                ssh_priv_key = pool.ssh.ssh_private_key
+            # read public key data
+            with ssh_pub_key.open('rb') as fd:
+                ssh_pub_key_data = fd.read().decode('utf8')
+        expiry = datetime.datetime.utcnow() + datetime.timedelta(
+            pool.ssh.expiry_days)
+        self._users.append((pool.ssh.username, ssh_pub_key_data, None, expiry))
+        self._ssh_priv_key = ssh_priv_key
+        self._gen_tunnel_script = True
+
+    def _submit_node(self, node):
+        """Submit user provisioning for a node
+        :param AdminUserProvisioner self: this
+        :param node: The compute node.
+        :type node: `azure.batch.batch_service_client.models.ComputeNode`
+        """
+        self._submitted.add(node.id)
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_MAX_EXECUTOR_WORKERS)
+        for username, ssh_pub_key_data, password, expiry in self._users:
+            self._pending[self._executor.submit(
+                _add_admin_user_to_compute_node, self._batch_client,
+                self._pool, node, username, ssh_pub_key_data, password,
+                expiry=expiry)] = (node.id, username)
+
+    def submit_ready(self, nodes):
+        """Submit user provisioning for nodes which are ready and have not
+        been submitted previously. This call does not block.
+        :param AdminUserProvisioner self: this
+        :param list nodes: list of nodes
+        """
+        if len(self._users) == 0:
+            return
+        for node in nodes:
+            if (node.id not in self._submitted and
+                    node.state in self._ready_states):
+                self._submit_node(node)
+
+    def finish(self, nodes=None):
+        """Submit user provisioning for all remaining nodes, wait for
+        completion and generate SSH tunnel script if requested
+        :param AdminUserProvisioner self: this
+        :param list nodes: list of nodes
+        :rtype: list
+        :return: list of (node id, username) that failed
+        """
+        failed = []
+        if len(self._users) == 0:
+            return failed
+        if nodes is None:
+            nodes = self._batch_client.compute_node.list(self._pool.id)
+        nodes = list(nodes)
+        for node in nodes:
+            if node.id not in self._submitted:
+                self._submit_node(node)
+        if len(self._pending) > 0:
+            logger.info(
+                'waiting for {} users to be added to {} nodes in pool '
+                '{}'.format(
+                    len(self._pending), len(self._submitted), self._pool.id))
+        try:
+            for fut in concurrent.futures.as_completed(self._pending):
+                if not fut.result():
+                    failed.append(self._pending[fut])
+        finally:
+            self.close()
+        logger.info('added {} users to nodes in pool {}, {} failed'.format(
+            len(self._pending) - len(failed), self._pool.id, len(failed)))
+        self._pending = {}
+        # generate tunnel script if requested
+        if self._gen_tunnel_script:
+            generate_ssh_tunnel_script(
+                self._batch_client, self._pool, self._ssh_priv_key, nodes)
+        return failed
+
+    def close(self):
+        """Shut down the executor, waiting for any submitted user
+        provisioning to complete
+        :param AdminUserProvisioner self: this
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
 
 def add_rdp_user(batch_client, config, nodes=None):
@@ -624,30 +839,7 @@ def add_rdp_user(batch_client, config, nodes=None):
     :param dict config: configuration dict
     :param list nodes: list of nodes
     """
-    pool = settings.pool_settings(config)
-    is_windows = settings.is_windows_pool(config)
-    if not is_windows:
-        logger.debug('skipping rdp config for linux pool {}'.format(pool.id))
-        return
-    if util.is_none_or_empty(pool.rdp.username):
-        logger.info('not creating rdp user on pool {}'.format(pool.id))
-        return
-    password = pool.rdp.password
-    if util.is_none_or_empty(password):
-        password = crypto.generate_rdp_password().decode('ascii')
-        logger.info(
-            ('randomly generated password for RDP user {} on pool {} '
-             'is {}').format(
-                 pool.rdp.username, pool.id, password))
-    # get node list if not provided
-    if nodes is None:
-        nodes = batch_client.compute_node.list(pool.id)
-    expiry = datetime.datetime.utcnow() + datetime.timedelta(
-        pool.rdp.expiry_days)
-    for node in nodes:
-        _add_admin_user_to_compute_node(
-            batch_client, pool, node, pool.rdp.username, None, password,
-            expiry=expiry)
+    AdminUserProvisioner(batch_client, config, ssh=False).finish(nodes)
 
 
 def add_ssh_user(batch_client, config, nodes=None):
@@ -660,40 +852,7 @@ def add_ssh_user(batch_client, config, nodes=None):
     :param dict config: configuration dict
     :param list nodes: list of nodes
     """
-    pool = settings.pool_settings(config)
-    is_windows = settings.is_windows_pool(config)
-    if is_windows:
-        logger.debug('skipping ssh config for windows pool {}'.format(pool.id))
-        return
-    if util.is_none_or_empty(pool.ssh.username):
-        logger.info('not creating ssh user on pool {}'.format(pool.id))
-        return
-    # read public key data from settings if available
-    if util.is_not_empty(pool.ssh.ssh_public_key_data):
-        ssh_pub_key_data = pool.ssh.ssh_public_key_data
-        ssh_priv_key = pool.ssh.ssh_private_key
-    else:
-        # generate ssh key pair if not specified
-        if pool.ssh.ssh_public_key is None:
-            ssh_priv_key, ssh_pub_key = crypto.generate_ssh_keypair(
-                pool.ssh.generated_file_export_path)
-        else:
-            ssh_pub_key = pool.ssh.ssh_public_key
-            ssh_priv_key = pool.ssh.ssh_private_key
-        # read public key data
-        with ssh_pub_key.open('rb') as fd:
-            ssh_pub_key_data = fd.read().decode('utf8')
-    # get node list if not provided
-    if nodes is None:
-        nodes = batch_client.compute_node.list(pool.id)
-    expiry = datetime.datetime.utcnow() + datetime.timedelta(
-        pool.ssh.expiry_days)
-    for node in nodes:
-        _add_admin_user_to_compute_node(
-            batch_client, pool, node, pool.ssh.username, ssh_pub_key_data,
-            None, expiry=expiry)
-    # generate tunnel script if requested
-    generate_ssh_tunnel_script(batch_client, pool, ssh_priv_key, nodes)
+    AdminUserProvisioner(batch_client, config, rdp=False).finish(nodes)
 
 
 def generate_ssh_tunnel_script(batch_client, pool, ssh_priv_key, nodes):
@@ -747,13 +906,16 @@ def generate_ssh_tunnel_script(batch_client, pool, ssh_priv_key, nodes):
         fd.write('declare -A nodes\n')
         fd.write('declare -A ips\n')
         fd.write('declare -A ports\n')
+        nodes = list(nodes)
+        rls = resolve_remote_login_settings(
+            batch_client, None, [node.id for node in nodes], pool_id=pool.id)
         i = 0
         for node in nodes:
-            rls = batch_client.compute_node.get_remote_login_settings(
-                pool.id, node.id)
             fd.write('nodes[{}]={}\n'.format(i, node.id))
-            fd.write('ips[{}]={}\n'.format(i, rls.remote_login_ip_address))
-            fd.write('ports[{}]={}\n'.format(i, rls.remote_login_port))
+            fd.write('ips[{}]={}\n'.format(
+                i, rls[node.id].remote_login_ip_address))
+            fd.write('ports[{}]={}\n'.format(
+                i, rls[node.id].remote_login_port))
             i += 1
         fd.write(
             'if [ -z $1 ]; then echo must specify node cardinal; exit 1; '
@@ -1727,6 +1889,163 @@ def enable_jobs(batch_client, config, jobid=None, jobscheduleid=None):
             logger.info('{} {} enabled'.format(text, job_id))
 
 
+def _is_batch_error(ex):
+    # type: (Exception) -> bool
+    """Check if an exception is a Batch service error
+    :param Exception ex: exception
+    :rtype: bool
+    :return: exception is a BatchErrorException
+    """
+    return isinstance(ex, batchmodels.batch_error.BatchErrorException)
+
+
+def _is_completed_state_error(ex):
+    # type: (Exception) -> bool
+    """Check if an exception is a Batch service error for an operation on
+    an entity which is already in a completed state
+    :param Exception ex: exception
+    :rtype: bool
+    :return: exception is a completed state error
+    """
+    return _is_batch_error(ex) and 'completed state' in ex.message.value
+
+
+def _is_task_not_found_error(ex):
+    # type: (Exception) -> bool
+    """Check if an exception is a Batch service error for a task which
+    does not exist
+    :param Exception ex: exception
+    :rtype: bool
+    :return: exception is a task not found error
+    """
+    return (_is_batch_error(ex) and
+            'The specified task does not exist' in ex.message.value)
+
+
+def _invoke_with_throttle_backoff(func, *args):
+    # type: (function, list) -> object
+    """Invoke a Batch service call, retrying with exponential backoff if the
+    request is throttled or the service is busy
+    :param function func: function to invoke
+    :param list args: arguments to function
+    :rtype: object
+    :return: result of function
+    """
+    retries = 0
+    while True:
+        try:
+            return func(*args)
+        except batchmodels.batch_error.BatchErrorException as ex:
+            if (retries >= _MAX_THROTTLE_RETRIES or
+                    ex.response is None or
+                    ex.response.status_code not in (429, 503)):
+                raise
+            retries += 1
+            delay = min((2 ** retries, 32)) + random.random()
+            logger.debug(
+                'request throttled with status code {}, retrying in '
+                '{:.1f} sec (retry {} of {})'.format(
+                    ex.response.status_code, delay, retries,
+                    _MAX_THROTTLE_RETRIES))
+            time.sleep(delay)
+
+
+def _execute_concurrently(operations, description, benign=None):
+    # type: (list, str, Callable[[Exception], bool]) -> dict
+    """Execute Batch service operations concurrently with bounded
+    parallelism and throttling backoff
+    :param list operations: list of (key, function, args) tuples
+    :param str description: description of operations
+    :param benign: predicate for exceptions which are not failures, such
+        as an entity already in the requested state
+    :rtype: dict
+    :return: map of key to exception of failed operations, including
+        benign exceptions
+    """
+    failed = {}
+    if len(operations) == 0:
+        return failed
+    logger.info('{}: {} {}'.format(
+        description, len(operations),
+        'item' if len(operations) == 1 else 'items'))
+    start = datetime.datetime.now()
+    pending = {}
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_MAX_EXECUTOR_WORKERS) as executor:
+        for key, func, args in operations:
+            pending[executor.submit(
+                _invoke_with_throttle_backoff, func, *args)] = key
+        for fut in concurrent.futures.as_completed(pending):
+            try:
+                fut.result()
+            except Exception as ex:
+                failed[pending[fut]] = ex
+    skipped = 0
+    if benign is not None:
+        skipped = len([x for x in failed.values() if benign(x)])
+    logger.info(
+        '{} finished: {} succeeded, {} skipped, {} failed in {:.2f} '
+        'sec'.format(
+            description, len(operations) - len(failed), skipped,
+            len(failed) - skipped,
+            (datetime.datetime.now() - start).total_seconds()))
+    return failed
+
+
+def _generate_id_filters(ids):
+    # type: (set) -> Generator[str]
+    """Generate OData filters matching a set of ids in batches
+    :param set ids: set of ids
+    :rtype: Generator[str]
+    :return: filter strings
+    """
+    ids = sorted(ids)
+    for i in range(0, len(ids), _MAX_FILTER_IDS):
+        yield ' or '.join(
+            '(id eq \'{}\')'.format(x)
+            for x in ids[i:i + _MAX_FILTER_IDS])
+
+
+def _wait_for_jobs(batch_client, jobs, schedules, action):
+    # type: (azure.batch.batch_service_client.BatchServiceClient, set,
+    #        set, str) -> None
+    """Wait for a set of jobs and job schedules to complete or be deleted
+    by polling with projected lists filtered to the ids waited on
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param set jobs: set of job ids
+    :param set schedules: set of job schedule ids
+    :param str action: action to wait on
+    """
+    jobs = set(jobs)
+    schedules = set(schedules)
+    while len(jobs) > 0 or len(schedules) > 0:
+        logger.debug('waiting for {} jobs and {} job schedules to {}'.format(
+            len(jobs), len(schedules), action))
+        if len(jobs) > 0:
+            incomplete = set()
+            for flt in _generate_id_filters(jobs):
+                incomplete.update(
+                    x.id for x in batch_client.job.list(
+                        job_list_options=batchmodels.JobListOptions(
+                            filter=flt, select='id,state'),
+                    ) if x.state != batchmodels.JobState.completed
+                )
+            jobs.intersection_update(incomplete)
+        if len(schedules) > 0:
+            incomplete = set()
+            for flt in _generate_id_filters(schedules):
+                incomplete.update(
+                    x.id for x in batch_client.job_schedule.list(
+                        job_schedule_list_options=batchmodels.
+                        JobScheduleListOptions(filter=flt, select='id,state'),
+                    ) if x.state != batchmodels.JobScheduleState.completed
+                )
+            schedules.intersection_update(incomplete)
+        if len(jobs) > 0 or len(schedules) > 0:
+            time.sleep(1)
+
+
 def del_tasks(batch_client, config, jobid=None, taskid=None, wait=False):
     # type: (azure.batch.batch_service_client.BatchServiceClient, dict,
     #        str, str, bool) -> None
@@ -1747,10 +2066,9 @@ def del_tasks(batch_client, config, jobid=None, taskid=None, wait=False):
         jobs = settings.job_specifications(config)
     else:
         jobs = [{'id': jobid}]
-    nocheck = {}
+    ops = []
     for job in jobs:
         job_id = settings.job_id(job)
-        nocheck[job_id] = set()
         if taskid is None:
             tasks = [
                 x.id for x in batch_client.task.list(
@@ -1764,47 +2082,30 @@ def del_tasks(batch_client, config, jobid=None, taskid=None, wait=False):
             if not util.confirm_action(
                     config, 'delete {} task in job {}'.format(
                         task, job_id)):
-                nocheck[job_id].add(task)
                 continue
-            logger.info('Deleting task: {}'.format(task))
-            batch_client.task.delete(job_id, task)
-    if wait:
-        for job in jobs:
-            job_id = settings.job_id(job)
-            if taskid is None:
-                tasks = [
-                    x.id for x in batch_client.task.list(
-                        job_id,
-                        task_list_options=batchmodels.TaskListOptions(
-                            select='id')
-                    )
-                ]
+            logger.debug('Deleting task {} in job {}'.format(task, job_id))
+            ops.append(
+                ((job_id, task), batch_client.task.delete, (job_id, task)))
+    failed = _execute_concurrently(
+        ops, 'deleting tasks', benign=_is_task_not_found_error)
+    check = set()
+    errors = []
+    for key, _, _ in ops:
+        if key in failed:
+            ex = failed[key]
+            if _is_task_not_found_error(ex):
+                logger.info('task {} in job {} does not exist'.format(
+                    key[1], key[0]))
             else:
-                tasks = [taskid]
-            for task in tasks:
-                try:
-                    if task in nocheck[job_id]:
-                        continue
-                except KeyError:
-                    pass
-                try:
-                    logger.debug(
-                        'waiting for task {} in job {} to terminate'.format(
-                            task, job_id))
-                    while True:
-                        batch_client.task.get(
-                            job_id, task,
-                            task_get_options=batchmodels.TaskGetOptions(
-                                select='id')
-                        )
-                        time.sleep(1)
-                except batchmodels.batch_error.BatchErrorException as ex:
-                    if 'The specified task does not exist' in ex.message.value:
-                        logger.info('task {} in job {} does not exist'.format(
-                            task, job_id))
-                        continue
-                    else:
-                        raise
+                logger.error('failed to delete task {} in job {}: {}'.format(
+                    key[1], key[0], ex))
+                errors.append(ex)
+            continue
+        check.add(key)
+    if len(errors) > 0:
+        raise errors[0]
+    if wait:
+        _wait_for_tasks(batch_client, check, deleted=True)
 
 
 def clean_mi_jobs(batch_client, config):
@@ -1930,75 +2231,56 @@ def delete_or_terminate_jobs(
         jobs = [{'id': jobid or jobscheduleid}]
     if termtasks:
         terminate_tasks(batch_client, config, jobid=jobid, wait=True)
-    nocheck = set()
+    ops = []
     for job in jobs:
         recurrence = (
             True if jobscheduleid is not None else settings.job_recurrence(job)
         )
         if recurrence is not None:
             text = 'job schedule'
+            client = batch_client.job_schedule
         else:
             text = 'job'
+            client = batch_client.job
         job_id = settings.job_id(job)
         if not util.confirm_action(
                 config, '{} {} {}'.format(action, text, job_id)):
-            nocheck.add(job_id)
             continue
-        logger.info('{} {}: {}'.format(action_present, text, job_id))
-        try:
-            if recurrence is not None:
-                if delete:
-                    batch_client.job_schedule.delete(job_id)
-                else:
-                    batch_client.job_schedule.terminate(job_id)
-            else:
-                if delete:
-                    batch_client.job.delete(job_id)
-                else:
-                    batch_client.job.terminate(job_id)
-        except batchmodels.batch_error.BatchErrorException as ex:
-            if delete and 'does not exist' in ex.message.value:
+        logger.debug('{} {}: {}'.format(action_present, text, job_id))
+        ops.append((
+            (text, job_id), client.delete if delete else client.terminate,
+            (job_id,)))
+    failed = _execute_concurrently(
+        ops, '{} jobs and job schedules'.format(action_present),
+        benign=_is_completed_state_error)
+    check = set()
+    errors = []
+    for key, _, _ in ops:
+        text, job_id = key
+        if key in failed:
+            ex = failed[key]
+            if (_is_batch_error(ex) and delete and
+                    'does not exist' in ex.message.value):
                 logger.error('{} {} does not exist'.format(job_id, text))
-                nocheck.add(job_id)
                 continue
-            elif 'completed state.' in ex.message.value:
+            elif _is_completed_state_error(ex):
                 logger.debug('{} {} already completed'.format(text, job_id))
             else:
-                raise
-    if wait:
-        for job in jobs:
-            recurrence = (
-                True if jobscheduleid is not None else
-                settings.job_recurrence(job)
-            )
-            if recurrence is not None:
-                text = 'job schedule'
-            else:
-                text = 'job'
-            job_id = settings.job_id(job)
-            if job_id in nocheck:
+                logger.error('failed to {} {} {}: {}'.format(
+                    action, text, job_id, ex))
+                errors.append(ex)
                 continue
-            try:
-                logger.debug('waiting for {} {} to {}'.format(
-                    text, job_id, action))
-                while True:
-                    if recurrence is not None:
-                        _js = batch_client.job_schedule.get(job_id)
-                        if _js.state == batchmodels.JobScheduleState.completed:
-                            break
-                    else:
-                        _job = batch_client.job.get(job_id)
-                        if _job.state == batchmodels.JobState.completed:
-                            break
-                    time.sleep(1)
-                logger.info('{} {} {}'.format(text, job_id, action_past))
-            except batchmodels.batch_error.BatchErrorException as ex:
-                if 'does not exist' in ex.message.value:
-                    if delete:
-                        logger.info('{} {} does not exist'.format(
-                            text, job_id))
-                else:
-                    raise
+        check.add(key)
+    if len(errors) > 0:
+        raise errors[0]
+    if wait:
+        _wait_for_jobs(
+            batch_client,
+            set(job_id for text, job_id in check if text == 'job'),
+            set(job_id for text, job_id in check if text != 'job'),
+            action)
+        for text, job_id in check:
+            logger.info('{} {} {}'.format(text, job_id, action_past))
 
 
 def delete_or_terminate_all_jobs(
@@ -2019,43 +2301,44 @@ def delete_or_terminate_all_jobs(
     else:
         action = 'terminate'
         action_present = 'terminating'
-    check = set()
     logger.debug('Getting list of all jobs')
-    jobs = batch_client.job.list()
+    jobs = batch_client.job.list(
+        job_list_options=batchmodels.JobListOptions(select='id'))
+    ops = []
     for job in jobs:
         if not util.confirm_action(
                 config, '{} {} job'.format(action, job.id)):
             continue
         if termtasks:
             terminate_tasks(batch_client, config, jobid=job.id, wait=True)
-        logger.info('{} job: {}'.format(action_present, job.id))
-        try:
-            if delete:
-                batch_client.job.delete(job.id)
-            else:
-                batch_client.job.terminate(job.id)
-        except batchmodels.batch_error.BatchErrorException as ex:
-            if delete and 'does not exist' in ex.message.value:
-                logger.error('{} job does not exist'.format(job.id))
-                continue
-            elif 'already in a completed state' in ex.message.value:
-                logger.debug('job {} already completed'.format(job.id))
+        logger.debug('{} job: {}'.format(action_present, job.id))
+        ops.append((
+            job.id,
+            batch_client.job.delete if delete else batch_client.job.terminate,
+            (job.id,)))
+    failed = _execute_concurrently(
+        ops, '{} jobs'.format(action_present),
+        benign=_is_completed_state_error)
+    check = set()
+    errors = []
+    for job_id, _, _ in ops:
+        if job_id in failed:
+            ex = failed[job_id]
+            if (_is_batch_error(ex) and delete and
+                    'does not exist' in ex.message.value):
+                logger.error('{} job does not exist'.format(job_id))
+            elif _is_completed_state_error(ex):
+                logger.debug('job {} already completed'.format(job_id))
             else:
-                raise
-        else:
-            check.add(job.id)
+                logger.error('failed to {} job {}: {}'.format(
+                    action, job_id, ex))
+                errors.append(ex)
+            continue
+        check.add(job_id)
+    if len(errors) > 0:
+        raise errors[0]
     if wait:
-        for job_id in check:
-            try:
-                logger.debug('waiting for job {} to {}'.format(job_id, action))
-                while True:
-                    _job = batch_client.job.get(job_id)
-                    if _job.state == batchmodels.JobState.completed:
-                        break
-                    time.sleep(1)
-            except batchmodels.batch_error.BatchErrorException as ex:
-                if 'The specified job does not exist' not in ex.message.value:
-                    raise
+        _wait_for_jobs(batch_client, check, set(), action)
 
 
 def delete_or_terminate_all_job_schedules(
@@ -2075,44 +2358,45 @@ def delete_or_terminate_all_job_schedules(
     else:
         action = 'terminate'
         action_present = 'terminating'
-    check = set()
     logger.debug('Getting list of all job schedules')
-    jobschedules = batch_client.job_schedule.list()
+    jobschedules = batch_client.job_schedule.list(
+        job_schedule_list_options=batchmodels.JobScheduleListOptions(
+            select='id'))
+    ops = []
     for js in jobschedules:
         if not util.confirm_action(
                 config, '{} job schedule {}'.format(action, js.id)):
             continue
-        logger.info('{} job schedule: {}'.format(action_present, js.id))
-        try:
-            if delete:
-                batch_client.job_schedule.delete(js.id)
-            else:
-                batch_client.job_schedule.terminate(js.id)
-        except batchmodels.batch_error.BatchErrorException as ex:
-            if delete and 'does not exist' in ex.message.value:
-                logger.error('{} job schedule does not exist'.format(js.id))
-                continue
-            elif 'already in completed state' in ex.message.value:
+        logger.debug('{} job schedule: {}'.format(action_present, js.id))
+        ops.append((
+            js.id,
+            batch_client.job_schedule.delete if delete else
+            batch_client.job_schedule.terminate,
+            (js.id,)))
+    failed = _execute_concurrently(
+        ops, '{} job schedules'.format(action_present),
+        benign=_is_completed_state_error)
+    check = set()
+    errors = []
+    for js_id, _, _ in ops:
+        if js_id in failed:
+            ex = failed[js_id]
+            if (_is_batch_error(ex) and delete and
+                    'does not exist' in ex.message.value):
+                logger.error('{} job schedule does not exist'.format(js_id))
+            elif _is_completed_state_error(ex):
                 logger.debug('job schedule {} already completed'.format(
-                    js.id))
+                    js_id))
             else:
-                raise
-        else:
-            check.add(js.id)
+                logger.error('failed to {} job schedule {}: {}'.format(
+                    action, js_id, ex))
+                errors.append(ex)
+            continue
+        check.add(js_id)
+    if len(errors) > 0:
+        raise errors[0]
     if wait:
-        for js_id in check:
-            try:
-                logger.debug('waiting for job schedule {} to {}'.format(
-                    js_id, action))
-                while True:
-                    _js = batch_client.job_schedule.get(js_id)
-                    if _js.state == batchmodels.JobScheduleState.completed:
-                        break
-                    time.sleep(1)
-            except batchmodels.batch_error.BatchErrorException as ex:
-                if ('The specified job schedule does not exist'
-                        not in ex.message.value):
-                    raise
+        _wait_for_jobs(batch_client, set(), check, action)
 
 
 def _send_docker_kill_signal(
@@ -2163,20 +2447,30 @@ def _send_docker_kill_signal(
     # TODO get task names for non-mi tasks?
     if task_name is None:
         task_name = '{}-{}'.format(job_id, task_id)
-    # for each task node target, issue docker kill
+    # issue docker kill on all task node targets concurrently
+    pools = {}
     for target in targets:
-        rls = batch_client.compute_node.get_remote_login_settings(
-            target[0], target[1])
-        command = [
-            'sudo',
-            ('/bin/bash -c "docker kill {tn}; docker ps -qa -f name={tn} | '
-             'xargs --no-run-if-empty docker rm -v"').format(tn=task_name),
-        ]
-        rc = crypto.connect_or_exec_ssh_command(
-            rls.remote_login_ip_address, rls.remote_login_port,
-            ssh_private_key, username, sync=True, tty=True, command=command)
-        if rc != 0:
-            logger.error('docker kill failed with return code: {}'.format(rc))
+        pools.setdefault(target[0], []).append(target[1])
+    ssh_targets = []
+    for pid in pools:
+        node_rls = resolve_remote_login_settings(
+            batch_client, config, pools[pid], pool_id=pid)
+        for nid in pools[pid]:
+            ssh_targets.append((
+                nid, node_rls[nid].remote_login_ip_address,
+                node_rls[nid].remote_login_port))
+    command = [
+        'sudo',
+        ('/bin/bash -c "docker kill {tn}; docker ps -qa -f name={tn} | '
+         'xargs --no-run-if-empty docker rm -v"').format(tn=task_name),
+    ]
+    for result in crypto.fan_out_ssh_command(
+            ssh_targets, ssh_private_key, username, command,
+            timeout=_DOCKER_KILL_SSH_TIMEOUT):
+        if result.returncode != 0:
+            logger.error(
+                'docker kill failed on node {} with return code: {}'.format(
+                    result.key, result.returncode))
 
 
 def terminate_tasks(
@@ -2206,92 +2500,123 @@ def terminate_tasks(
         jobs = settings.job_specifications(config)
     else:
         jobs = [{'id': jobid}]
-    nocheck = {}
+    # retrieve task state for all tasks of each job with a single projected
+    # list call and determine the termination action for each task
+    select = 'id,state,commandLine,nodeInfo,multiInstanceSettings'
+    targets = []
     for job in jobs:
         job_id = settings.job_id(job)
-        nocheck[job_id] = set()
         if taskid is None:
+            tasks = batch_client.task.list(
+                job_id,
+                task_list_options=batchmodels.TaskListOptions(select=select)
+            )
+        else:
             tasks = [
-                x.id for x in batch_client.task.list(
-                    job_id,
-                    task_list_options=batchmodels.TaskListOptions(select='id')
+                batch_client.task.get(
+                    job_id, taskid,
+                    task_get_options=batchmodels.TaskGetOptions(
+                        select=select)
                 )
             ]
-        else:
-            tasks = [taskid]
-        for task in tasks:
-            _task = batch_client.task.get(job_id, task)
+        for _task in tasks:
             # if completed, skip
             if (_task.state == batchmodels.TaskState.completed and
                     (not force or native)):
                 logger.debug(
                     'Skipping termination of completed task {} on '
-                    'job {}'.format(task, job_id))
-                nocheck[job_id].add(task)
+                    'job {}'.format(_task.id, job_id))
                 continue
             if not util.confirm_action(
                     config, 'terminate {} task in job {}'.format(
-                        task, job_id)):
-                nocheck[job_id].add(task)
+                        _task.id, job_id)):
                 continue
-            logger.info('Terminating task: {}'.format(task))
-            # directly send docker kill signal if running
-            if (not native and
-                    (_task.state == batchmodels.TaskState.running or force)):
-                # check if task is a docker task
-                if ('docker run' in _task.command_line or
-                        'docker exec' in _task.command_line):
-                    if (_task.multi_instance_settings is not None and
-                            _task.multi_instance_settings.
-                            number_of_instances > 1):
-                        task_is_mi = True
-                    else:
-                        task_is_mi = False
-                    _send_docker_kill_signal(
-                        batch_client, config, pool.ssh.username,
-                        ssh_private_key, _task.node_info.pool_id,
-                        _task.node_info.node_id, job_id, task, task_is_mi)
-                else:
-                    batch_client.task.terminate(job_id, task)
+            targets.append((job_id, _task))
+    if len(targets) == 0:
+        return
+    # issue task terminations and docker kill signals concurrently
+    ops = []
+    for job_id, _task in targets:
+        logger.debug('Terminating task {} in job {}'.format(
+            _task.id, job_id))
+        # directly send docker kill signal if running
+        if (not native and
+                (_task.state == batchmodels.TaskState.running or force) and
+                ('docker run' in _task.command_line or
+                 'docker exec' in _task.command_line)):
+            if (_task.multi_instance_settings is not None and
+                    _task.multi_instance_settings.number_of_instances > 1):
+                task_is_mi = True
             else:
-                batch_client.task.terminate(job_id, task)
+                task_is_mi = False
+            ops.append((
+                (job_id, _task.id), _send_docker_kill_signal,
+                (batch_client, config, pool.ssh.username, ssh_private_key,
+                 _task.node_info.pool_id, _task.node_info.node_id, job_id,
+                 _task.id, task_is_mi)))
+        else:
+            ops.append((
+                (job_id, _task.id), batch_client.task.terminate,
+                (job_id, _task.id)))
+    failed = _execute_concurrently(
+        ops, 'terminating tasks', benign=_is_completed_state_error)
+    check = set()
+    errors = []
+    for key, _, _ in ops:
+        if key in failed:
+            ex = failed[key]
+            if _is_completed_state_error(ex):
+                logger.debug('task {} in job {} is already completed'.format(
+                    key[1], key[0]))
+            else:
+                logger.error(
+                    'failed to terminate task {} in job {}: {}'.format(
+                        key[1], key[0], ex))
+                errors.append(ex)
+                continue
+        check.add(key)
+    if len(errors) > 0:
+        raise errors[0]
     if wait:
-        for job in jobs:
-            job_id = settings.job_id(job)
-            if taskid is None:
-                tasks = [
+        _wait_for_tasks(batch_client, check)
+
+
+def _wait_for_tasks(batch_client, tasks, deleted=False):
+    # type: (azure.batch.batch_service_client.BatchServiceClient, set,
+    #        bool) -> None
+    """Wait for a set of tasks to complete or be deleted by polling with
+    a single projected task list per job
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param set tasks: set of (job id, task id) tuples
+    :param bool deleted: wait for tasks to be deleted instead
+    """
+    pending = {}
+    for job_id, task_id in tasks:
+        pending.setdefault(job_id, set()).add(task_id)
+    while len(pending) > 0:
+        logger.debug('waiting for {} tasks in {} jobs to {}'.format(
+            sum(len(x) for x in pending.values()), len(pending),
+            'delete' if deleted else 'complete'))
+        for job_id in list(pending.keys()):
+            try:
+                remaining = set(
                     x.id for x in batch_client.task.list(
                         job_id,
                         task_list_options=batchmodels.TaskListOptions(
-                            select='id'
-                        )
-                    )
-                ]
-            else:
-                tasks = [taskid]
-            for task in tasks:
-                try:
-                    if task in nocheck[job_id]:
-                        continue
-                except KeyError:
-                    pass
-                try:
-                    logger.debug(
-                        'waiting for task {} in job {} to terminate'.format(
-                            task, job_id))
-                    while True:
-                        _task = batch_client.task.get(
-                            job_id, task,
-                            task_get_options=batchmodels.TaskGetOptions(
-                                select='state')
-                        )
-                        if _task.state == batchmodels.TaskState.completed:
-                            break
-                        time.sleep(1)
-                except batchmodels.batch_error.BatchErrorException as ex:
-                    if ('The specified task does not exist'
-                            not in ex.message.value):
-                        raise
+                            select='id,state'),
+                    ) if deleted or
+                    x.state != batchmodels.TaskState.completed
+                )
+            except batchmodels.batch_error.BatchErrorException as ex:
+                if 'The specified job does not exist' not in ex.message.value:
+                    raise
+                remaining = set()
+            pending[job_id].intersection_update(remaining)
+            if len(pending[job_id]) == 0:
+                pending.pop(job_id)
+        if len(pending) > 0:
+            time.sleep(1)
 
 
 def list_nodes(batch_client, config, pool_id=None, nodes=None):
@@ -2368,6 +2693,127 @@ def list_nodes(batch_client, config, pool_id=None, nodes=None):
         logger.info(os.linesep.join(log))
 
 
+def _remote_login_settings_cache_file(config, pool_id):
+    # type: (dict, str) -> pathlib.Path
+    """Get on-disk remote login settings cache file for a pool if enabled
+    :param dict config: configuration dict or None
+    :param str pool_id: pool id
+    :rtype: pathlib.Path
+    :return: cache file or None if not enabled
+    """
+    if config is None:
+        return None
+    try:
+        ssh = settings.pool_settings(config).ssh
+    except KeyError:
+        return None
+    if not ssh.cache_remote_login_settings:
+        return None
+    return pathlib.Path(
+        ssh.generated_file_export_path, _RLS_CACHE_FILE.format(pool_id))
+
+
+def _load_remote_login_settings_cache(config, pool_id, now):
+    # type: (dict, str, float) -> dict
+    """Load unexpired entries of the on-disk remote login settings cache
+    :param dict config: configuration dict
+    :param str pool_id: pool id
+    :param float now: current time
+    :rtype: dict
+    :return: dict of node id -> (remote login settings, expiry)
+    """
+    cf = _remote_login_settings_cache_file(config, pool_id)
+    if cf is None or not cf.exists():
+        return {}
+    try:
+        with cf.open('r') as f:
+            entries = json.load(f)
+    except (OSError, IOError, ValueError) as ex:
+        logger.debug('ignoring remote login settings cache {}: {}'.format(
+            cf, ex))
+        return {}
+    ret = {}
+    for node_id in entries:
+        ip, port, expiry = entries[node_id]
+        if expiry > now:
+            ret[node_id] = (
+                batchmodels.ComputeNodeGetRemoteLoginSettingsResult(
+                    remote_login_ip_address=ip, remote_login_port=port),
+                expiry,
+            )
+    return ret
+
+
+def _save_remote_login_settings_cache(config, pool_id, cache):
+    # type: (dict, str, dict) -> None
+    """Save the remote login settings cache of a pool to disk if enabled
+    :param dict config: configuration dict
+    :param str pool_id: pool id
+    :param dict cache: dict of node id -> (remote login settings, expiry)
+    """
+    cf = _remote_login_settings_cache_file(config, pool_id)
+    if cf is None:
+        return
+    entries = {}
+    for node_id in cache:
+        rls, expiry = cache[node_id]
+        entries[node_id] = [
+            rls.remote_login_ip_address, rls.remote_login_port, expiry]
+    cf.parent.mkdir(mode=0o750, parents=True, exist_ok=True)
+    with cf.open('w') as f:
+        f.write(util.decode_string(json.dumps(entries)))
+
+
+def resolve_remote_login_settings(
+        batch_client, config, node_ids, pool_id=None):
+    # type: (batch.BatchServiceClient, dict, List[str], str) -> dict
+    """Resolve remote login settings for nodes of a pool. Settings are
+    retrieved concurrently and cached per pool for a short period in
+    memory and, if enabled, on disk.
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param dict config: configuration dict or None to disable disk cache
+    :param list node_ids: list of node ids
+    :param str pool_id: pool id, defaults to pool id in configuration
+    :rtype: dict
+    :return: dict of node id -> remote login settings
+    """
+    if pool_id is None:
+        pool_id = settings.pool_id(config)
+    now = time.time()
+    ret = {}
+    with _RLS_CACHE_LOCK:
+        if pool_id not in _RLS_CACHE:
+            _RLS_CACHE[pool_id] = _load_remote_login_settings_cache(
+                config, pool_id, now)
+        cache = _RLS_CACHE[pool_id]
+        for node_id in node_ids:
+            if node_id in cache and cache[node_id][1] > now:
+                ret[node_id] = cache[node_id][0]
+    missing = [x for x in node_ids if x not in ret]
+    if len(missing) == 0:
+        return ret
+    logger.debug(
+        'retrieving remote login settings for {} nodes in pool {}'.format(
+            len(missing), pool_id))
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_MAX_EXECUTOR_WORKERS) as executor:
+        results = executor.map(
+            lambda x: _invoke_with_throttle_backoff(
+                batch_client.compute_node.get_remote_login_settings,
+                pool_id, x),
+            missing)
+        fetched = dict(zip(missing, results))
+    expiry = time.time() + _RLS_CACHE_TTL_SECONDS
+    with _RLS_CACHE_LOCK:
+        cache = _RLS_CACHE[pool_id]
+        for node_id in fetched:
+            cache[node_id] = (fetched[node_id], expiry)
+        _save_remote_login_settings_cache(config, pool_id, cache)
+    ret.update(fetched)
+    return ret
+
+
 def get_remote_login_settings(batch_client, config, nodes=None):
     # type: (batch.BatchServiceClient, dict, List[str]) -> dict
     """Get remote login settings
@@ -2380,14 +2826,19 @@ def get_remote_login_settings(batch_client, config, nodes=None):
     """
     pool_id = settings.pool_id(config)
     if nodes is None:
-        nodes = batch_client.compute_node.list(pool_id)
+        nodes = batch_client.compute_node.list(
+            pool_id,
+            compute_node_list_options=batchmodels.ComputeNodeListOptions(
+                select='id'))
+    node_ids = [node.id for node in nodes]
+    rls = resolve_remote_login_settings(
+        batch_client, config, node_ids, pool_id=pool_id)
     ret = {}
-    for node in nodes:
-        rls = batch_client.compute_node.get_remote_login_settings(
-            pool_id, node.id)
+    for node_id in node_ids:
         logger.info('node {}: ip {} port {}'.format(
-            node.id, rls.remote_login_ip_address, rls.remote_login_port))
-        ret[node.id] = rls
+            node_id, rls[node_id].remote_login_ip_address,
+            rls[node_id].remote_login_port))
+        ret[node_id] = rls[node_id]
     return ret
 
 
@@ -2412,8 +2863,8 @@ def get_remote_login_setting_for_node(batch_client, config, cardinal, node_id):
                 ('cardinal value {} invalid for number of nodes {} in '
                  'pool {}').format(cardinal, len(nodes), pool_id))
         node_id = nodes[cardinal].id
-    rls = batch_client.compute_node.get_remote_login_settings(
-        pool_id, node_id)
+    rls = resolve_remote_login_settings(
+        batch_client, config, [node_id], pool_id=pool_id)[node_id]
     return rls.remote_login_ip_address, rls.remote_login_port
 
 
@@ -2526,6 +2977,226 @@ def stream_file_and_wait_for_task(
             fd.close()
 
 
+class _TailFile(object):
+    """Tail state of a single task file"""
+    def __init__(self, job_id, task_id, file, prefix):
+        """Ctor for _TailFile
+        :param _TailFile self: this
+        :param str job_id: job id
+        :param str task_id: task id
+        :param str file: task-relative file path
+        :param str prefix: output line prefix
+        """
+        self.job_id = job_id
+        self.task_id = task_id
+        self.file = file
+        self.prefix = prefix
+        self.offset = 0
+        self.buffer = b''
+        self.interval = _TAIL_POLL_INTERVAL_MIN
+        self.next_poll = 0
+        self.task_completed = False
+        self.inflight = False
+        self.done = False
+
+    def schedule(self, now, active):
+        """Schedule next poll, polling active files at the minimum interval
+        and exponentially backing off idle files
+        :param _TailFile self: this
+        :param float now: current time
+        :param bool active: file had new data on last poll
+        """
+        if active:
+            self.interval = _TAIL_POLL_INTERVAL_MIN
+        else:
+            self.interval = min(
+                (self.interval * 2, _TAIL_POLL_INTERVAL_MAX))
+        self.next_poll = now + self.interval
+
+    def emit(self, data, flush=False):
+        """Print complete lines of data with prefix
+        :param _TailFile self: this
+        :param bytes data: data to append
+        :param bool flush: flush any remaining partial line
+        """
+        self.buffer += data
+        lines = self.buffer.split(b'\n')
+        self.buffer = lines.pop()
+        if flush and len(self.buffer) > 0:
+            lines.append(self.buffer)
+            self.buffer = b''
+        for line in lines:
+            print('{}{}'.format(
+                self.prefix, line.decode('utf8', 'replace').rstrip('\r')))
+
+
+def _poll_tail_file(batch_client, tf, completed):
+    # type: (batch.BatchServiceClient, _TailFile, bool) -> tuple
+    """Poll a task file for new data beyond current offset
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param _TailFile tf: tail file state
+    :param bool completed: task was completed prior to poll
+    :rtype: tuple
+    :return: (new data or None if file not available, completed)
+    """
+    try:
+        tfp = batch_client.file.get_properties_from_task(
+            tf.job_id, tf.task_id, tf.file, raw=True)
+    except batchmodels.BatchErrorException as ex:
+        if ('The specified operation is not valid for the current '
+                'state of the resource.' in ex.message.value or
+                'The specified file does not exist.' in ex.message.value or
+                'The specified path does not exist.' in ex.message.value):
+            return None, completed
+        raise
+    size = int(tfp.response.headers['Content-Length'])
+    if size <= tf.offset:
+        return b'', completed
+    frag = batch_client.file.get_from_task(
+        tf.job_id, tf.task_id, tf.file,
+        batchmodels.FileGetFromTaskOptions(
+            ocp_range='bytes={}-{}'.format(tf.offset, size - 1))
+    )
+    return b''.join(frag), completed
+
+
+def tail_files_for_tasks(batch_client, config, filespec=None):
+    # type: (batch.BatchServiceClient, dict, str) -> None
+    """Tail files of multiple tasks concurrently to the local console
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param dict config: configuration dict
+    :param str filespec: filespec (jobid,taskid_pattern,filename[:filename])
+    """
+    if filespec is None:
+        job_id = None
+        task_pattern = None
+        files = None
+    else:
+        job_id, task_pattern, files = filespec.split(',')
+    if job_id is None:
+        job_id = util.get_input('Enter job id: ')
+    if task_pattern is None:
+        task_pattern = util.get_input(
+            'Enter task id pattern or @RUNNING [@RUNNING]: ')
+    if util.is_none_or_empty(task_pattern):
+        task_pattern = '@RUNNING'
+    if files is None:
+        files = util.get_input(
+            'Enter task-relative file paths to tail separated by : '
+            '[stdout.txt:stderr.txt]: ')
+    if util.is_none_or_empty(files):
+        files = 'stdout.txt:stderr.txt'
+    files = [x for x in files.split(':') if util.is_not_empty(x)]
+    running_only = task_pattern == '@RUNNING'
+    logger.debug('attempting to tail files {} from job={} tasks={}'.format(
+        files, job_id, task_pattern))
+    trackers = []
+    tracked = {}
+    ignored = None
+    outstanding = 0
+    last_discovery = None
+    pending = {}
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=_MAX_EXECUTOR_WORKERS)
+    try:
+        while True:
+            now = time.time()
+            # refresh task states with a single list call and track any
+            # newly matching tasks
+            if (last_discovery is None or
+                    now - last_discovery >= _TAIL_TASK_DISCOVERY_INTERVAL):
+                last_discovery = now
+                tasks = batch_client.task.list(
+                    job_id,
+                    task_list_options=batchmodels.TaskListOptions(
+                        select='id,state'),
+                )
+                outstanding = 0
+                matched = 0
+                skipped = set()
+                for task in tasks:
+                    completed = task.state == batchmodels.TaskState.completed
+                    if running_only:
+                        # do not replay tasks that completed prior to
+                        # invocation
+                        if ignored is None and completed:
+                            skipped.add(task.id)
+                            continue
+                        elif ignored is not None and task.id in ignored:
+                            continue
+                    elif not fnmatch.fnmatch(task.id, task_pattern):
+                        continue
+                    matched += 1
+                    if not completed:
+                        outstanding += 1
+                    if (task.id not in tracked and
+                            (completed or task.state ==
+                             batchmodels.TaskState.running)):
+                        tracked[task.id] = []
+                        for file in files:
+                            if len(files) > 1:
+                                prefix = '[{}:{}] '.format(task.id, file)
+                            else:
+                                prefix = '[{}] '.format(task.id)
+                            tf = _TailFile(job_id, task.id, file, prefix)
+                            tracked[task.id].append(tf)
+                            trackers.append(tf)
+                    if completed and task.id in tracked:
+                        for tf in tracked[task.id]:
+                            if not tf.task_completed:
+                                tf.task_completed = True
+                                tf.next_poll = now
+                if ignored is None:
+                    ignored = skipped
+                    if matched == 0:
+                        logger.error(
+                            'no tasks to tail for job {} tasks={}'.format(
+                                job_id, task_pattern))
+                        return
+                del skipped
+            # issue polls for files that are due
+            trackers = [tf for tf in trackers if not tf.done]
+            for tf in trackers:
+                if not tf.inflight and tf.next_poll <= now:
+                    tf.inflight = True
+                    pending[executor.submit(
+                        _poll_tail_file, batch_client, tf,
+                        tf.task_completed)] = tf
+            if len(pending) == 0 and outstanding == 0 and len(trackers) == 0:
+                break
+            # wait until the next poll is due or a poll completes
+            due = [tf.next_poll for tf in trackers if not tf.inflight]
+            due.append(last_discovery + _TAIL_TASK_DISCOVERY_INTERVAL)
+            timeout = max((min(due) - time.time(), 0))
+            if len(pending) == 0:
+                time.sleep(timeout)
+                continue
+            done, _ = concurrent.futures.wait(
+                list(pending.keys()), timeout=timeout,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            now = time.time()
+            for fut in done:
+                tf = pending.pop(fut)
+                tf.inflight = False
+                data, completed = fut.result()
+                if data:
+                    tf.offset += len(data)
+                    tf.emit(data)
+                    tf.schedule(now, True)
+                elif completed:
+                    # no new data after task completion, file is drained
+                    tf.emit(b'', flush=True)
+                    tf.done = True
+                else:
+                    tf.schedule(now, False)
+    finally:
+        executor.shutdown(wait=False)
+    logger.info('all tailed files completed for job={} tasks={}'.format(
+        job_id, task_pattern))
+
+
 def get_file_via_task(batch_client, config, filespec=None):
     # type: (batch.BatchServiceClient, dict, str) -> None
     """Get a file task style
@@ -2585,6 +3256,217 @@ def get_file_via_task(batch_client, config, filespec=None):
         file, job_id, task_id, fp.stat().st_size))
 
 
+def _get_file_range(batch_client, via_task, id1, id2, name, start, end):
+    # type: (batch.BatchServiceClient, bool, str, str, str, int,
+    #        int) -> object
+    """Get a stream of a file from a task or compute node
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param bool via_task: get file from task rather than compute node
+    :param str id1: job id or pool id
+    :param str id2: task id or node id
+    :param str name: file name
+    :param int start: start byte offset or None for entire file
+    :param int end: end byte offset (inclusive)
+    :rtype: object
+    :return: data stream
+    """
+    ocp_range = None
+    if start is not None:
+        ocp_range = 'bytes={}-{}'.format(start, end)
+    if via_task:
+        return batch_client.file.get_from_task(
+            id1, id2, name,
+            batchmodels.FileGetFromTaskOptions(ocp_range=ocp_range))
+    else:
+        return batch_client.file.get_from_compute_node(
+            id1, id2, name,
+            batchmodels.FileGetFromComputeNodeOptions(ocp_range=ocp_range))
+
+
+def _download_file_range(batch_client, via_task, id1, id2, name, fp, start,
+                         end):
+    # type: (batch.BatchServiceClient, bool, str, str, str, pathlib.Path,
+    #        int, int) -> int
+    """Download a file or a byte range of a file into a local file
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param bool via_task: get file from task rather than compute node
+    :param str id1: job id or pool id
+    :param str id2: task id or node id
+    :param str name: file name
+    :param pathlib.Path fp: local (preallocated) file to write to
+    :param int start: start byte offset or None for entire file
+    :param int end: end byte offset (inclusive)
+    :rtype: int
+    :return: bytes written
+    """
+    stream = _get_file_range(
+        batch_client, via_task, id1, id2, name, start, end)
+    written = 0
+    with fp.open('r+b') as f:
+        if start is not None:
+            f.seek(start)
+        for fdata in stream:
+            f.write(fdata)
+            written += len(fdata)
+    return written
+
+
+def _finalize_download(fp, tmp, mtime):
+    # type: (pathlib.Path, pathlib.Path, int) -> None
+    """Move a completed partial download into place
+    :param pathlib.Path fp: local file
+    :param pathlib.Path tmp: partial file
+    :param int mtime: remote last modified time
+    """
+    if fp.exists():
+        fp.unlink()
+    tmp.rename(fp)
+    if mtime is not None:
+        os.utime(str(fp), (mtime, mtime))
+
+
+def _truncate_failed_download(tmp, mtime, ranges, done):
+    # type: (pathlib.Path, int, list, set) -> None
+    """Truncate a failed partial download to its leading run of completed
+    ranges so that a later attempt can resume from its size, or remove it
+    if there is nothing to resume
+    :param pathlib.Path tmp: partial file
+    :param int mtime: remote last modified time
+    :param list ranges: ranges requested for the partial file
+    :param set done: ranges which completed
+    """
+    prefix = 0
+    for rng in ranges:
+        if rng not in done or rng[0] is None:
+            break
+        prefix = rng[1] + 1
+    if prefix == 0 or mtime is None:
+        tmp.unlink()
+        return
+    with tmp.open('r+b') as f:
+        f.truncate(prefix)
+    os.utime(str(tmp), (mtime, mtime))
+
+
+def _download_files_concurrently(
+        batch_client, files, via_task, id1, id2, incl):
+    # type: (batch.BatchServiceClient, list, bool, str, str, str) -> int
+    """Download files from a task or compute node concurrently into the
+    id1/id2 local directory. Files that exist locally with the same size
+    and last modified time are skipped and large files are retrieved with
+    concurrent ranged reads. Partial files left by a failed attempt are
+    resumed from their size.
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param list files: list of azure.batch.models.NodeFile
+    :param bool via_task: get files from task rather than compute node
+    :param str id1: job id or pool id
+    :param str id2: task id or node id
+    :param str incl: include filter
+    :rtype: int
+    :return: number of files matched
+    """
+    matched = 0
+    skipped = 0
+    total_size = 0
+    dirs_created = set('.')
+    # map of future -> (local file, range), and local file -> [partial file,
+    # mtime, outstanding ranges, ranges, completed range starts]
+    pending = {}
+    downloads = {}
+    failed = set()
+    start = datetime.datetime.now()
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=_MAX_EXECUTOR_WORKERS) as executor:
+        for file in files:
+            if file.is_directory:
+                continue
+            if incl is not None and not fnmatch.fnmatch(file.name, incl):
+                continue
+            matched += 1
+            fp = pathlib.Path(id1, id2, file.name)
+            if str(fp.parent) not in dirs_created:
+                fp.parent.mkdir(mode=0o750, parents=True, exist_ok=True)
+                dirs_created.add(str(fp.parent))
+            size = None
+            mtime = None
+            if file.properties is not None:
+                size = file.properties.content_length
+                if file.properties.last_modified is not None:
+                    mtime = calendar.timegm(
+                        file.properties.last_modified.utctimetuple())
+            # skip files which have already been retrieved
+            if size is not None and mtime is not None and fp.exists():
+                st = fp.stat()
+                if st.st_size == size and int(st.st_mtime) == mtime:
+                    skipped += 1
+                    continue
+            # resume from a partial file left by a failed attempt if it
+            # is stamped with the same remote last modified time
+            tmp = fp.with_name(fp.name + _PARTIAL_DOWNLOAD_SUFFIX)
+            offset = 0
+            if size is not None and mtime is not None and tmp.exists():
+                st = tmp.stat()
+                if 0 < st.st_size < size and int(st.st_mtime) == mtime:
+                    offset = st.st_size
+                    logger.debug('resuming {} from offset {}'.format(
+                        fp, offset))
+            # preallocate partial file and issue range requests
+            with tmp.open('r+b' if offset > 0 else 'wb') as f:
+                if size is not None:
+                    f.truncate(size)
+            if size is None:
+                ranges = [(None, None)]
+            elif offset == 0 and size <= _DOWNLOAD_RANGE_BYTES:
+                ranges = [(None, None)] if size != 0 else []
+            else:
+                ranges = [
+                    (x, min((x + _DOWNLOAD_RANGE_BYTES, size)) - 1)
+                    for x in range(offset, size, _DOWNLOAD_RANGE_BYTES)
+                ]
+            if len(ranges) == 0:
+                _finalize_download(fp, tmp, mtime)
+                continue
+            downloads[fp] = [tmp, mtime, len(ranges), ranges, set()]
+            for rng in ranges:
+                pending[executor.submit(
+                    _download_file_range, batch_client, via_task, id1, id2,
+                    file.name, tmp, rng[0], rng[1])] = (fp, rng)
+        # finalize files as all of their ranges complete
+        for fut in concurrent.futures.as_completed(pending):
+            fp, rng = pending[fut]
+            try:
+                total_size += fut.result()
+                downloads[fp][4].add(rng)
+            except Exception as ex:
+                if fp not in failed:
+                    logger.error('failed to retrieve file {}: {}'.format(
+                        fp, ex))
+                    failed.add(fp)
+            downloads[fp][2] -= 1
+            if downloads[fp][2] > 0:
+                continue
+            tmp, mtime, _, ranges, done = downloads.pop(fp)
+            if fp in failed:
+                _truncate_failed_download(tmp, mtime, ranges, done)
+            else:
+                _finalize_download(fp, tmp, mtime)
+    diff = (datetime.datetime.now() - start).total_seconds()
+    if matched > 0:
+        logger.info(
+            ('retrieved {0:.4f} MiB in {1} files ({2} skipped as '
+             'up-to-date) to {3} in {4:.2f} sec ({5:.3f} Mbit/s)').format(
+                 total_size / _MEGABYTE, matched - skipped - len(failed),
+                 skipped, pathlib.Path(id1, id2), diff,
+                 (total_size * 8 / 1e6) / diff if diff > 0 else 0))
+    if len(failed) > 0:
+        raise RuntimeError('failed to retrieve {} files to {}'.format(
+            len(failed), pathlib.Path(id1, id2)))
+    return matched
+
+
 def get_all_files_via_task(batch_client, config, filespec=None):
     # type: (batch.BatchServiceClient, dict, str) -> None
     """Get all files from a task
@@ -2629,22 +3511,8 @@ def get_all_files_via_task(batch_client, config, filespec=None):
     # iterate through all files in task and download them
     logger.debug('downloading files to {}/{}'.format(job_id, task_id))
     files = batch_client.file.list_from_task(job_id, task_id, recursive=True)
-    i = 0
-    dirs_created = set('.')
-    for file in files:
-        if file.is_directory:
-            continue
-        if incl is not None and not fnmatch.fnmatch(file.name, incl):
-            continue
-        fp = pathlib.Path(job_id, task_id, file.name)
-        if str(fp.parent) not in dirs_created:
-            fp.parent.mkdir(mode=0o750, parents=True, exist_ok=True)
-            dirs_created.add(str(fp.parent))
-        stream = batch_client.file.get_from_task(job_id, task_id, file.name)
-        with fp.open('wb') as f:
-            for fdata in stream:
-                f.write(fdata)
-        i += 1
+    i = _download_files_concurrently(
+        batch_client, files, True, job_id, task_id, incl)
     if i == 0:
         logger.error('no files found for task {} job {} include={}'.format(
             task_id, job_id, incl if incl is not None else ''))
@@ -2679,23 +3547,8 @@ def get_all_files_via_node(batch_client, config, filespec=None):
     logger.debug('downloading files to {}/{}'.format(pool_id, node_id))
     files = batch_client.file.list_from_compute_node(
         pool_id, node_id, recursive=True)
-    i = 0
-    dirs_created = set('.')
-    for file in files:
-        if file.is_directory:
-            continue
-        if incl is not None and not fnmatch.fnmatch(file.name, incl):
-            continue
-        fp = pathlib.Path(pool_id, node_id, file.name)
-        if str(fp.parent) not in dirs_created:
-            fp.parent.mkdir(mode=0o750, parents=True, exist_ok=True)
-            dirs_created.add(str(fp.parent))
-        stream = batch_client.file.get_from_compute_node(
-            pool_id, node_id, file.name)
-        with fp.open('wb') as f:
-            for fdata in stream:
-                f.write(fdata)
-        i += 1
+    i = _download_files_concurrently(
+        batch_client, files, False, pool_id, node_id, incl)
     if i == 0:
         logger.error('no files found for pool {} node {} include={}'.format(
             pool_id, node_id, incl if incl is not None else ''))
@@ -3216,13 +4069,15 @@ def _construct_task(
         batch_client, blob_client, keyvault_client, config, bxfile,
         bs, native, is_windows, tempdisk, allow_run_on_missing,
         docker_missing_images, singularity_missing_images, cloud_pool,
-        pool, jobspec, job_id, job_env_vars, task_map, existing_tasklist,
-        reserved_task_id, lasttaskid, is_merge_task, _task):
+        pool, jobspec, task_context, job_id, job_env_vars, task_map,
+        existing_tasklist, reserved_task_id, lasttaskid, is_merge_task,
+        _task):
     # type: (batch.BatchServiceClient, azureblob.BlockBlobService,
     #        azure.keyvault.KeyVaultClient, dict, tuple,
     #        settings.BatchShipyardSettings, bool, bool, str, bool,
     #        list, list, batchmodels.CloudPool, settings.PoolSettings,
-    #        dict, str, dict, dict, list, str, str, bool, dict) -> str
+    #        dict, settings.TaskContextSettings, str, dict, dict, list, str,
+    #        str, bool, dict) -> str
     """Contruct a Batch task and add it to the task map
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
@@ -3240,6 +4095,8 @@ def _construct_task(
     :param batchmodels.CloudPool cloud_pool: cloud pool
     :param settings.PoolSettings pool: pool settings
     :param dict jobspec: job spec
+    :param settings.TaskContextSettings task_context: task context settings
+    :param str job_id: job id
     :param dict job_env_vars: job env vars
     :param dict task_map: task map
     :param list existing_tasklist: existing task list
@@ -3261,7 +4118,7 @@ def _construct_task(
         settings.set_task_name(_task, '{}-{}'.format(job_id, _task_id))
     del _task_id
     task = settings.task_settings(
-        cloud_pool, config, pool, jobspec, _task)
+        cloud_pool, config, pool, jobspec, _task, context=task_context)
     is_singularity = util.is_not_empty(task.singularity_image)
     # retrieve keyvault task env vars
     if util.is_not_empty(
@@ -3960,6 +4817,9 @@ def add_jobs(
             job_env_vars = util.merge_dict(job_env_vars, jevs or {})
             del jevs
         del _job_env_vars_secid
+        # retrieve settings common to all tasks of the job once
+        task_context = settings.task_context_settings(
+            cloud_pool, config, pool, jobspec)
         # add all tasks under job
         task_map = {}
         for _task in settings.job_tasks(config, jobspec):
@@ -3967,7 +4827,7 @@ def add_jobs(
                 batch_client, blob_client, keyvault_client, config, bxfile,
                 bs, native, is_windows, tempdisk, allow_run_on_missing,
                 docker_missing_images, singularity_missing_images, cloud_pool,
-                pool, jobspec, job_id, job_env_vars, task_map,
+                pool, jobspec, task_context, job_id, job_env_vars, task_map,
                 existing_tasklist, reserved_task_id, lasttaskid, False, _task)
         if has_merge_task:
             _task = settings.job_merge_task(jobspec)
@@ -3975,7 +4835,7 @@ def add_jobs(
                 batch_client, blob_client, keyvault_client, config, bxfile,
                 bs, native, is_windows, tempdisk, allow_run_on_missing,
                 docker_missing_images, singularity_missing_images, cloud_pool,
-                pool, jobspec, job_id, job_env_vars, task_map,
+                pool, jobspec, task_context, job_id, job_env_vars, task_map,
                 existing_tasklist, reserved_task_id, lasttaskid, True, _task)
             # set dependencies on merge task
             merge_task = task_map.pop(merge_task_id)
@@ -32,15 +32,9 @@ from builtins import (  # noqa
 # stdlib imports
 import logging
 # non-stdlib imports
-import azure.batch.batch_auth as batchauth
-import azure.batch.batch_service_client as batchsc
-import azure.cosmosdb.table as azuretable
-import azure.keyvault
-import azure.mgmt.batch
-import azure.mgmt.compute
-import azure.mgmt.network
-import azure.mgmt.resource
-import azure.storage.blob as azureblob
+# client libraries are imported on demand when creating the corresponding
+# client as importing them is expensive and they are not required by every
+# command
 # local imports
 from . import aad
 from . import settings
@@ -71,6 +65,7 @@ def _create_resource_client(ctx, credentials=None, subscription_id=None):
         if mgmt_aad is None:
             mgmt_aad = settings.credentials_management(ctx.config).aad
         subscription_id = ctx.subscription_id or mgmt_aad.subscription_id
+    import azure.mgmt.resource
     return azure.mgmt.resource.resources.ResourceManagementClient(
         credentials, subscription_id)
 
@@ -93,6 +88,7 @@ def _create_compute_client(ctx, credentials=None, subscription_id=None):
         if mgmt_aad is None:
             mgmt_aad = settings.credentials_management(ctx.config).aad
         subscription_id = ctx.subscription_id or mgmt_aad.subscription_id
+    import azure.mgmt.compute
     return azure.mgmt.compute.ComputeManagementClient(
         credentials, subscription_id)
 
@@ -113,6 +109,7 @@ def _create_network_client(ctx, credentials=None, subscription_id=None):
         if mgmt_aad is None:
             mgmt_aad = settings.credentials_management(ctx.config).aad
         subscription_id = ctx.subscription_id or mgmt_aad.subscription_id
+    import azure.mgmt.network
     return azure.mgmt.network.NetworkManagementClient(
         credentials, subscription_id)
 
@@ -135,6 +132,7 @@ def _create_batch_mgmt_client(ctx, credentials=None, subscription_id=None):
         if mgmt_aad is None:
             mgmt_aad = settings.credentials_management(ctx.config).aad
         subscription_id = ctx.subscription_id or mgmt_aad.subscription_id
+    import azure.mgmt.batch
     batch_mgmt_client = azure.mgmt.batch.BatchManagementClient(
         credentials, subscription_id)
     batch_mgmt_client.config.add_user_agent(
@@ -211,6 +209,7 @@ def create_keyvault_client(ctx):
     kv = settings.credentials_keyvault(ctx.config)
     if util.is_none_or_empty(ctx.keyvault_uri or kv.keyvault_uri):
         return None
+    import azure.keyvault
     return azure.keyvault.KeyVaultClient(
         aad.create_aad_credentials(ctx, kv.aad)
     )
@@ -229,8 +228,10 @@ def _create_batch_service_client(ctx):
         batch_aad = settings.credentials_batch(ctx.config).aad
         credentials = aad.create_aad_credentials(ctx, batch_aad)
     else:
+        import azure.batch.batch_auth as batchauth
         credentials = batchauth.SharedKeyCredentials(
             bc.account, bc.account_key)
+    import azure.batch.batch_service_client as batchsc
     batch_client = batchsc.BatchServiceClient(
         credentials, base_url=bc.account_service_url)
     batch_client.config.add_user_agent('batch-shipyard/{}'.format(__version__))
@@ -246,6 +247,8 @@ def create_storage_clients():
     account_name = storage.get_storageaccount()
     account_key = storage.get_storageaccount_key()
     endpoint_suffix = storage.get_storageaccount_endpoint()
+    import azure.cosmosdb.table as azuretable
+    import azure.storage.blob as azureblob
     blob_client = azureblob.BlockBlobService(
         account_name=account_name,
         account_key=account_key,
@@ -30,8 +30,11 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import atexit
 import base64
 import collections
+import concurrent.futures
+import datetime
 import getpass
 import logging
 import os
@@ -39,9 +42,11 @@ try:
     import pathlib2 as pathlib
 except ImportError:
     import pathlib
+import shutil
 import tempfile
 import stat
 import subprocess
+import threading
 # local imports
 from . import settings
 from . import util
@@ -52,9 +57,30 @@ util.setup_logger(logger)
 # global defines
 _SSH_KEY_PREFIX = 'id_rsa_shipyard'
 _REMOTEFS_SSH_KEY_PREFIX = '{}_remotefs'.format(_SSH_KEY_PREFIX)
+_SSH_FAN_OUT_MAX_SESSIONS = 40
+_SSH_CONTROL_PERSIST_SECONDS = 300
+_SSH_CONTROL_DIR = None
+_SSH_CONTROL_DIR_LOCK = threading.Lock()
+_RELAY_SERVER_FILE = '.shipyard-relay-server.py'
+# minimal file server bound to an explicit address for python 2 and 3
+_RELAY_SERVER_SCRIPT = (
+    'import sys\n'
+    'try:\n'
+    '    from http.server import HTTPServer, SimpleHTTPRequestHandler\n'
+    'except ImportError:\n'
+    '    from BaseHTTPServer import HTTPServer\n'
+    '    from SimpleHTTPServer import SimpleHTTPRequestHandler\n'
+    'HTTPServer((sys.argv[1], int(sys.argv[2])),\n'
+    '           SimpleHTTPRequestHandler).serve_forever()\n'
+)
 # named tuples
 PfxSettings = collections.namedtuple(
     'PfxSettings', ['filename', 'passphrase', 'sha1'])
+SSHCommandResult = collections.namedtuple(
+    'SSHCommandResult', [
+        'key', 'returncode', 'stdout', 'stderr', 'timed_out', 'elapsed'
+    ]
+)
 
 
 def get_ssh_key_prefix():
@@ -128,6 +154,65 @@ def check_ssh_private_key_filemode(ssh_private_key):
     return not any([_mode_check(fstat, x) for x in modes])
 
 
+def get_ssh_connection_reuse_options():
+    # type: (None) -> List[str]
+    """Get SSH options to reuse a single authenticated connection per
+    remote host through a control master socket for the lifetime of this
+    process. Sessions which cannot be multiplexed, e.g., if the remote
+    sshd refuses additional sessions, fall back to a new connection.
+    :rtype: list
+    :return: ssh options, empty if connection reuse is not supported
+    """
+    global _SSH_CONTROL_DIR
+    if util.on_windows():
+        return []
+    with _SSH_CONTROL_DIR_LOCK:
+        if _SSH_CONTROL_DIR is None:
+            # keep the control path short to stay within the unix domain
+            # socket path length limit
+            _SSH_CONTROL_DIR = tempfile.mkdtemp(
+                prefix='shipyard-ssh-',
+                dir='/tmp' if os.path.isdir('/tmp') else None)
+            atexit.register(close_ssh_control_masters)
+        control_dir = _SSH_CONTROL_DIR
+    return [
+        '-o', 'ControlMaster=auto',
+        '-o', 'ControlPath={}'.format(
+            os.path.join(control_dir, '%r@%h:%p')),
+        '-o', 'ControlPersist={}'.format(_SSH_CONTROL_PERSIST_SECONDS),
+    ]
+
+
+def get_ssh_connection_reuse_options_string():
+    # type: (None) -> str
+    """Get SSH connection reuse options for shell command strings
+    :rtype: str
+    :return: ssh options
+    """
+    return ' '.join(get_ssh_connection_reuse_options())
+
+
+def close_ssh_control_masters():
+    # type: (None) -> None
+    """Close all SSH control masters started by this process"""
+    global _SSH_CONTROL_DIR
+    with _SSH_CONTROL_DIR_LOCK:
+        control_dir = _SSH_CONTROL_DIR
+        _SSH_CONTROL_DIR = None
+    if control_dir is None:
+        return
+    try:
+        sockets = os.listdir(control_dir)
+    except OSError:
+        sockets = []
+    for sock in sockets:
+        util.subprocess_with_output(
+            ['ssh', '-o', 'ControlPath={}'.format(
+                os.path.join(control_dir, sock)), '-O', 'exit', sock],
+            suppress_output=True)
+    shutil.rmtree(control_dir, ignore_errors=True)
+
+
 def connect_or_exec_ssh_command(
         remote_ip, remote_port, ssh_private_key, username, sync=True,
         shell=False, tty=False, ssh_args=None, command=None):
@@ -161,6 +246,9 @@ def connect_or_exec_ssh_command(
     ]
     if tty:
         ssh_cmd.append('-t')
+    # reuse connections for non-interactive commands
+    if util.is_not_empty(command):
+        ssh_cmd.extend(get_ssh_connection_reuse_options())
     if util.is_not_empty(ssh_args):
         ssh_cmd.extend(ssh_args)
     ssh_cmd.append('{}@{}'.format(username, remote_ip))
@@ -176,6 +264,245 @@ def connect_or_exec_ssh_command(
             ssh_cmd, shell=shell, pipe_stderr=True)
 
 
+def _exec_ssh_command_with_timeout(
+        key, remote_ip, remote_port, ssh_private_key, username, command,
+        timeout):
+    # type: (object, str, int, pathlib.Path, str, tuple,
+    #        int) -> SSHCommandResult
+    """Execute an SSH command and wait for completion, killing the SSH
+    process if it does not complete within the timeout
+    :param object key: key identifying the target
+    :param str remote_ip: remote ip address
+    :param int remote_port: remote port
+    :param pathlib.Path ssh_private_key: SSH private key
+    :param str username: username
+    :param tuple command: command
+    :param int timeout: timeout in seconds
+    :rtype: SSHCommandResult
+    :return: ssh command result
+    """
+    start = datetime.datetime.now()
+    proc = connect_or_exec_ssh_command(
+        remote_ip, remote_port, ssh_private_key, username, sync=False,
+        command=command)
+    expired = threading.Event()
+
+    def _kill():
+        expired.set()
+        try:
+            proc.kill()
+        except OSError:
+            pass
+
+    timer = None
+    if timeout is not None:
+        timer = threading.Timer(timeout, _kill)
+        timer.daemon = True
+        timer.start()
+    try:
+        stdout, stderr = proc.communicate()
+    finally:
+        if timer is not None:
+            timer.cancel()
+    if stdout is not None:
+        stdout = stdout.decode('utf8')
+    if stderr is not None:
+        stderr = stderr.decode('utf8')
+    return SSHCommandResult(
+        key=key, returncode=proc.returncode, stdout=stdout, stderr=stderr,
+        timed_out=expired.is_set(),
+        elapsed=(datetime.datetime.now() - start).total_seconds())
+
+
+def fan_out_ssh_command(
+        targets, ssh_private_key, username, command, max_sessions=None,
+        timeout=None):
+    # type: (List[tuple], pathlib.Path, str, tuple, int,
+    #        int) -> Iterator[SSHCommandResult]
+    """Execute an SSH command on many targets keeping a sliding window of
+    at most max_sessions SSH sessions in flight. Results are yielded as
+    each session finishes, thus a slow target does not hold up any other
+    target.
+    :param list targets: list of (key, remote ip, remote port) tuples, or
+        (key, remote ip, remote port, command) tuples for per-target
+        commands
+    :param pathlib.Path ssh_private_key: SSH private key
+    :param str username: username
+    :param tuple command: command for targets without a per-target command
+    :param int max_sessions: maximum concurrent SSH sessions
+    :param int timeout: per-target timeout in seconds
+    :rtype: Iterator[SSHCommandResult]
+    :return: ssh command results in order of completion
+    """
+    if len(targets) == 0:
+        return
+    if max_sessions is None or max_sessions < 1:
+        max_sessions = _SSH_FAN_OUT_MAX_SESSIONS
+    max_sessions = min((max_sessions, len(targets)))
+    logger.debug(
+        'executing command on {} targets with {} concurrent sessions'.format(
+            len(targets), max_sessions))
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_sessions) as executor:
+        pending = []
+        for target in targets:
+            pending.append(executor.submit(
+                _exec_ssh_command_with_timeout, target[0], target[1],
+                target[2], ssh_private_key, username,
+                target[3] if len(target) > 3 else command, timeout))
+        for fut in concurrent.futures.as_completed(pending):
+            result = fut.result()
+            if result.timed_out:
+                logger.error(
+                    'command on {} timed out after {} sec and was '
+                    'killed'.format(result.key, timeout))
+            yield result
+
+
+def relay_file_over_ssh(
+        rls, node_ips, seeds, relay_dir, relay_file, port, seed_cmd,
+        receive_cmd, ssh_private_key, username, fanout, sudo=False,
+        timeout=None, description='file', on_seed=None, on_relay=None):
+    # type: (dict, dict, List[str], str, str, int, List[str],
+    #        Callable[[str, str], List[str]], pathlib.Path, str, int, bool,
+    #        int,
+    #        str, Callable[[SSHCommandResult], None],
+    #        Callable[[str, SSHCommandResult], None]) -> tuple
+    """Relay a file produced on seed nodes to all other nodes along a
+    distribution tree. Each node holding the file serves it over HTTP on
+    its private network address only and relays it to up to fanout nodes
+    in the next round. Relay servers and files are removed from all nodes
+    once done.
+    :param dict rls: remote login settings of all nodes by node id
+    :param dict node_ips: private ip addresses of all nodes by node id
+    :param list seeds: seed node ids
+    :param str relay_dir: directory holding the file on each node
+    :param str relay_file: file name within the relay directory
+    :param int port: port to serve the file on
+    :param list seed_cmd: commands producing the file on seed nodes
+    :param receive_cmd: function of the url of the file on a parent node
+        and the local path of the file returning commands which retrieve
+        the file to the local path
+    :param pathlib.Path ssh_private_key: SSH private key
+    :param str username: username
+    :param int fanout: number of nodes each node relays to per round
+    :param bool sudo: run commands with sudo
+    :param int timeout: per-node timeout in seconds
+    :param str description: description of the file relayed
+    :param on_seed: function called with the result of each seed node
+    :param on_relay: function called with the parent node id and result of
+        each relay to a node
+    :rtype: tuple
+    :return: (node ids relayed to, node ids failed, rounds)
+    """
+    relay_path = '{}/{}'.format(relay_dir, relay_file)
+    if sudo:
+        mkdir_cmd = 'mkdir -p {}'.format(relay_dir)
+    else:
+        mkdir_cmd = (
+            'sudo mkdir -p {d} && sudo chown $(id -u):$(id -g) {d}'
+        ).format(d=relay_dir)
+    server = base64.b64encode(
+        _RELAY_SERVER_SCRIPT.encode('utf8')).decode('ascii')
+
+    def _serve_cmd(node_id):
+        # serve the file to peers on the private address of the node until
+        # cleaned up, detached from the ssh session output, and wait for
+        # the server to be ready before marking the node as a relay source
+        return [
+            'echo {} | base64 -d > {}/{}'.format(
+                server, relay_dir, _RELAY_SERVER_FILE),
+            ('(cd {d} && setsid nohup sh -c \'python3 {f} {ip} {p} || '
+             'python {f} {ip} {p}\' &) > /dev/null 2>&1 < /dev/null').format(
+                 d=relay_dir, f=_RELAY_SERVER_FILE, ip=node_ips[node_id],
+                 p=port),
+            ('timeout 60 sh -c \'until curl -fsI http://{}:{}/{} > '
+             '/dev/null 2>&1; do sleep 1; done\'').format(
+                 node_ips[node_id], port, relay_file),
+        ]
+
+    # bracketed pattern prevents pkill from matching the invoking shell
+    cleanup_cmd = [
+        ('pkill -f \'{f}[ ][^ ]* {p}\'; {s}rm -rf {d}').format(
+             f=_RELAY_SERVER_FILE.replace('.', '[.]'), p=port,
+             s='' if sudo else 'sudo ', d=relay_dir),
+    ]
+
+    def _target(node_id, cmd):
+        cmd = '/bin/bash -c "{}"'.format(' && '.join(cmd))
+        return (
+            node_id, rls[node_id].remote_login_ip_address,
+            rls[node_id].remote_login_port,
+            ['sudo', cmd] if sudo else [cmd],
+        )
+
+    def _relay(targets, text):
+        for result in fan_out_ssh_command(
+                targets, ssh_private_key, username, None, timeout=timeout):
+            if result.returncode != 0:
+                logger.error(
+                    '{} failed on node {} with return code {}:{}{}'.format(
+                        text, result.key, result.returncode, os.linesep,
+                        result.stderr))
+            yield result
+
+    holders = []
+    relayed = []
+    failed = []
+    rounds = 0
+    try:
+        for result in _relay(
+                [_target(x, [mkdir_cmd] + seed_cmd + _serve_cmd(x))
+                 for x in seeds], '{} relay seed'.format(description)):
+            if result.returncode == 0:
+                holders.append(result.key)
+            else:
+                failed.append(result.key)
+            if on_seed is not None:
+                on_seed(result)
+        if len(holders) == 0:
+            raise RuntimeError(
+                'no seed node could produce {} for relay'.format(
+                    description))
+        pending = collections.deque(
+            x for x in sorted(rls.keys()) if x not in seeds)
+        while len(pending) > 0:
+            rounds += 1
+            targets = []
+            parents = {}
+            for parent in holders:
+                for _ in range(0, fanout):
+                    if len(pending) == 0:
+                        break
+                    child = pending.popleft()
+                    parents[child] = parent
+                    url = 'http://{}:{}/{}'.format(
+                        node_ips[parent], port, relay_file)
+                    targets.append(_target(
+                        child, ['set -o pipefail', mkdir_cmd] +
+                        receive_cmd(url, relay_path) +
+                        _serve_cmd(child)))
+            logger.info(
+                'relay round {}: relaying {} from {} nodes to {} '
+                'nodes'.format(
+                    rounds, description, len(holders), len(targets)))
+            for result in _relay(targets, '{} relay'.format(description)):
+                if result.returncode == 0:
+                    holders.append(result.key)
+                    relayed.append(result.key)
+                else:
+                    failed.append(result.key)
+                if on_relay is not None:
+                    on_relay(parents[result.key], result)
+    finally:
+        # stop relay servers and remove relayed files on all nodes
+        for _ in _relay(
+                [_target(x, cleanup_cmd) for x in rls],
+                '{} relay cleanup'.format(description)):
+            pass
+    return relayed, failed, rounds
+
+
 def derive_private_key_pem_from_pfx(pfxfile, passphrase=None, pemfile=None):
     # type: (str, str, str) -> str
     """Derive a private key pem file from a pfx
@@ -30,10 +30,17 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import concurrent.futures
 import datetime
+import errno
 import fnmatch
+import hashlib
+import heapq
+import json
 import logging
 import math
+import multiprocessing
+import operator
 import os
 try:
     import pathlib2 as pathlib
@@ -43,13 +50,16 @@ try:
     from shlex import quote as shellquote
 except ImportError:
     from pipes import quote as shellquote
+import re
+import tarfile
+import tempfile
 import threading
-import time
+import zlib
 # non-stdlib imports
 import azure.batch.models as batchmodels
 # local imports
 from . import crypto
-from . import resource
+from . import remotefs
 from . import settings
 from . import storage
 from . import util
@@ -63,6 +73,29 @@ _BLOBXFER_VERSION = '1.1.1'
 _MEGABYTE = 1048576
 _MAX_READ_BLOCKSIZE_BYTES = 4194304
 _FILE_SPLIT_PREFIX = '_shipyard-'
+_MAX_CONCURRENT_STORAGE_INGRESS = 4
+_STORAGE_INGRESS_TRANSFER_THREADS = min(
+    (multiprocessing.cpu_count() << 2, 96))
+_STORAGE_INGRESS_PROGRESS_INTERVAL = 10
+_BLOBXFER_PROGRESS_REGEX = re.compile(
+    r'upload progress: \[[^\]]*\]\s+([\d.]+)%\s+([\d.]+) MiB/sec, '
+    r'(\d+)/(\d+) uploaded')
+_BLOBXFER_THROUGHPUT_REGEX = re.compile(
+    r'throughput of ([\d.]+) GiB: ([\d.]+) sec')
+_DATA_RELAY_FANOUT = 4
+_DATA_RELAY_PORT = 8119
+_DATA_RELAY_DIR = 'shipyard-data-relay'
+_DATA_RELAY_FILE = 'data.tar'
+_COMPRESSION_SAMPLE_BYTES = 65536
+_COMPRESSION_MIN_SAMPLE_BYTES = 4096
+_COMPRESSION_MAX_RATIO = 0.9
+_INGRESS_MANIFEST_DIR = pathlib.Path(
+    os.path.expanduser('~'), '.batch-shipyard', 'ingressmanifests')
+_INGRESS_MANIFEST_VERSION = 1
+_INCOMPRESSIBLE_EXTENSIONS = frozenset((
+    '.7z', '.bz2', '.gif', '.gz', '.jpeg', '.jpg', '.lz4', '.lzma', '.mp3',
+    '.mp4', '.png', '.rar', '.tgz', '.xz', '.zip', '.zst',
+))
 
 
 def _get_gluster_paths(config):
@@ -435,8 +468,10 @@ def process_output_data(config, bxfile, spec):
         return None
 
 
-def _singlenode_transfer(dest, src, dst, username, ssh_private_key, rls):
-    # type: (DestinationSettings, str, str, pathlib.Path, dict) -> None
+def _singlenode_transfer(
+        dest, src, dst, username, ssh_private_key, rls, plan_only=False):
+    # type: (DestinationSettings, str, str, pathlib.Path, dict,
+    #        bool) -> bool
     """Transfer data to a single node
     :param DestinationSettings dest: destination settings
     :param str src: source path
@@ -444,7 +479,15 @@ def _singlenode_transfer(dest, src, dst, username, ssh_private_key, rls):
     :param str username: username
     :param pathlib.Path: ssh private key
     :param dict rls: remote login settings
+    :param bool plan_only: only log the transfer plan
+    :rtype: bool
+    :return: if transfer succeeded
     """
+    if plan_only:
+        logger.info('ingress plan: {} to {}{} on node {} via {}'.format(
+            src, dst, dest.relative_destination_path or '',
+            next(iter(rls.keys())), dest.data_transfer.method))
+        return True
     # get remote settings
     _rls = next(iter(rls.values()))
     ip = _rls.remote_login_ip_address
@@ -457,8 +500,10 @@ def _singlenode_transfer(dest, src, dst, username, ssh_private_key, rls):
         logger.debug('creating remote directory: {}'.format(dst))
         dirs = ['mkdir -p {}'.format(dst)]
         mkdircmd = ('ssh -T -x -o StrictHostKeyChecking=no '
-                    '-o UserKnownHostsFile={} -i {} -p {} {}@{} {}'.format(
-                        os.devnull, ssh_private_key, port, username, ip,
+                    '-o UserKnownHostsFile={} {} -i {} -p {} {}@{} {}'.format(
+                        os.devnull,
+                        crypto.get_ssh_connection_reuse_options_string(),
+                        ssh_private_key, port, username, ip,
                         util.wrap_commands_in_shell(dirs)))
         rc = util.subprocess_with_output(
             mkdircmd, shell=True, suppress_output=True)
@@ -466,7 +511,7 @@ def _singlenode_transfer(dest, src, dst, username, ssh_private_key, rls):
             logger.info('remote directories created on {}'.format(dst))
         else:
             logger.error('remote directory creation failed')
-            return
+            return False
         del dirs
     # determine if recursive flag must be set
     psrc = pathlib.Path(src)
@@ -479,16 +524,21 @@ def _singlenode_transfer(dest, src, dst, username, ssh_private_key, rls):
     # transfer data
     if dest.data_transfer.method == 'scp':
         cmd = ('scp -o StrictHostKeyChecking=no '
-               '-o UserKnownHostsFile={} -p {} {} -i {} '
+               '-o UserKnownHostsFile={} {} -p {} {} -i {} '
                '-P {} {} {}@{}:"{}"'.format(
-                   os.devnull, dest.data_transfer.scp_ssh_extra_options,
+                   os.devnull,
+                   crypto.get_ssh_connection_reuse_options_string(),
+                   dest.data_transfer.scp_ssh_extra_options,
                    recursive, ssh_private_key.resolve(), port, cmdsrc,
                    username, ip, shellquote(dst)))
     elif dest.data_transfer.method == 'rsync+ssh':
         cmd = ('rsync {} {} -e "ssh -T -x -o StrictHostKeyChecking=no '
-               '-o UserKnownHostsFile={} {} -i {} -p {}" {} {}@{}:"{}"'.format(
+               '-o UserKnownHostsFile={} {} {} -i {} -p {}" '
+               '{} {}@{}:"{}"'.format(
                    dest.data_transfer.rsync_extra_options, recursive,
-                   os.devnull, dest.data_transfer.scp_ssh_extra_options,
+                   os.devnull,
+                   crypto.get_ssh_connection_reuse_options_string(),
+                   dest.data_transfer.scp_ssh_extra_options,
                    ssh_private_key.resolve(), port, cmdsrc, username, ip,
                    shellquote(dst)))
     else:
@@ -508,12 +558,290 @@ def _singlenode_transfer(dest, src, dst, username, ssh_private_key, rls):
         logger.error(
             'data ingress from {} to {} failed with return code: {}'.format(
                 src, dst, rc))
+    return rc == 0
+
+
+def _ingress_manifest_file(target, src, dst):
+    # type: (str, str, str) -> pathlib.Path
+    """Get the ingress manifest file for a source and destination
+    :param str target: ingress target
+    :param str src: source path
+    :param str dst: destination path
+    :rtype: pathlib.Path
+    :return: manifest file
+    """
+    key = hashlib.sha256('{}:{}:{}:{}'.format(
+        _INGRESS_MANIFEST_VERSION, target, os.path.abspath(src),
+        dst).encode('utf8')).hexdigest()
+    return _INGRESS_MANIFEST_DIR / '{}.json'.format(key)
+
+
+def _load_ingress_manifest(manifest_file):
+    # type: (pathlib.Path) -> dict
+    """Load the ingress manifest of the last successful ingress
+    :param pathlib.Path manifest_file: manifest file
+    :rtype: dict
+    :return: dict of destination path to [size, mtime, sha256]
+    """
+    try:
+        with manifest_file.open('r') as f:
+            manifest = json.load(f)
+        if manifest['version'] != _INGRESS_MANIFEST_VERSION:
+            raise ValueError()
+        return manifest['files']
+    except (IOError, OSError, KeyError, TypeError, ValueError):
+        return {}
+
+
+def _save_ingress_manifest(manifest_file, files):
+    # type: (pathlib.Path, dict) -> None
+    """Save an ingress manifest
+    :param pathlib.Path manifest_file: manifest file
+    :param dict files: dict of destination path to [size, mtime, sha256]
+    """
+    try:
+        manifestdir = manifest_file.parent
+        if not manifestdir.exists():
+            os.makedirs(str(manifestdir), 0o700)
+        fd, tmpfile = tempfile.mkstemp(dir=str(manifestdir))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(
+                {'version': _INGRESS_MANIFEST_VERSION, 'files': files}, f)
+        try:
+            os.replace(tmpfile, str(manifest_file))
+        except AttributeError:
+            if manifest_file.exists():
+                manifest_file.unlink()
+            os.rename(tmpfile, str(manifest_file))
+    except (IOError, OSError) as e:
+        logger.error('cannot write ingress manifest {}: {}'.format(
+            manifest_file, e))
+
+
+def _delete_remote_files(files, ip, port, username, ssh_private_key):
+    # type: (list, str, int, str, pathlib.Path) -> int
+    """Delete files on a remote node. File paths are passed on stdin
+    such that the number of files is not bounded by command line limits.
+    :param list files: list of remote file paths
+    :param str ip: ip address
+    :param int port: port
+    :param str username: username
+    :param pathlib.Path: ssh private key
+    :rtype: int
+    :return: return code
+    """
+    delcmd = ('ssh -T -x -o StrictHostKeyChecking=no '
+              '-o UserKnownHostsFile={} {} -i {} -p {} {}@{} '
+              '\'xargs -0 rm -f --\''.format(
+                  os.devnull,
+                  crypto.get_ssh_connection_reuse_options_string(),
+                  ssh_private_key, port, username, ip))
+    proc = util.subprocess_attach_stdin(delcmd, shell=True)
+    proc.communicate('\0'.join(files).encode('utf8'))
+    return proc.returncode
+
+
+def _finalize_incremental_ingress(
+        manifest_file, manifest, removed, delete, rls, username,
+        ssh_private_key):
+    # type: (pathlib.Path, dict, dict, bool, dict, str,
+    #        pathlib.Path) -> None
+    """Delete removed files on the remote side if specified and save the
+    ingress manifest after a successful ingress. Removed files which could
+    not be deleted are kept in the manifest to retry on the next ingress.
+    :param pathlib.Path manifest_file: manifest file
+    :param dict manifest: dict of destination path to [size, mtime, sha256]
+    :param dict removed: dict of removed destination paths to manifest
+        entries
+    :param bool delete: delete removed files
+    :param dict rls: remote login settings
+    :param str username: username
+    :param pathlib.Path: ssh private key
+    """
+    if delete and len(removed) > 0:
+        logger.info('deleting {} files removed from source'.format(
+            len(removed)))
+        _rls = next(iter(rls.values()))
+        rc = _delete_remote_files(
+            list(removed.keys()), _rls.remote_login_ip_address,
+            _rls.remote_login_port, username, ssh_private_key)
+        if rc != 0:
+            logger.error(
+                'deleting files removed from source failed with return '
+                'code: {}'.format(rc))
+            manifest.update(removed)
+    _save_ingress_manifest(manifest_file, manifest)
+    logger.debug('saved ingress manifest of {} files to {}'.format(
+        len(manifest), manifest_file))
+
+
+def _plan_multinode_transfer(items, nodes):
+    # type: (list, list) -> tuple
+    """Assign files to nodes with longest processing time first scheduling:
+    files are sorted by size in descending order and each file is assigned
+    to the node with the least amount of data assigned through a min-heap
+    :param list items: list of (size, src, dst, begin, end) tuples
+    :param list nodes: list of node keys
+    :rtype: tuple
+    :return: (dict of node key to list of (size, src, dst, begin, end)
+        tuples, dict of node key to bytes assigned)
+    """
+    assigned = [[] for _ in nodes]
+    appends = [x.append for x in assigned]
+    # list of (bytes assigned, node index) in sorted order is a valid heap
+    heap = [(0, i) for i in range(len(nodes))]
+    heapreplace = heapq.heapreplace
+    items.sort(key=operator.itemgetter(0), reverse=True)
+    for item in items:
+        load, i = heap[0]
+        heapreplace(heap, (load + item[0], i))
+        appends[i](item)
+    files = {}
+    buckets = {}
+    for load, i in heap:
+        files[nodes[i]] = assigned[i]
+        buckets[nodes[i]] = load
+    return files, buckets
+
+
+def _compression_commands(compression):
+    # type: (settings.DataTransferCompressionSettings) -> tuple
+    """Get compression and decompression commands for a codec
+    :param settings.DataTransferCompressionSettings compression:
+        compression settings
+    :rtype: tuple
+    :return: (compress command, decompress command)
+    """
+    if compression.codec == 'zstd':
+        return (
+            'zstd -q -c -{} -T{}'.format(
+                compression.level, compression.threads),
+            'zstd -q -d -c',
+        )
+    elif compression.codec == 'lz4':
+        return ('lz4 -q -c -{}'.format(compression.level), 'lz4 -q -d -c')
+    else:
+        raise ValueError('Unknown compression codec: {}'.format(
+            compression.codec))
+
+
+def _is_compressible(src, offset=None):
+    # type: (str, int) -> bool
+    """Determine if a file is worth compressing in transit by compressing
+    a sample of the file at the offset with a fast zlib level
+    :param str src: source file
+    :param int offset: offset to sample from
+    :rtype: bool
+    :return: if sample is compressible
+    """
+    if os.path.splitext(src)[1].lower() in _INCOMPRESSIBLE_EXTENSIONS:
+        return False
+    try:
+        with open(src, 'rb') as f:
+            if offset is not None:
+                f.seek(offset, 0)
+            buf = f.read(_COMPRESSION_SAMPLE_BYTES)
+    except (IOError, OSError):
+        return True
+    # small files are batched with headers and padding which compress well
+    if len(buf) < _COMPRESSION_MIN_SAMPLE_BYTES:
+        return True
+    return len(zlib.compress(buf, 1)) < len(buf) * _COMPRESSION_MAX_RATIO
+
+
+def _compress_transfer(compression, file):
+    # type: (settings.DataTransferCompressionSettings, tuple) -> bool
+    """Determine if a transfer should be compressed in transit. Only
+    streamed transfers, i.e., tar batches and split file chunks, are
+    compressed.
+    :param settings.DataTransferCompressionSettings compression:
+        compression settings
+    :param tuple file: file tuple
+    :rtype: bool
+    :return: if transfer should be compressed
+    """
+    if compression is None:
+        return False
+    # tar batches are classified when batched
+    if len(file) > 5:
+        return file[5]
+    if file[3] is None:
+        return False
+    return not compression.auto or _is_compressible(file[1], file[3])
+
+
+def _batch_tar_transfers(files, batch_bytes, batch_files, compression):
+    # type: (list, int, int, settings.DataTransferCompressionSettings) -> list
+    """Pack files assigned to a node into tar batches bounded by size and
+    number of files. Members are archived relative to the root such that
+    extraction places files at their destination paths. If automatic
+    compression is enabled, compressible and incompressible files are
+    packed into separate batches.
+    :param list files: list of (size, src, dst, begin, end) tuples
+    :param int batch_bytes: max bytes per batch
+    :param int batch_files: max files per batch
+    :param settings.DataTransferCompressionSettings compression:
+        compression settings
+    :rtype: list
+    :return: list of (size, list of (src, arcname) tuples, root, None,
+        None, compress) tuples
+    """
+    batches = []
+    # open batches of [size, members] keyed by compress
+    open_batches = {}
+    for file in files:
+        if compression is None:
+            compress = False
+        elif compression.auto:
+            compress = _is_compressible(file[1])
+        else:
+            compress = True
+        batch = open_batches.get(compress)
+        if batch is not None and (
+                batch[0] + file[0] > batch_bytes or
+                len(batch[1]) >= batch_files):
+            batches.append((batch[0], batch[1], '/', None, None, compress))
+            batch = None
+        if batch is None:
+            batch = open_batches[compress] = [0, []]
+        batch[1].append((file[1], file[2].lstrip('/')))
+        batch[0] += file[0]
+    for compress in open_batches:
+        batch = open_batches[compress]
+        batches.append((batch[0], batch[1], '/', None, None, compress))
+    return batches
+
+
+def _log_multinode_transfer_plan(files, buckets, mpt):
+    # type: (dict, dict, int) -> None
+    """Log a multinode transfer plan with the predicted makespan of each
+    node relative to the node with the most data assigned
+    :param dict files: dict of node key to list of file tuples
+    :param dict buckets: dict of node key to bytes assigned
+    :param int mpt: max parallel transfers per node
+    """
+    total_size = sum(buckets.values())
+    makespan = max(buckets.values())
+    ideal = total_size / len(buckets)
+    logger.info(
+        ('ingress plan: {0:.4f} MiB in {1} transfers over {2} nodes with {3} '
+         'max parallel transfers per node, makespan {4:.4f} MiB '
+         '({5:.3f}x ideal)').format(
+             total_size / _MEGABYTE, sum(len(x) for x in files.values()),
+             len(buckets), mpt, makespan / _MEGABYTE,
+             makespan / ideal if ideal > 0 else 1))
+    for nkey in sorted(buckets, key=buckets.get, reverse=True):
+        logger.info(
+            '  {0}: {1} transfers, {2:.4f} MiB, {3:.1f}% of makespan'.format(
+                nkey, len(files[nkey]), buckets[nkey] / _MEGABYTE,
+                100 * buckets[nkey] / makespan if makespan > 0 else 100))
 
 
 def _multinode_transfer(
-        method, dest, source, dst, username, ssh_private_key, rls, mpt):
+        method, dest, source, dst, username, ssh_private_key, rls, mpt,
+        plan_only=False, target=None):
     # type: (str, DestinationSettings, SourceSettings, str, str,
-    #        pathlib.Path, dict, int) -> None
+    #        pathlib.Path, dict, int, bool, str) -> bool
     """Transfer data to multiple destination nodes simultaneously
     :param str method: transfer method
     :param DestinationSettings dest: destination settings
@@ -523,6 +851,10 @@ def _multinode_transfer(
     :param pathlib.Path: ssh private key
     :param dict rls: remote login settings
     :param int mpt: max parallel transfers per node
+    :param bool plan_only: only log the transfer plan
+    :param str target: ingress target for incremental ingress manifests
+    :rtype: bool
+    :return: if transfer succeeded
     """
     src = source.path
     src_incl = source.include
@@ -539,19 +871,32 @@ def _multinode_transfer(
             method != 'multinode_scp'):
         logger.warning('forcing transfer method to multinode_scp with split')
         method = 'multinode_scp'
-    buckets = {}
-    files = {}
+    # if compression is specified without split, force to multinode_tar+ssh
+    compression = dest.data_transfer.compression
+    if (compression is not None and
+            dest.data_transfer.split_files_megabytes is None and
+            method != 'multinode_tar+ssh'):
+        logger.warning(
+            'forcing transfer method to multinode_tar+ssh with compression')
+        method = 'multinode_tar+ssh'
+    # load manifest of last successful ingress if incremental
+    incremental = dest.data_transfer.incremental
+    if incremental:
+        manifest_file = _ingress_manifest_file(target, source.path, dst)
+        prev_manifest = _load_ingress_manifest(manifest_file)
+        manifest = {}
+        filtered = set()
+        new_files = 0
+        changed_files = 0
+    items = []
     rcodes = {}
-    spfiles = []
     spfiles_count = {}
     spfiles_count_lock = threading.Lock()
     for rkey in rls:
-        buckets[rkey] = 0
-        files[rkey] = []
         rcodes[rkey] = None
     # walk the directory structure
     # 1. construct a set of dirs to create on the remote side
-    # 2. binpack files to different nodes
+    # 2. collect files and split file chunks with sizes for binpacking
     total_files = 0
     dirs = set()
     if dest.relative_destination_path is not None:
@@ -561,6 +906,11 @@ def _multinode_transfer(
         sparent = str(pathlib.Path(entry.path).relative_to(psrc).parent)
         if entry.is_file():
             srel = str(rel)
+            if dest.relative_destination_path is None:
+                dstpath = '{}{}'.format(dst, rel)
+            else:
+                dstpath = '{}{}/{}'.format(
+                    dst, dest.relative_destination_path, rel)
             # check filters
             if src_excl is not None:
                 inc = not any([fnmatch.fnmatch(srel, x) for x in src_excl])
@@ -571,20 +921,31 @@ def _multinode_transfer(
             if not inc:
                 logger.debug('skipping file {} due to filters'.format(
                     entry.path))
+                if incremental:
+                    filtered.add(dstpath)
                 continue
-            if dest.relative_destination_path is None:
-                dstpath = '{}{}'.format(dst, rel)
-            else:
-                dstpath = '{}{}/{}'.format(
-                    dst, dest.relative_destination_path, rel)
-            # get key of min bucket values
-            fsize = entry.stat().st_size
+            st = entry.stat()
+            fsize = st.st_size
+            if incremental:
+                # compare size and mtime, then content if only mtime changed
+                prev = prev_manifest.get(dstpath)
+                if (prev is not None and prev[0] == fsize and
+                        prev[1] == st.st_mtime):
+                    manifest[dstpath] = prev
+                    continue
+                digest = util.compute_sha256_for_file(entry.path, False)
+                manifest[dstpath] = [fsize, st.st_mtime, digest]
+                if prev is None:
+                    new_files += 1
+                elif prev[0] == fsize and prev[2] == digest:
+                    continue
+                else:
+                    changed_files += 1
             if (dest.data_transfer.split_files_megabytes is not None and
                     fsize > dest.data_transfer.split_files_megabytes):
                 nsplits = int(math.ceil(
                     fsize / dest.data_transfer.split_files_megabytes))
                 lpad = int(math.log10(nsplits)) + 1
-                spfiles.append(dstpath)
                 spfiles_count[dstpath] = nsplits
                 n = 0
                 curr = 0
@@ -592,22 +953,19 @@ def _multinode_transfer(
                     end = curr + dest.data_transfer.split_files_megabytes
                     if end > fsize:
                         end = fsize
-                    key = min(buckets, key=buckets.get)
-                    buckets[key] += (end - curr)
                     if n == 0:
                         dstfname = dstpath
                     else:
                         dstfname = '{}.{}{}'.format(
                             dstpath, _FILE_SPLIT_PREFIX, str(n).zfill(lpad))
-                    files[key].append((entry.path, dstfname, curr, end))
+                    items.append(
+                        (end - curr, entry.path, dstfname, curr, end))
                     if end == fsize:
                         break
                     curr = end
                     n += 1
             else:
-                key = min(buckets, key=buckets.get)
-                buckets[key] += fsize
-                files[key].append((entry.path, dstpath, None, None))
+                items.append((fsize, entry.path, dstpath, None, None))
             total_files += 1
         # add directory to create
         if sparent != '.':
@@ -616,10 +974,71 @@ def _multinode_transfer(
             else:
                 dirs.add('{}/{}'.format(
                     dest.relative_destination_path, sparent))
-    total_size = sum(buckets.values())
-    if total_files == 0:
+    if incremental:
+        # carry forward files ingressed previously which still exist in the
+        # source but are excluded by the current filters
+        removed = {}
+        carried = 0
+        for k, v in prev_manifest.items():
+            if k in manifest:
+                continue
+            if k in filtered:
+                manifest[k] = v
+                carried += 1
+            else:
+                removed[k] = v
+        del prev_manifest
+        del filtered
+        logger.info(
+            'incremental ingress: {} new, {} changed, {} unchanged files, {} '
+            'excluded by filters, {} files removed from source{}'.format(
+                new_files, changed_files,
+                len(manifest) - new_files - changed_files - carried, carried,
+                len(removed),
+                ' to delete' if dest.data_transfer.delete_removed else ''))
+        if total_files == 0:
+            logger.info('no new or changed files to ingress from {}'.format(
+                src))
+            if not plan_only:
+                _finalize_incremental_ingress(
+                    manifest_file, manifest, removed,
+                    dest.data_transfer.delete_removed, rls, username,
+                    ssh_private_key)
+            return True
+    elif total_files == 0:
         logger.error('no files to ingress')
-        return
+        return False
+    # binpack files to nodes
+    start = datetime.datetime.now()
+    files, buckets = _plan_multinode_transfer(items, list(rls.keys()))
+    del items
+    logger.debug('binpacked {} files to {} nodes in {:.3f} sec'.format(
+        total_files, len(buckets),
+        (datetime.datetime.now() - start).total_seconds()))
+    if method == 'multinode_tar+ssh':
+        for nkey in files:
+            files[nkey] = _batch_tar_transfers(
+                files[nkey], dest.data_transfer.tar_batch_megabytes,
+                dest.data_transfer.tar_batch_files, compression)
+    total_size = sum(buckets.values())
+    _log_multinode_transfer_plan(files, buckets, mpt)
+    if compression is not None:
+        logger.info(
+            'compressing {} with {} level {}{}'.format(
+                'tar batches' if method == 'multinode_tar+ssh' else
+                'split file chunks', compression.codec, compression.level,
+                ', skipping incompressible data' if compression.auto else ''))
+    if plan_only:
+        return True
+    # ensure compression codec is available locally
+    if compression is not None:
+        rc = util.subprocess_with_output(
+            '{} -V'.format(compression.codec), shell=True,
+            suppress_output=True)
+        if rc != 0:
+            raise RuntimeError(
+                'compression codec {} is not available locally'.format(
+                    compression.codec))
     # create remote directories via ssh
     if len(dirs) == 0:
         logger.debug('no remote directories to create')
@@ -632,8 +1051,10 @@ def _multinode_transfer(
         port = _rls.remote_login_port
         del _rls
         mkdircmd = ('ssh -T -x -o StrictHostKeyChecking=no '
-                    '-o UserKnownHostsFile={} -i {} -p {} {}@{} {}'.format(
-                        os.devnull, ssh_private_key, port, username, ip,
+                    '-o UserKnownHostsFile={} {} -i {} -p {} {}@{} {}'.format(
+                        os.devnull,
+                        crypto.get_ssh_connection_reuse_options_string(),
+                        ssh_private_key, port, username, ip,
                         util.wrap_commands_in_shell(dirs)))
         rc = util.subprocess_with_output(
             mkdircmd, shell=True, suppress_output=True)
@@ -641,7 +1062,7 @@ def _multinode_transfer(
             logger.info('remote directories created on {}'.format(dst))
         else:
             logger.error('remote directory creation failed')
-            return
+            return False
         del ip
         del port
     logger.info(
@@ -661,7 +1082,7 @@ def _multinode_transfer(
                   rls[nkey].remote_login_ip_address,
                   rls[nkey].remote_login_port, username, ssh_private_key,
                   dest.data_transfer.scp_ssh_extra_options,
-                  dest.data_transfer.rsync_extra_options)
+                  dest.data_transfer.rsync_extra_options, compression)
         )
         threads.append(thr)
         thr.start()
@@ -681,13 +1102,110 @@ def _multinode_transfer(
                 total_size / _MEGABYTE, total_files, src, dst,
                 diff.total_seconds(),
                 (total_size * 8 / 1e6) / diff.total_seconds()))
+        if incremental:
+            _finalize_incremental_ingress(
+                manifest_file, manifest, removed,
+                dest.data_transfer.delete_removed, rls, username,
+                ssh_private_key)
+    return success
+
+
+def _stream_file_range_to_process(src, begin, end, proc):
+    # type: (str, int, int, subprocess.Popen) -> None
+    """Stream a byte range of a file to the stdin of a process and close
+    stdin when complete. sendfile is used on Linux to avoid copying data
+    through Python buffers, other platforms only support sendfile to
+    sockets. The process is killed on failure such
+    that a partial range is never reported as a successful transfer.
+    :param str src: source file
+    :param int begin: begin offset
+    :param int end: end offset (exclusive)
+    :param subprocess.Popen proc: process
+    """
+    curr = begin
+    try:
+        with open(src, 'rb') as f:
+            sendfile = getattr(os, 'sendfile', None)
+            if sendfile is not None and util.on_linux():
+                try:
+                    while curr < end:
+                        n = sendfile(
+                            proc.stdin.fileno(), f.fileno(), curr,
+                            min((end - curr, _MAX_READ_BLOCKSIZE_BYTES)))
+                        if n == 0:
+                            break
+                        curr += n
+                except OSError as e:
+                    # fall back to copying for unsupported descriptors
+                    if e.errno not in (
+                            errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK,
+                            errno.EOPNOTSUPP):
+                        raise
+            f.seek(curr, 0)
+            while curr < end:
+                buf = f.read(min((end - curr, _MAX_READ_BLOCKSIZE_BYTES)))
+                if buf is None or len(buf) == 0:
+                    break
+                proc.stdin.write(buf)
+                curr += len(buf)
+        if curr != end:
+            raise IOError('read {} of {} bytes'.format(
+                curr - begin, end - begin))
+        proc.stdin.close()
+    except (IOError, OSError) as e:
+        logger.error(
+            'streaming {} bytes {}-{} to transfer process failed: {}'.format(
+                src, begin, end, e))
+        _kill_streaming_process(proc)
+
+
+def _kill_streaming_process(proc):
+    # type: (subprocess.Popen) -> None
+    """Kill a transfer process attached to stdin. stdin is closed such that
+    any processes in a pipeline of the shell are not left waiting on input.
+    :param subprocess.Popen proc: process
+    """
+    try:
+        proc.kill()
+    except OSError:
+        pass
+    try:
+        proc.stdin.close()
+    except (IOError, OSError):
+        pass
+
+
+def _stream_tar_to_process(members, proc):
+    # type: (list, subprocess.Popen) -> None
+    """Stream a tar archive of files to the stdin of a process and close
+    stdin when complete. The process is killed on failure such that a
+    truncated archive is never reported as a successful transfer.
+    :param list members: list of (src, arcname) tuples
+    :param subprocess.Popen proc: process
+    """
+    try:
+        tar = tarfile.open(
+            fileobj=proc.stdin, mode='w|',
+            bufsize=_MAX_READ_BLOCKSIZE_BYTES)
+        try:
+            for src, arcname in members:
+                tar.add(src, arcname=arcname, recursive=False)
+        finally:
+            tar.close()
+        proc.stdin.close()
+    except (IOError, OSError, tarfile.TarError) as e:
+        logger.error(
+            'streaming tar of {} files to transfer process failed: {}'.format(
+                len(members), e))
+        _kill_streaming_process(proc)
 
 
 def _spawn_next_transfer(
-        method, file, ip, port, username, ssh_private_key, eo, reo,
-        procs, psprocs, psdst):
-    # type: (str, tuple, str, int, str, pathlib.Path, str, str, list,
-    #        list, list) -> None
+        method, file, ip, port, username, ssh_private_key, eo, reo, group,
+        compression=None):
+    # type: (str, tuple, str, int, str, pathlib.Path, str, str,
+    #        util.ProcessGroup,
+    #        settings.DataTransferCompressionSettings) -> None
     """Spawn the next transfer given a file tuple
     :param str method: transfer method
     :param tuple file: file tuple
@@ -697,64 +1215,92 @@ def _spawn_next_transfer(
     :param pathlib.Path: ssh private key
     :param str eo: extra options
     :param str reo: rsync extra options
-    :param list procs: process list
-    :param list psprocs: split files process list
-    :param list psdst: split files dstpath list
+    :param util.ProcessGroup group: process group
+    :param settings.DataTransferCompressionSettings compression:
+        compress stream with settings
     """
-    src = file[0]
-    dst = file[1]
-    begin = file[2]
-    end = file[3]
+    src = file[1]
+    dst = file[2]
+    begin = file[3]
+    end = file[4]
+    ro = crypto.get_ssh_connection_reuse_options_string()
+    if compression is not None:
+        cc, dc = _compression_commands(compression)
+        cc = '{} | '.format(cc)
+    else:
+        cc = dc = None
     if method == 'multinode_scp':
         if begin is None and end is None:
             cmd = ('scp -o StrictHostKeyChecking=no '
-                   '-o UserKnownHostsFile={} -p {} -i {} '
+                   '-o UserKnownHostsFile={} {} -p {} -i {} '
                    '-P {} {} {}@{}:"{}"'.format(
-                       os.devnull, eo, ssh_private_key.resolve(), port,
+                       os.devnull, ro, eo, ssh_private_key.resolve(), port,
                        shellquote(src), username, ip, shellquote(dst)))
         else:
-            cmd = ('ssh -T -x -o StrictHostKeyChecking=no '
-                   '-o UserKnownHostsFile={} {} -i {} '
-                   '-p {} {}@{} \'cat > "{}"\''.format(
-                       os.devnull, eo, ssh_private_key.resolve(), port,
-                       username, ip, shellquote(dst)))
+            # decompress directly to the file such that the exit code of
+            # the decompressor is the exit code of the remote command
+            cmd = ('{}ssh -T -x -o StrictHostKeyChecking=no '
+                   '-o UserKnownHostsFile={} {} {} -i {} '
+                   '-p {} {}@{} {}'.format(
+                       cc or '', os.devnull, ro, eo,
+                       ssh_private_key.resolve(), port, username, ip,
+                       shellquote('{} > {}'.format(
+                           dc or 'cat', shellquote(dst)))))
+    elif method == 'multinode_tar+ssh':
+        rcmd = 'tar -xf - -C {}'.format(shellquote(dst))
+        if dc is not None:
+            # fail the remote pipeline if decompression fails
+            rcmd = 'bash -o pipefail -c {}'.format(
+                shellquote('{} | {}'.format(dc, rcmd)))
+        cmd = ('{}ssh -T -x -o StrictHostKeyChecking=no '
+               '-o UserKnownHostsFile={} {} {} -i {} '
+               '-p {} {}@{} {}'.format(
+                   cc or '', os.devnull, ro, eo, ssh_private_key.resolve(),
+                   port, username, ip, shellquote(rcmd)))
     elif method == 'multinode_rsync+ssh':
         if begin is not None or end is not None:
             raise RuntimeError('cannot rsync with file offsets')
         cmd = ('rsync {} -e "ssh -T -x -o StrictHostKeyChecking=no '
-               '-o UserKnownHostsFile={} {} -i {} -p {}" {} {}@{}:"{}"'.format(
-                   reo, os.devnull, eo, ssh_private_key.resolve(), port,
+               '-o UserKnownHostsFile={} {} {} -i {} -p {}" '
+               '{} {}@{}:"{}"'.format(
+                   reo, os.devnull, ro, eo, ssh_private_key.resolve(), port,
                    shellquote(src), username, ip, shellquote(dst)))
     else:
         raise ValueError('Unknown transfer method: {}'.format(method))
-    if begin is None and end is None:
-        procs.append(util.subprocess_nowait(cmd, shell=True))
+    if method == 'multinode_tar+ssh':
+        # stream tar batch in the background
+        proc = util.subprocess_attach_stdin(cmd, shell=True)
+        thr = threading.Thread(
+            target=_stream_tar_to_process, args=(src, proc))
+        thr.daemon = True
+        thr.start()
+        group.add(proc, ('tar', '{} files'.format(len(src))))
+    elif begin is None and end is None:
+        group.add(util.subprocess_nowait(cmd, shell=True), ('file', dst))
     else:
         proc = util.subprocess_attach_stdin(cmd, shell=True)
-        with open(src, 'rb') as f:
-            f.seek(begin, 0)
-            curr = begin
-            while curr < end:
-                buf = f.read(_MAX_READ_BLOCKSIZE_BYTES)
-                if buf is None or len(buf) == 0:
-                    break
-                proc.stdin.write(buf)
-                curr += len(buf)
-            proc.stdin.close()
-        psprocs.append(proc)
+        # stream file range in the background so that split file chunks
+        # are transferred concurrently up to the max parallel transfers
+        thr = threading.Thread(
+            target=_stream_file_range_to_process,
+            args=(src, begin, end, proc))
+        thr.daemon = True
+        thr.start()
         dstsp = dst.split('.')
         if dstsp[-1].startswith(_FILE_SPLIT_PREFIX):
             dstpath = '.'.join(dstsp[:-1])
         else:
             dstpath = dst
-        psdst.append(dstpath)
+        group.add(proc, ('split', dstpath))
 
 
 def _multinode_thread_worker(
         method, mpt, node_id, rcodes, files, spfiles_count,
-        spfiles_count_lock, ip, port, username, ssh_private_key, eo, reo):
+        spfiles_count_lock, ip, port, username, ssh_private_key, eo, reo,
+        compression=None):
     # type: (str, int, str, dict, list, dict, threading.Lock, str, int, str,
-    #        pathlib.Path, str, str) -> None
+    #        pathlib.Path, str, str,
+    #        settings.DataTransferCompressionSettings) -> None
     """Worker thread code for data transfer to a node with a file list
     :param str method: transfer method
     :param int mpt: max parallel transfers per node
@@ -769,32 +1315,44 @@ def _multinode_thread_worker(
     :param pathlib.Path: ssh private key
     :param str eo: extra options
     :param str reo: rsync extra options
+    :param settings.DataTransferCompressionSettings compression:
+        compression settings
     """
-    procs = []
-    psprocs = []
-    psdst = []
+    ro = crypto.get_ssh_connection_reuse_options_string()
+    # ensure compression codec is available on the node
+    if compression is not None:
+        checkcmd = ('ssh -T -x -o StrictHostKeyChecking=no '
+                    '-o UserKnownHostsFile={} {} -i {} '
+                    '-p {} {}@{} command -v {}'.format(
+                        os.devnull, ro, ssh_private_key, port, username, ip,
+                        compression.codec))
+        rc = util.subprocess_with_output(
+            checkcmd, shell=True, suppress_output=True)
+        if rc != 0:
+            logger.warning(
+                'compression codec {} is not available on {}, transferring '
+                'uncompressed'.format(compression.codec, node_id))
+            compression = None
+    group = util.ProcessGroup()
     completed = 0
     i = 0
     while completed != len(files):
-        xfers = len(procs) + len(psprocs)
-        while xfers < mpt and i < len(files):
-            file = files[i]
+        while len(group) < mpt and i < len(files):
             _spawn_next_transfer(
-                method, file, ip, port, username, ssh_private_key, eo, reo,
-                procs, psprocs, psdst)
-            xfers = len(procs) + len(psprocs)
+                method, files[i], ip, port, username, ssh_private_key, eo,
+                reo, group,
+                compression=compression if _compress_transfer(
+                    compression, files[i]) else None)
             i += 1
-        plist, n, rc = util.subprocess_wait_multi(psprocs, procs)
+        # processes are reported as they exit, including on failure
+        (kind, dstpath), _, rc = group.wait_any()
         if rc != 0:
             logger.error(
-                'data ingress to {} failed with return code: {}'.format(
-                    node_id, rc))
+                'data ingress of {} to {} failed with return code: {}'.format(
+                    dstpath, node_id, rc))
             rcodes[node_id] = rc
             return
-        if plist == psprocs:
-            dstpath = psdst[n]
-            del psdst[n]
-            del psprocs[n]
+        if kind == 'split':
             join = False
             with spfiles_count_lock:
                 spfiles_count[dstpath] = spfiles_count[dstpath] - 1
@@ -808,128 +1366,401 @@ def _multinode_thread_worker(
                     'rm -f {}.*'.format(dstpath)
                 ]
                 joincmd = ('ssh -T -x -o StrictHostKeyChecking=no '
-                           '-o UserKnownHostsFile={} -i {} '
+                           '-o UserKnownHostsFile={} {} -i {} '
                            '-p {} {}@{} {}'.format(
-                               os.devnull, ssh_private_key, port, username,
-                               ip, util.wrap_commands_in_shell(cmds)))
-                procs.append(
-                    util.subprocess_nowait(joincmd, shell=True))
+                               os.devnull, ro, ssh_private_key, port,
+                               username, ip,
+                               util.wrap_commands_in_shell(cmds)))
+                group.add(
+                    util.subprocess_nowait(joincmd, shell=True),
+                    ('join', dstpath))
             else:
                 completed += 1
         else:
-            del procs[n]
             completed += 1
     rcodes[node_id] = 0
 
 
-def _azure_blob_storage_transfer(storage_settings, data_transfer, source):
-    # type: (settings.StorageCredentialsSettings,
-    #        settings.DataTransferSettings,
-    #        settings.SourceSettings) -> None
-    """Initiate an azure blob storage transfer
-    :param settings.StorageCredentialsSettings storage_settings:
-        storage settings
-    :param settings.DataTransferSettings data_transfer: data transfer settings
-    :param settings.SourceSettings source: source settings
+def _relay_plan_rounds(nodes, fanout):
+    # type: (int, int) -> int
+    """Compute the number of relay rounds to reach all nodes from one seed
+    :param int nodes: number of nodes including the seed
+    :param int fanout: number of nodes each node relays to per round
+    :rtype: int
+    :return: number of rounds
     """
-    eo = data_transfer.blobxfer_extra_options
-    # append appropriate option for fshare
-    if data_transfer.is_file_share and '--mode file' not in eo:
-        eo = '--mode file {}'.format(eo)
-    thr = threading.Thread(
-        target=_wrap_blobxfer_subprocess,
-        args=(
-            storage_settings,
-            data_transfer.remote_path,
-            source,
-            eo,
-        )
-    )
-    thr.start()
-    return thr
+    rounds = 0
+    holders = 1
+    while holders < nodes:
+        holders += min((holders * fanout, nodes - holders))
+        rounds += 1
+    return rounds
 
 
-def _wrap_blobxfer_subprocess(storage_settings, remote_path, source, eo):
-    # type: (StorageCredentialsSettings, str, SourceSettings, str) -> None
-    """Wrapper function for blobxfer
-    :param StorageCredentialsSettings storage_settings: storage settings
-    :param str remote_path: remote path to transfer to
-    :param SourceSettings source: source settings
-    :param str eo: blobxfer extra options
+def _relay_ingressed_data(
+        batch_client, config, pool_id, path, seed, rls, username,
+        ssh_private_key, fanout, plan_only=False):
+    # type: (batch.BatchServiceClient, dict, str, str, str, dict, str,
+    #        pathlib.Path, int, bool) -> list
+    """Replicate data ingressed to a seed node to all other nodes of the
+    pool along a distribution tree over the private network of the pool.
+    Each node which receives the data relays it to up to fanout nodes in
+    the next round, thus data crosses the client uplink only once.
+    :param batch_client: The batch client to use.
+    :type batch_client: `batchserviceclient.BatchServiceClient`
+    :param dict config: configuration dict
+    :param str pool_id: pool id
+    :param str path: path of data on nodes
+    :param str seed: seed node id
+    :param dict rls: remote login settings of all nodes
+    :param str username: username
+    :param pathlib.Path: ssh private key
+    :param int fanout: number of nodes each node relays to per round
+    :param bool plan_only: only log the relay plan
+    :rtype: list
+    :return: node ids which failed to receive data
     """
-    # generate include/exclude options
-    filters = _convert_filter_to_blobxfer_option(
-        source.include, source.exclude)
-    # get correct path
-    psrc = pathlib.Path(source.path)
-    cwd = str(psrc.parent)
-    rsrc = psrc.relative_to(psrc.parent)
-    # generate env
-    env = os.environ.copy()
-    env['BLOBXFER_STORAGE_ACCOUNT_KEY'] = storage_settings.account_key
-    # set cmd
-    cmd = [
-        ('blobxfer upload --storage-account {sa} --remote-path {rp} '
-         '--local-path {lp} --endpoint {ep} --no-progress-bar '
-         '{filters} {eo}').format(
-             sa=storage_settings.account,
-             rp=remote_path,
-             lp=rsrc,
-             ep=storage_settings.endpoint,
-             filters=filters,
-             eo=eo)
-    ]
-    logger.info('begin ingressing data from {} to remote path {}'.format(
-        source.path, remote_path))
-    proc = util.subprocess_nowait_pipe_stdout(
-        util.wrap_local_commands_in_shell(cmd), shell=True, cwd=cwd, env=env)
-    stdout, stderr = proc.communicate()
-    if proc.returncode != 0:
-        if stderr is not None:
-            logger.error(stderr.decode('utf8'))
-        if stdout is not None:
-            logger.error(stdout.decode('utf8'))
-        logger.error('data ingress failed from {} to remote path {}'.format(
-            source.path, remote_path))
-    else:
-        if stdout is not None:
-            logger.debug(stdout.decode('utf8'))
+    if fanout is None:
+        fanout = _DATA_RELAY_FANOUT
+    if fanout < 1:
+        raise ValueError('relay fanout is invalid: {}'.format(fanout))
+    logger.info(
+        'ingress plan: relay {} from node {} to {} nodes in {} rounds with '
+        'fanout {}'.format(
+            path, seed, len(rls) - 1, _relay_plan_rounds(len(rls), fanout),
+            fanout))
+    if plan_only or len(rls) < 2:
+        return []
+    pool = batch_client.pool.get(pool_id)
+    if (not pool.enable_inter_node_communication and
+            pool.network_configuration is None):
+        raise RuntimeError(
+            'cannot relay data in pool {} without inter-node communication '
+            'or a virtual network'.format(pool_id))
+    node_ips = dict(
+        (node.id, node.ip_address)
+        for node in batch_client.compute_node.list(pool_id))
+    relay_dir = '{}/{}'.format(
+        settings.temp_disk_mountpoint(config), _DATA_RELAY_DIR)
+    size = []
+
+    def _on_seed(result):
+        if result.returncode == 0:
+            size.append(int(result.stdout.split()[0]))
+
+    def _on_relay(parent, result):
+        if result.returncode == 0:
+            logger.info(
+                'relayed {0:.4f} MiB from node {1} to node {2} in '
+                '{3:.2f} sec ({4:.3f} Mbit/s)'.format(
+                    size[0] / _MEGABYTE, parent, result.key,
+                    result.elapsed,
+                    (size[0] * 8 / 1e6) / max((result.elapsed, 1e-3))))
+
+    def _receive_cmd(url, relay_file):
+        return [
+            'mkdir -p {}'.format(path),
+            'curl -fsS {} | tee {} | tar -xf - -C {}'.format(
+                url, relay_file, path),
+        ]
+
+    start = datetime.datetime.now()
+    relays, failed, rounds = crypto.relay_file_over_ssh(
+        rls, node_ips, [seed], relay_dir, _DATA_RELAY_FILE, _DATA_RELAY_PORT,
+        [
+            'tar -cf {d}/{f} -C {p} .'.format(
+                d=relay_dir, f=_DATA_RELAY_FILE, p=path),
+            'stat -c %s {}/{}'.format(relay_dir, _DATA_RELAY_FILE),
+        ], _receive_cmd, ssh_private_key, username, fanout,
+        description='data', on_seed=_on_seed, on_relay=_on_relay)
+    logger.info(
+        'relayed {} to {} nodes in {} rounds in {:.2f} sec, {} nodes '
+        'failed'.format(
+            path, len(relays), rounds,
+            (datetime.datetime.now() - start).total_seconds(), len(failed)))
+    return failed
+
+
+class StorageIngressScheduler(object):
+    """Schedule blobxfer uploads of files entries to Azure Storage with a
+    bound on the number of concurrent entries and a budget of transfer
+    threads shared by all running entries"""
+    def __init__(self, max_concurrent=None, transfer_threads=None):
+        # type: (StorageIngressScheduler, int, int) -> None
+        """Ctor for StorageIngressScheduler
+        :param StorageIngressScheduler self: this
+        :param int max_concurrent: max concurrent entries
+        :param int transfer_threads: transfer threads budget
+        """
+        self._max_concurrent = max_concurrent or \
+            _MAX_CONCURRENT_STORAGE_INGRESS
+        self._transfer_threads = transfer_threads or \
+            _STORAGE_INGRESS_TRANSFER_THREADS
+        self._entries = []
+        self._unfinished = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._futures = None
+        self._start = None
+
+    def __len__(self):
+        # type: (StorageIngressScheduler) -> int
+        """Number of entries
+        :param StorageIngressScheduler self: this
+        :rtype: int
+        :return: number of entries
+        """
+        return len(self._entries)
+
+    def add(self, storage_settings, data_transfer, source):
+        # type: (StorageIngressScheduler,
+        #        settings.StorageCredentialsSettings,
+        #        settings.DataTransferSettings,
+        #        settings.SourceSettings) -> None
+        """Add a files entry to upload
+        :param StorageIngressScheduler self: this
+        :param settings.StorageCredentialsSettings storage_settings:
+            storage settings
+        :param settings.DataTransferSettings data_transfer: data transfer
+            settings
+        :param settings.SourceSettings source: source settings
+        """
+        eo = data_transfer.blobxfer_extra_options
+        # append appropriate option for fshare
+        if data_transfer.is_file_share and '--mode file' not in eo:
+            eo = '--mode file {}'.format(eo)
+        self._entries.append({
+            'storage_settings': storage_settings,
+            'remote_path': data_transfer.remote_path,
+            'source': source,
+            'eo': eo,
+            'percent': 0.0,
+            'rate': 0.0,
+            'files': None,
+            'gib': None,
+            'elapsed': None,
+            'rc': None,
+        })
+
+    def start(self):
+        # type: (StorageIngressScheduler) -> None
+        """Start uploading all entries added
+        :param StorageIngressScheduler self: this
+        """
+        if len(self._entries) == 0 or self._executor is not None:
+            return
+        workers = min((self._max_concurrent, len(self._entries)))
+        logger.info(
+            'ingressing {} entries to Azure Storage with {} concurrent '
+            'uploads sharing {} transfer threads'.format(
+                len(self._entries), workers, self._transfer_threads))
+        self._unfinished = len(self._entries)
+        self._start = datetime.datetime.now()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers)
+        self._futures = [
+            self._executor.submit(self._upload, entry)
+            for entry in self._entries
+        ]
+
+    def _transfer_threads_share(self):
+        # type: (StorageIngressScheduler) -> int
+        """Transfer threads for an entry which is starting, based on the
+        number of entries which can still run concurrently
+        :param StorageIngressScheduler self: this
+        :rtype: int
+        :return: transfer threads
+        """
+        with self._lock:
+            workers = max((min((self._max_concurrent, self._unfinished)), 1))
+        return max((self._transfer_threads // workers, 1))
+
+    def _update(self, entry, text):
+        # type: (StorageIngressScheduler, dict, bytes) -> None
+        """Update entry progress from blobxfer progress output
+        :param StorageIngressScheduler self: this
+        :param dict entry: entry
+        :param bytes text: progress output
+        """
+        for match in _BLOBXFER_PROGRESS_REGEX.finditer(
+                text.decode('utf8', 'replace')):
+            with self._lock:
+                entry['percent'] = float(match.group(1))
+                entry['rate'] = float(match.group(2))
+                entry['files'] = '{}/{}'.format(
+                    match.group(3), match.group(4))
+
+    def _upload(self, entry):
+        # type: (StorageIngressScheduler, dict) -> None
+        """Upload an entry with blobxfer
+        :param StorageIngressScheduler self: this
+        :param dict entry: entry
+        """
+        source = entry['source']
+        storage_settings = entry['storage_settings']
+        eo = entry['eo']
+        if '--transfer-threads' not in eo:
+            eo = '--transfer-threads {} {}'.format(
+                self._transfer_threads_share(), eo)
+        # generate include/exclude options
+        filters = _convert_filter_to_blobxfer_option(
+            source.include, source.exclude)
+        # get correct path
+        psrc = pathlib.Path(source.path)
+        cwd = str(psrc.parent)
+        rsrc = psrc.relative_to(psrc.parent)
+        # generate env
+        env = os.environ.copy()
+        env['BLOBXFER_STORAGE_ACCOUNT_KEY'] = storage_settings.account_key
+        # progress bar output requires a log file
+        fd, logfile = tempfile.mkstemp(prefix='blobxfer-', suffix='.log')
+        os.close(fd)
+        # set cmd
+        cmd = [
+            ('blobxfer upload --storage-account {sa} --remote-path {rp} '
+             '--local-path {lp} --endpoint {ep} --progress-bar '
+             '--log-file {lf} {filters} {eo}').format(
+                 sa=storage_settings.account,
+                 rp=entry['remote_path'],
+                 lp=rsrc,
+                 ep=storage_settings.endpoint,
+                 lf=shellquote(logfile),
+                 filters=filters,
+                 eo=eo)
+        ]
+        logger.info('begin ingressing data from {} to remote path {}'.format(
+            source.path, entry['remote_path']))
+        try:
+            proc = util.subprocess_nowait_pipe_stdout(
+                util.wrap_local_commands_in_shell(cmd), shell=True, cwd=cwd,
+                env=env)
+            # progress records are separated by carriage returns
+            buf = b''
+            while True:
+                data = os.read(proc.stdout.fileno(), 65536)
+                if len(data) == 0:
+                    break
+                buf += data
+                pos = max((buf.rfind(b'\r'), buf.rfind(b'\n')))
+                if pos >= 0:
+                    self._update(entry, buf[:pos])
+                    buf = buf[pos + 1:]
+            self._update(entry, buf)
+            proc.wait()
+            with open(logfile, 'rb') as f:
+                log = f.read().decode('utf8', 'replace')
+        finally:
+            with self._lock:
+                self._unfinished -= 1
+            try:
+                os.unlink(logfile)
+            except OSError:
+                pass
+        match = _BLOBXFER_THROUGHPUT_REGEX.search(log)
+        with self._lock:
+            entry['rc'] = proc.returncode
+            if match is not None:
+                entry['gib'] = float(match.group(1))
+                entry['elapsed'] = float(match.group(2))
+        if proc.returncode != 0:
+            logger.error(log)
+            logger.error(
+                'data ingress failed from {} to remote path {}'.format(
+                    source.path, entry['remote_path']))
+        else:
+            logger.debug(log)
+
+    def _log_progress(self, completed):
+        # type: (StorageIngressScheduler, int) -> None
+        """Log aggregated progress of running entries
+        :param StorageIngressScheduler self: this
+        :param int completed: number of completed entries
+        """
+        with self._lock:
+            running = [
+                x for x in self._entries
+                if x['rc'] is None and x['files'] is not None
+            ]
+            rate = sum(x['rate'] for x in running)
+            detail = ', '.join(
+                '{} {:.2f}% {} files'.format(
+                    x['source'].path, x['percent'], x['files'])
+                for x in running)
+        logger.info(
+            'Azure Storage ingress: {}/{} entries completed, {} uploading at '
+            '{:.3f} MiB/s aggregate'.format(
+                completed, len(self._entries), len(running), rate))
+        if len(detail) > 0:
+            logger.debug('Azure Storage ingress progress: {}'.format(detail))
+
+    def wait(self):
+        # type: (StorageIngressScheduler) -> int
+        """Wait for all entries to complete, logging aggregated progress
+        periodically and a throughput report of each entry
+        :param StorageIngressScheduler self: this
+        :rtype: int
+        :return: number of failed entries
+        """
+        self.start()
+        if self._executor is None:
+            return 0
+        try:
+            pending = set(self._futures)
+            while len(pending) > 0:
+                _, pending = concurrent.futures.wait(
+                    pending, timeout=_STORAGE_INGRESS_PROGRESS_INTERVAL)
+                if len(pending) > 0:
+                    self._log_progress(len(self._futures) - len(pending))
+            for fut in self._futures:
+                fut.result()
+        finally:
+            self._executor.shutdown()
+        diff = datetime.datetime.now() - self._start
+        failed = 0
+        total = 0
+        for entry in self._entries:
+            if entry['rc'] != 0:
+                failed += 1
+                logger.error('{} to {}: failed with return code {}'.format(
+                    entry['source'].path, entry['remote_path'], entry['rc']))
+            elif entry['gib'] is None:
+                logger.info('{} to {}: no data uploaded'.format(
+                    entry['source'].path, entry['remote_path']))
+            else:
+                mib = entry['gib'] * 1024
+                total += mib
+                logger.info(
+                    '{0} to {1}: {2:.4f} MiB in {3:.2f} sec '
+                    '({4:.3f} MiB/s)'.format(
+                        entry['source'].path, entry['remote_path'], mib,
+                        entry['elapsed'],
+                        mib / max((entry['elapsed'], 1e-3))))
+        logger.info(
+            'Azure Blob/File Storage transfer completed: {0:.4f} MiB in {1} '
+            'entries in {2:.2f} sec ({3:.3f} MiB/s), {4} failed'.format(
+                total, len(self._entries), diff.total_seconds(),
+                total / max((diff.total_seconds(), 1e-3)), failed))
+        return failed
 
 
 def wait_for_storage_threads(storage_threads):
-    # type: (list) -> None
-    """Wait for storage processes to complete
-    :param list storage_threads: list of storage threads
+    # type: (StorageIngressScheduler) -> None
+    """Wait for storage ingress to complete
+    :param StorageIngressScheduler storage_threads: storage ingress
+        scheduler
     """
-    if storage_threads is None:
+    if storage_threads is None or len(storage_threads) == 0:
         return
-    i = 0
-    nthreads = len(storage_threads)
-    while nthreads > 0:
-        alive = sum(thr.is_alive() for thr in storage_threads)
-        if alive > 0:
-            i += 1
-            if i % 10 == 0:
-                i = 0
-                logger.debug(
-                    'waiting for Azure Blob Storage transfer processes '
-                    'to complete: {} active, {} completed'.format(
-                        alive, nthreads - alive))
-            time.sleep(1)
-        else:
-            for thr in storage_threads:
-                thr.join()
-            if nthreads > 0:
-                logger.info('Azure Blob/File Storage transfer completed')
-            break
+    storage_threads.wait()
 
 
 def ingress_data(
         batch_client, compute_client, network_client, config, rls=None,
-        kind=None, total_vm_count=None, to_fs=None):
+        kind=None, total_vm_count=None, to_fs=None, plan_only=False,
+        relay=False, relay_fanout=None):
     # type: (batch.BatchServiceClient,
     #        azure.mgmt.compute.ComputeManagementClient, dict, dict, str,
-    #        int, str) -> list
+    #        int, str, bool, bool, int) -> list
     """Ingresses data into Azure
     :param batch_client: The batch client to use.
     :type batch_client: `batchserviceclient.BatchServiceClient`
@@ -942,10 +1773,15 @@ def ingress_data(
     :param str kind: 'all', 'shared', 'storage', or 'remotefs'
     :param int total_vm_count: total current vm count
     :param str to_fs: to remote filesystem
-    :rtype: list
-    :return: list of storage threads
+    :param bool plan_only: only log transfer plans without transferring
+    :param bool relay: ingress node destinations to one node and relay to
+        all other nodes of the pool
+    :param int relay_fanout: number of nodes each node relays to per round
+    :rtype: StorageIngressScheduler
+    :return: storage ingress scheduler
     """
-    storage_threads = []
+    storage_threads = StorageIngressScheduler()
+    resolver = None
     files = settings.global_resources_files(config)
     if util.is_none_or_empty(files):
         logger.info('no files to ingress detected')
@@ -961,6 +1797,7 @@ def ingress_data(
                 'cannot specify both shared data volume and storage for the '
                 'destination for source: {}'.format(source.path))
         direct_single_node = False
+        relay_nodes = False
         if dest.relative_destination_path is not None:
             if dest.storage_account_settings is not None:
                 raise RuntimeError(
@@ -978,12 +1815,22 @@ def ingress_data(
                     direct_single_node = True
                 elif total_vm_count is None:
                     raise ValueError('total_vm_count is not set')
+                elif relay:
+                    # relayed nodes receive a copy of the seed node data,
+                    # thus removed files would only be deleted on the seed
+                    if dest.data_transfer.delete_removed:
+                        raise RuntimeError(
+                            'cannot relay data ingress with delete_removed '
+                            'for source: {}'.format(source.path))
+                    # ingress to a seed node and relay to all other nodes
+                    direct_single_node = True
+                    relay_nodes = True
                 else:
                     raise RuntimeError(
                         'Cannot ingress data directly into compute node '
-                        'host for pools with more than one node. Please use '
-                        'a shared data volume as the ingress destination '
-                        'instead.')
+                        'host for pools with more than one node without '
+                        'relay. Please use a shared data volume as the '
+                        'ingress destination or specify --relay instead.')
         if dest.shared_data_volume is not None or direct_single_node:
             if kind == 'storage':
                 logger.warning(
@@ -1040,21 +1887,21 @@ def ingress_data(
             # set ssh info
             if dst_rfs:
                 username = rfs.storage_cluster.ssh.username
-                #  retrieve public ips from all vms in named storage cluster
+                # retrieve ips from all vms in named storage cluster
+                if resolver is None:
+                    resolver = remotefs.StorageClusterResolver(
+                        compute_client, network_client, rfs)
                 rls = {}
-                for i in range(rfs.storage_cluster.vm_count):
-                    vm_name = '{}-vm{}'.format(
-                        rfs.storage_cluster.hostname_prefix, i)
-                    vm = compute_client.virtual_machines.get(
-                        resource_group_name=rfs.storage_cluster.resource_group,
-                        vm_name=vm_name,
-                    )
-                    _, pip = resource.get_nic_and_pip_from_virtual_machine(
-                        network_client, rfs.storage_cluster.resource_group, vm)
+                for vm_name, entry in resolver.resolve_cluster().items():
+                    if entry is None:
+                        raise RuntimeError(
+                            'virtual machine {} not found'.format(vm_name))
+                    _, nic, pip = entry
                     # create compute node rls settings with sc vm ip/port
                     rls[vm_name] = \
                         batchmodels.ComputeNodeGetRemoteLoginSettingsResult(
-                            remote_login_ip_address=pip.ip_address,
+                            remote_login_ip_address=resolver.get_ip_address(
+                                nic, pip),
                             remote_login_port=22)
             else:
                 username = pool.ssh.username
@@ -1080,30 +1927,63 @@ def ingress_data(
                         'exist')
             logger.debug('using ssh_private_key from: {}'.format(
                 ssh_private_key))
+            # ingress to only the seed node if relaying, without altering
+            # the remote login settings shared by all files entries
+            entry_rls = rls
+            if relay_nodes:
+                seed = sorted(rls.keys())[0]
+                entry_rls = {seed: rls[seed]}
+            # target identifies the destination for ingress manifests
+            if dst_rfs:
+                target = 'remotefs:{}'.format(to_fs)
+            elif direct_single_node:
+                target = 'node:{}:{}'.format(pool.id, next(iter(entry_rls)))
+            else:
+                target = 'pool:{}'.format(pool.id)
             if (dest.data_transfer.method == 'scp' or
                     dest.data_transfer.method == 'rsync+ssh'):
-                # split/source include/exclude will force multinode
-                # transfer with mpt=1
+                # split/compression/incremental/source include/exclude will
+                # force multinode transfer with mpt=1
                 if (dest.data_transfer.split_files_megabytes is not None or
+                        dest.data_transfer.compression is not None or
+                        dest.data_transfer.incremental or
                         source.include is not None or
                         source.exclude is not None):
-                    _multinode_transfer(
+                    success = _multinode_transfer(
                         'multinode_' + dest.data_transfer.method, dest,
-                        source, dst, username, ssh_private_key, rls, 1)
+                        source, dst, username, ssh_private_key, entry_rls, 1,
+                        plan_only=plan_only, target=target)
                 else:
-                    _singlenode_transfer(
+                    success = _singlenode_transfer(
                         dest, source.path, dst, username, ssh_private_key,
-                        rls)
+                        entry_rls, plan_only=plan_only)
             elif (dest.data_transfer.method == 'multinode_scp' or
-                  dest.data_transfer.method == 'multinode_rsync+ssh'):
-                _multinode_transfer(
+                  dest.data_transfer.method == 'multinode_rsync+ssh' or
+                  dest.data_transfer.method == 'multinode_tar+ssh'):
+                success = _multinode_transfer(
                     dest.data_transfer.method, dest, source, dst,
-                    username, ssh_private_key, rls,
-                    dest.data_transfer.max_parallel_transfers_per_node)
+                    username, ssh_private_key, entry_rls,
+                    dest.data_transfer.max_parallel_transfers_per_node,
+                    plan_only=plan_only, target=target)
             else:
                 raise RuntimeError(
                     'unknown transfer method: {}'.format(
                         dest.data_transfer.method))
+            if relay_nodes:
+                if success:
+                    failed = _relay_ingressed_data(
+                        batch_client, config, pool.id, '{}{}'.format(
+                            dst, dest.relative_destination_path),
+                        seed, rls, username, ssh_private_key,
+                        relay_fanout, plan_only=plan_only)
+                    if len(failed) > 0:
+                        logger.error(
+                            'data relay from {} failed to nodes: {}'.format(
+                                source.path, ', '.join(sorted(failed))))
+                else:
+                    logger.error(
+                        'skipping data relay from {} due to ingress '
+                        'failure to node {}'.format(source.path, seed))
         elif dest.storage_account_settings is not None:
             if kind == 'shared':
                 logger.warning(
@@ -1111,12 +1991,18 @@ def ingress_data(
                     'to Azure Blob/File Storage not specified'.format(
                         source.path))
                 continue
-            thr = _azure_blob_storage_transfer(
+            if plan_only:
+                logger.info(
+                    'ingress plan: {} to storage account {} via '
+                    'blobxfer'.format(
+                        source.path, dest.storage_account_settings))
+                continue
+            storage_threads.add(
                 settings.credentials_storage(
                     config, dest.storage_account_settings),
                 dest.data_transfer, source)
-            storage_threads.append(thr)
         else:
             raise RuntimeError(
                 'invalid file transfer configuration: {}'.format(fdict))
+    storage_threads.start()
     return storage_threads
@@ -30,6 +30,7 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import datetime
 import logging
 import os
 try:
@@ -61,6 +62,13 @@ logger = logging.getLogger(__name__)
 util.setup_logger(logger)
 # global defines
 _REQUEST_CHUNK_SIZE = 4194304
+_SSH_IMAGE_UPDATE_TIMEOUT = 3600
+_SSH_IMAGE_LIST_TIMEOUT = 300
+_IMAGE_RELAY_SEEDS = 2
+_IMAGE_RELAY_FANOUT = 4
+_IMAGE_RELAY_PORT = 8118
+_IMAGE_RELAY_DIR = 'shipyard-image-relay'
+_IMAGE_RELAY_FILE = 'images.tar'
 _ROOT_PATH = pathlib.Path(__file__).resolve().parent.parent
 _RESOURCES_PATH = None
 _NVIDIA_DRIVER = {
@@ -1337,63 +1345,94 @@ def _add_pool(
         storage_threads = data.ingress_data(
             batch_client, compute_client, network_client, config, rls=None,
             kind='storage')
-    # create pool
-    nodes = batch.create_pool(batch_client, config, pool)
-    _pool = batch_client.pool.get(pool.id)
-    pool_current_vm_count = (
-        _pool.current_dedicated_nodes + _pool.current_low_priority_nodes
-    )
-    pool_target_vm_count = (
-        _pool.target_dedicated_nodes + _pool.target_low_priority_nodes
-    )
-    if util.is_none_or_empty(nodes) and pool_target_vm_count > 0:
-        raise RuntimeError(
-            ('No nodes could be allocated for pool: {}. If the pool is '
-             'comprised entirely of low priority nodes, then there may not '
-             'have been enough available capacity in the region to satisfy '
-             'your request. Please inspect the pool for resize errors and '
-             'issue pool resize to try again.').format(pool.id))
-    # set up gluster on compute if specified
-    if gluster_on_compute and pool_current_vm_count > 0:
-        _setup_glusterfs(
-            batch_client, blob_client, config, nodes, _GLUSTERPREP_FILE,
-            cmdline=None)
-    # create admin user on each node if requested
-    if pool_current_vm_count > 0:
-        try:
-            batch.add_rdp_user(batch_client, config, nodes)
-        except Exception as e:
-            logger.exception(e)
-        try:
-            batch.add_ssh_user(batch_client, config, nodes)
-        except Exception as e:
-            logger.exception(e)
-            logger.error(
-                'Could not add SSH users to nodes. Please ensure ssh-keygen '
-                'is available in your PATH or cwd. Skipping data ingress if '
-                'specified.')
-        else:
-            rls = None
-            # ingress data to shared fs if specified
-            if pool_settings.transfer_files_on_pool_creation:
+    # prepare admin users to be added to nodes as they become ready, rdp
+    # and ssh users are prepared independently such that a failure to
+    # prepare one does not prevent the other
+    try:
+        rdp_provisioner = batch.AdminUserProvisioner(
+            batch_client, config, ssh=False)
+    except Exception as e:
+        logger.exception(e)
+        rdp_provisioner = None
+    try:
+        ssh_provisioner = batch.AdminUserProvisioner(
+            batch_client, config, rdp=False)
+    except Exception as e:
+        logger.exception(e)
+        ssh_provisioner = None
+    provisioners = [
+        x for x in (rdp_provisioner, ssh_provisioner) if x is not None]
+
+    def _submit_ready(nodes):
+        for provisioner in provisioners:
+            provisioner.submit_ready(nodes)
+
+    try:
+        # create pool
+        nodes = batch.create_pool(
+            batch_client, config, pool, node_ready_callback=_submit_ready)
+        _pool = batch_client.pool.get(pool.id)
+        pool_current_vm_count = (
+            _pool.current_dedicated_nodes + _pool.current_low_priority_nodes
+        )
+        pool_target_vm_count = (
+            _pool.target_dedicated_nodes + _pool.target_low_priority_nodes
+        )
+        if util.is_none_or_empty(nodes) and pool_target_vm_count > 0:
+            raise RuntimeError(
+                ('No nodes could be allocated for pool: {}. If the pool is '
+                 'comprised entirely of low priority nodes, then there may '
+                 'not have been enough available capacity in the region to '
+                 'satisfy your request. Please inspect the pool for resize '
+                 'errors and issue pool resize to try again.').format(
+                     pool.id))
+        # set up gluster on compute if specified
+        if gluster_on_compute and pool_current_vm_count > 0:
+            _setup_glusterfs(
+                batch_client, blob_client, config, nodes, _GLUSTERPREP_FILE,
+                cmdline=None)
+        # wait for admin users to be added on each node if requested
+        if pool_current_vm_count > 0:
+            if rdp_provisioner is not None:
+                try:
+                    rdp_provisioner.finish(nodes)
+                except Exception as e:
+                    logger.exception(e)
+            try:
+                if ssh_provisioner is None:
+                    raise RuntimeError('ssh user provisioning failed')
+                ssh_provisioner.finish(nodes)
+            except Exception as e:
+                logger.exception(e)
+                logger.error(
+                    'Could not add SSH users to nodes. Please ensure '
+                    'ssh-keygen is available in your PATH or cwd. Skipping '
+                    'data ingress if specified.')
+            else:
+                rls = None
+                # ingress data to shared fs if specified
+                if pool_settings.transfer_files_on_pool_creation:
+                    if rls is None:
+                        rls = batch.get_remote_login_settings(
+                            batch_client, config, nodes)
+                    data.ingress_data(
+                        batch_client, compute_client, network_client, config,
+                        rls=rls, kind='shared',
+                        total_vm_count=pool_current_vm_count)
+                # log remote login settings
                 if rls is None:
-                    rls = batch.get_remote_login_settings(
-                        batch_client, config, nodes)
-                data.ingress_data(
-                    batch_client, compute_client, network_client, config,
-                    rls=rls, kind='shared',
-                    total_vm_count=pool_current_vm_count)
-            # log remote login settings
-            if rls is None:
-                if pool_current_vm_count <= 16:
-                    batch.get_remote_login_settings(
-                        batch_client, config, nodes)
-                else:
-                    logger.info(
-                        'Not listing remote login settings due to VM count. '
-                        'If you need a list of remote login settings for all '
-                        'nodes in the pool, issue the "pool nodes grls" '
-                        'command.')
+                    if pool_current_vm_count <= 16:
+                        batch.get_remote_login_settings(
+                            batch_client, config, nodes)
+                    else:
+                        logger.info(
+                            'Not listing remote login settings due to VM '
+                            'count. If you need a list of remote login '
+                            'settings for all nodes in the pool, issue the '
+                            '"pool nodes grls" command.')
+    finally:
+        for provisioner in provisioners:
+            provisioner.close()
     # wait for storage ingress processes
     data.wait_for_storage_threads(storage_threads)
 
@@ -1501,18 +1540,14 @@ def _setup_glusterfs(
             batchtask.id, job_id))
 
 
-def _update_container_images_over_ssh(batch_client, config, pool, cmd):
-    # type: (batchsc.BatchServiceClient, dict, batchmodels.CloudPool,
-    #        list) -> None
-    """Update docker images in pool over ssh
-    :param batch_client: The batch client to use.
-    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+def _get_ssh_username_and_private_key(config):
+    # type: (dict) -> Tuple[str, pathlib.Path]
+    """Get SSH username and private key for updating container images
     :param dict config: configuration dict
-    :param batchmodels.CloudPool pool: cloud pool
-    :param list cmd: command
+    :rtype: tuple
+    :return: (ssh username, ssh private key)
     """
     _pool = settings.pool_settings(config)
-    # get ssh settings
     username = _pool.ssh.username
     if util.is_none_or_empty(username):
         raise ValueError(
@@ -1524,48 +1559,134 @@ def _update_container_images_over_ssh(batch_client, config, pool, cmd):
     if not ssh_private_key.exists():
         raise RuntimeError('SSH private key file not found at: {}'.format(
             ssh_private_key))
+    return username, ssh_private_key
+
+
+def _update_container_images_over_ssh(
+        batch_client, config, pool, cmd, node_ids=None):
+    # type: (batchsc.BatchServiceClient, dict, batchmodels.CloudPool,
+    #        list, List[str]) -> None
+    """Update docker images in pool over ssh
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param dict config: configuration dict
+    :param batchmodels.CloudPool pool: cloud pool
+    :param list cmd: command
+    :param list node_ids: restrict update to these node ids
+    """
+    username, ssh_private_key = _get_ssh_username_and_private_key(config)
     command = ['sudo', '/bin/bash -c "{}"'.format(' && '.join(cmd))]
     if settings.verbose(config):
         logger.debug('executing command: {}'.format(command))
-    # iterate through all nodes
-    nodes = batch_client.compute_node.list(pool.id)
-    procs = []
-    failures = False
-    for node in nodes:
-        rls = batch_client.compute_node.get_remote_login_settings(
-            pool.id, node.id)
-        procs.append(crypto.connect_or_exec_ssh_command(
-            rls.remote_login_ip_address, rls.remote_login_port,
-            ssh_private_key, username, sync=False, command=command))
-        if len(procs) >= 40:
-            logger.debug('waiting for {} update processes to complete'.format(
-                len(procs)))
-            rcs = util.subprocess_wait_all(procs, poll=False)
-            if any([x != 0 for x in rcs]):
-                failures = True
-            procs = []
-            del rcs
-    if len(procs) > 0:
-        logger.debug('waiting for {} update processes to complete'.format(
-            len(procs)))
-        rcs = util.subprocess_wait_all(procs, poll=False)
-        if any([x != 0 for x in rcs]):
-            failures = True
-        procs = []
-        del rcs
-    if failures:
+    # execute on all nodes with a sliding window of ssh sessions
+    nodes = list(batch_client.compute_node.list(pool.id))
+    if node_ids is not None:
+        node_ids = frozenset(node_ids)
+        nodes = [node for node in nodes if node.id in node_ids]
+    node_rls = batch.resolve_remote_login_settings(
+        batch_client, config, [node.id for node in nodes], pool_id=pool.id)
+    targets = [
+        (node.id, node_rls[node.id].remote_login_ip_address,
+         node_rls[node.id].remote_login_port)
+        for node in nodes
+    ]
+    failures = 0
+    for result in crypto.fan_out_ssh_command(
+            targets, ssh_private_key, username, command,
+            timeout=_SSH_IMAGE_UPDATE_TIMEOUT):
+        if result.returncode != 0:
+            failures += 1
+            logger.error(
+                'container image update failed on node {} with return '
+                'code {}:{}{}'.format(
+                    result.key, result.returncode, os.linesep,
+                    result.stderr))
+        else:
+            logger.debug(
+                'container image update completed on node {} in '
+                '{:.2f} sec'.format(result.key, result.elapsed))
+    if failures > 0:
         raise RuntimeError(
-            'failures detected updating container image on pool: {}'.format(
-                pool.id))
+            'failures detected updating container image on {} of {} nodes '
+            'in pool: {}'.format(failures, len(targets), pool.id))
     else:
         logger.info('container image update completed for pool: {}'.format(
             pool.id))
 
 
+def _update_docker_images_via_relay(
+        batch_client, config, pool, login_cmd, docker_images, seeds,
+        fanout):
+    # type: (batchsc.BatchServiceClient, dict, batchmodels.CloudPool,
+    #        list, list, int, int) -> List[str]
+    """Update Docker images in pool by pulling from the registry on a few
+    seed nodes and relaying the saved images to the remaining nodes along
+    a distribution tree over the private network of the pool
+    :param batch_client: The batch client to use.
+    :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
+    :param dict config: configuration dict
+    :param batchmodels.CloudPool pool: cloud pool
+    :param list login_cmd: registry login commands
+    :param list docker_images: docker images to update
+    :param int seeds: number of seed nodes pulling from the registry
+    :param int fanout: number of nodes each node relays to per round
+    :rtype: list
+    :return: node ids which failed to receive images
+    """
+    if (not pool.enable_inter_node_communication and
+            pool.network_configuration is None):
+        raise RuntimeError(
+            'cannot relay container images in pool {} without inter-node '
+            'communication or a virtual network'.format(pool.id))
+    username, ssh_private_key = _get_ssh_username_and_private_key(config)
+    nodes = list(batch_client.compute_node.list(pool.id))
+    node_rls = batch.resolve_remote_login_settings(
+        batch_client, config, [node.id for node in nodes], pool_id=pool.id)
+    node_ips = dict((node.id, node.ip_address) for node in nodes)
+    relay_dir = '{}/{}'.format(
+        settings.temp_disk_mountpoint(config), _IMAGE_RELAY_DIR)
+    prune_cmd = (
+        'docker images --filter dangling=true -q --no-trunc | '
+        'xargs --no-run-if-empty docker rmi'
+    )
+    seeds = min((max((seeds, 1)), len(nodes)))
+    seed_cmd = list(login_cmd)
+    seed_cmd.extend(['docker pull {}'.format(x) for x in docker_images])
+    seed_cmd.extend([
+        'docker save -o {}/{} {}'.format(
+            relay_dir, _IMAGE_RELAY_FILE, ' '.join(docker_images)),
+        prune_cmd,
+    ])
+
+    def _receive_cmd(url, path):
+        return [
+            'curl -fsS {} | tee {} | docker load'.format(url, path),
+            prune_cmd,
+        ]
+
+    start = datetime.datetime.now()
+    logger.info(
+        'pulling images from registry on {} seed nodes in pool {}'.format(
+            seeds, pool.id))
+    relays, failed, rounds = crypto.relay_file_over_ssh(
+        node_rls, node_ips, [node.id for node in nodes[:seeds]], relay_dir,
+        _IMAGE_RELAY_FILE, _IMAGE_RELAY_PORT, seed_cmd, _receive_cmd,
+        ssh_private_key, username, fanout, sudo=True,
+        timeout=_SSH_IMAGE_UPDATE_TIMEOUT, description='images')
+    logger.info(
+        'relayed images to {} nodes with {} registry pulls in {} rounds '
+        'in {:.2f} sec, {} nodes failed'.format(
+            len(relays), seeds, rounds,
+            (datetime.datetime.now() - start).total_seconds(), len(failed)))
+    return failed
+
+
 def _update_container_images(
         batch_client, config, docker_image=None, docker_image_digest=None,
-        singularity_image=None, force_ssh=False):
-    # type: (batchsc.BatchServiceClient, dict, str, str, str, bool) -> None
+        singularity_image=None, force_ssh=False, relay=False,
+        relay_seeds=None, relay_fanout=None):
+    # type: (batchsc.BatchServiceClient, dict, str, str, str, bool, bool,
+    #        int, int) -> None
     """Update container images in pool
     :param batch_client: The batch client to use.
     :type batch_client: `azure.batch.batch_service_client.BatchServiceClient`
@@ -1574,16 +1695,24 @@ def _update_container_images(
     :param str docker_image_digest: digest to update to
     :param str singularity_image: singularity image to update
     :param bool force_ssh: force update over SSH
+    :param bool relay: relay Docker images from seed nodes to peers
+    :param int relay_seeds: number of seed nodes pulling from registry
+    :param int relay_fanout: number of peers each node relays to per round
     """
-    # first check that peer-to-peer is disabled for pool
+    # first check that peer-to-peer is disabled for pool unless relaying
+    # images between peers
     pool_id = settings.pool_id(config)
-    try:
-        if settings.data_replication_settings(config).peer_to_peer.enabled:
-            raise RuntimeError(
-                'cannot update container images for a pool with peer-to-peer '
-                'image distribution')
-    except KeyError:
-        pass
+    if relay:
+        force_ssh = True
+    else:
+        try:
+            if settings.data_replication_settings(
+                    config).peer_to_peer.enabled:
+                raise RuntimeError(
+                    'cannot update container images for a pool with '
+                    'peer-to-peer image distribution without relay')
+        except KeyError:
+            pass
     native = settings.is_native_docker_pool(config)
     if native:
         raise RuntimeError(
@@ -1666,23 +1795,56 @@ def _update_container_images(
     # 3. tag images that are in a private registry
     # 4. prune docker images with no tag
     taskenv, coordcmd = batch.generate_docker_login_settings(config, force_ssh)
+    login_cmd = list(coordcmd)
     if util.is_not_empty(docker_images):
         coordcmd.extend(['docker pull {}'.format(x) for x in docker_images])
         coordcmd.append(
             'docker images --filter dangling=true -q --no-trunc | '
             'xargs --no-run-if-empty docker rmi')
+    singularity_cmd = []
     if util.is_not_empty(singularity_images):
-        coordcmd.extend([
+        singularity_cmd.extend([
             'export SINGULARITY_TMPDIR={}'.format(
                 settings.get_singularity_tmpdir(config)),
             'export SINGULARITY_CACHEDIR={}'.format(
                 settings.get_singularity_cachedir(config)),
         ])
-        coordcmd.extend(
+        singularity_cmd.extend(
             ['singularity pull -F {}'.format(x) for x in singularity_images]
         )
-        coordcmd.append('chown -R _azbatch:_azbatchgrp {}'.format(
+        singularity_cmd.append('chown -R _azbatch:_azbatchgrp {}'.format(
             settings.get_singularity_cachedir(config)))
+        coordcmd.extend(singularity_cmd)
+    if relay and util.is_not_empty(docker_images):
+        if relay_seeds is None:
+            relay_seeds = _IMAGE_RELAY_SEEDS
+        if relay_fanout is None:
+            relay_fanout = _IMAGE_RELAY_FANOUT
+        if relay_seeds < 1 or relay_fanout < 1:
+            raise ValueError('relay seeds and fanout must be at least 1')
+        failed = _update_docker_images_via_relay(
+            batch_client, config, pool, login_cmd, docker_images,
+            relay_seeds, relay_fanout)
+        # update nodes which failed to receive images directly from the
+        # registry and update singularity images on all other nodes
+        if len(failed) > 0:
+            logger.warning(
+                'updating {} nodes directly from registry after failed '
+                'relay'.format(len(failed)))
+            _update_container_images_over_ssh(
+                batch_client, config, pool, coordcmd, node_ids=failed)
+        if util.is_not_empty(singularity_cmd):
+            failed = frozenset(failed)
+            _update_container_images_over_ssh(
+                batch_client, config, pool, login_cmd + singularity_cmd,
+                node_ids=[
+                    node.id for node in batch_client.compute_node.list(
+                        pool_id,
+                        compute_node_list_options=batchmodels.
+                        ComputeNodeListOptions(select='id'))
+                    if node.id not in failed
+                ])
+        return
     if force_ssh:
         _update_container_images_over_ssh(batch_client, config, pool, coordcmd)
         return
@@ -1816,43 +1978,31 @@ def _list_docker_images(batch_client, config):
     if not ssh_private_key.exists():
         raise RuntimeError('SSH private key file not found at: {}'.format(
             ssh_private_key))
-    # iterate through all nodes
-    nodes = batch_client.compute_node.list(pool.id)
-    procs = {}
+    # execute on all nodes with a sliding window of ssh sessions
+    nodes = list(batch_client.compute_node.list(pool.id))
+    node_rls = batch.resolve_remote_login_settings(
+        batch_client, config, [node.id for node in nodes], pool_id=pool.id)
+    targets = [
+        (node.id, node_rls[node.id].remote_login_ip_address,
+         node_rls[node.id].remote_login_port)
+        for node in nodes
+    ]
     stdout = {}
     failures = False
-    for node in nodes:
-        rls = batch_client.compute_node.get_remote_login_settings(
-            pool.id, node.id)
-        procs[node.id] = crypto.connect_or_exec_ssh_command(
-            rls.remote_login_ip_address, rls.remote_login_port,
-            ssh_private_key, username, sync=False,
-            command=[
+    for result in crypto.fan_out_ssh_command(
+            targets, ssh_private_key, username,
+            [
                 'sudo', 'docker', 'images', '--format',
                 '"{{.ID}} {{.Repository}}:{{.Tag}}"'
-            ])
-        if len(procs) >= 40:
-            logger.debug('waiting for {} processes to complete'.format(
-                len(procs)))
-            for key in procs:
-                stdout[key] = procs[key].communicate()[0].decode(
-                    'utf8').split('\n')
-            rcs = util.subprocess_wait_all(list(procs.values()))
-            if any([x != 0 for x in rcs]):
-                failures = True
-            procs.clear()
-            del rcs
-    if len(procs) > 0:
-        logger.debug('waiting for {} processes to complete'.format(
-            len(procs)))
-        for key in procs:
-            stdout[key] = procs[key].communicate()[0].decode(
-                'utf8').split('\n')
-        rcs = util.subprocess_wait_all(list(procs.values()))
-        if any([x != 0 for x in rcs]):
+            ],
+            timeout=_SSH_IMAGE_LIST_TIMEOUT):
+        if result.returncode != 0:
+            logger.error(
+                'failed to retrieve docker images on node {} with return '
+                'code {}'.format(result.key, result.returncode))
             failures = True
-        procs.clear()
-        del rcs
+            continue
+        stdout[result.key] = (result.stdout or '').split('\n')
     if failures:
         raise RuntimeError(
             'failures retrieving docker images on pool: {}'.format(
@@ -2874,8 +3024,10 @@ def action_pool_nodes_reboot(
 
 def action_pool_images_update(
         batch_client, config, docker_image, docker_image_digest,
-        singularity_image, ssh):
-    # type: (batchsc.BatchServiceClient, dict, str, str, str, bool) -> None
+        singularity_image, ssh, relay=False, relay_seeds=None,
+        relay_fanout=None):
+    # type: (batchsc.BatchServiceClient, dict, str, str, str, bool, bool,
+    #        int, int) -> None
     """Action: Pool Images Update
     :param azure.batch.batch_service_client.BatchServiceClient batch_client:
         batch client
@@ -2884,6 +3036,9 @@ def action_pool_images_update(
     :param str docker_image_digest: docker image digest to update to
     :param str singularity_image: singularity image to update
     :param bool ssh: use direct SSH update mode
+    :param bool relay: relay Docker images between compute nodes
+    :param int relay_seeds: number of seed nodes pulling from registry
+    :param int relay_fanout: number of peers each node relays to per round
     """
     _check_batch_client(batch_client)
     if docker_image_digest is not None and docker_image is None:
@@ -2891,7 +3046,8 @@ def action_pool_images_update(
             'cannot specify a digest to update to without the image')
     _update_container_images(
         batch_client, config, docker_image, docker_image_digest,
-        singularity_image, force_ssh=ssh)
+        singularity_image, force_ssh=ssh, relay=relay,
+        relay_seeds=relay_seeds, relay_fanout=relay_fanout)
 
 
 def action_pool_images_list(batch_client, config):
@@ -3351,6 +3507,18 @@ def action_data_files_stream(batch_client, config, filespec, disk):
     batch.stream_file_and_wait_for_task(batch_client, config, filespec, disk)
 
 
+def action_data_files_tail(batch_client, config, filespec):
+    # type: (batchsc.BatchServiceClient, dict, str) -> None
+    """Action: Data Files Tail
+    :param azure.batch.batch_service_client.BatchServiceClient batch_client:
+        batch client
+    :param dict config: configuration dict
+    :param str filespec: filespec of files to tail
+    """
+    _check_batch_client(batch_client)
+    batch.tail_files_for_tasks(batch_client, config, filespec)
+
+
 def action_data_files_list(batch_client, config, jobid, taskid):
     # type: (batchsc.BatchServiceClient, dict, str, str) -> None
     """Action: Data Files List
@@ -3401,10 +3569,12 @@ def action_data_files_node(batch_client, config, all, nodeid):
 
 
 def action_data_ingress(
-        batch_client, compute_client, network_client, config, to_fs):
+        batch_client, compute_client, network_client, config, to_fs,
+        plan_only=False, relay=False, relay_fanout=None):
     # type: (batchsc.BatchServiceClient,
     #        azure.mgmt.compute.ComputeManagementClient,
-    #        azure.mgmt.network.NetworkManagementClient, dict, str) -> None
+    #        azure.mgmt.network.NetworkManagementClient, dict, str,
+    #        bool, bool, int) -> None
     """Action: Data Ingress
     :param azure.batch.batch_service_client.BatchServiceClient batch_client:
         batch client
@@ -3414,6 +3584,9 @@ def action_data_ingress(
         network client
     :param dict config: configuration dict
     :param str to_fs: ingress to remote filesystem
+    :param bool plan_only: only show transfer plans
+    :param bool relay: relay node destinations from one node to all nodes
+    :param int relay_fanout: number of nodes each node relays to per round
     """
     pool_total_vm_count = None
     if util.is_none_or_empty(to_fs):
@@ -3446,7 +3619,8 @@ def action_data_ingress(
                 'AAD credentials')
     storage_threads = data.ingress_data(
         batch_client, compute_client, network_client, config, rls=rls,
-        kind=kind, total_vm_count=pool_total_vm_count, to_fs=to_fs)
+        kind=kind, total_vm_count=pool_total_vm_count, to_fs=to_fs,
+        plan_only=plan_only, relay=relay, relay_fanout=relay_fanout)
     data.wait_for_storage_threads(storage_threads)
 
 
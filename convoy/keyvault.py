@@ -34,8 +34,6 @@ import json
 import logging
 import zlib
 # non-stdlib imports
-import azure.common.credentials
-import azure.keyvault
 import ruamel.yaml
 # local imports
 from . import settings
@@ -44,6 +42,9 @@ from . import util
 # create logger
 logger = logging.getLogger(__name__)
 util.setup_logger(logger)
+# the keyvault library is imported on first use as it is only required
+# when a keyvault is specified
+azurekeyvault = util.LazyModule('azure.keyvault')
 # global defines
 _SECRET_ENCODED_FORMAT_KEY = 'format'
 _SECRET_ENCODED_FORMAT_VALUE = 'zlib+base64'
@@ -136,7 +137,7 @@ def store_credentials_conf(client, config, keyvault_uri, secret_name):
     )
     logger.info('keyvault secret id for name {}: {}'.format(
         secret_name,
-        azure.keyvault.KeyVaultId.parse_secret_id(bundle.id).base_id))
+        azurekeyvault.KeyVaultId.parse_secret_id(bundle.id).base_id))
 
 
 def delete_secret(client, keyvault_uri, secret_name):
@@ -30,9 +30,12 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import collections
+import concurrent.futures
 import functools
 import json
 import logging
+import multiprocessing
 import os
 try:
     import pathlib2 as pathlib
@@ -41,7 +44,6 @@ except ImportError:
 import socket
 import struct
 # non-stdlib imports
-import azure.mgmt.network.models as networkmodels
 import msrestazure.azure_exceptions
 # local imports
 from . import crypto
@@ -53,6 +55,11 @@ from . import util
 # create logger
 logger = logging.getLogger(__name__)
 util.setup_logger(logger)
+# management models are imported on first use as importing them is
+# expensive and they are not required by every command
+networkmodels = util.LazyModule('azure.mgmt.network.models')
+# global defines
+_MAX_RESOLVER_WORKERS = min((multiprocessing.cpu_count() * 4, 32))
 
 
 def _create_managed_disk(compute_client, rfs, disk_name):
@@ -1395,11 +1402,12 @@ def expand_storage_cluster(
     logger.debug(
         'waiting for disks to attach to virtual machines and expanding '
         'the gluster volume, this may take a while')
+    targets = []
     for offset in async_ops:
         premium, op = async_ops[offset]
         vm = op.result()
         vms[offset]['vm'] = vm
-        # execute bootstrap script via ssh
+        # construct bootstrap script command
         script_cmd = \
             '/opt/batch-shipyard/{bsf} {a}{b}{d}{f}{m}{p}{r}{s}'.format(
                 bsf=bootstrap_file,
@@ -1419,22 +1427,21 @@ def expand_storage_cluster(
             compute_client, network_client, config, sc_id, None, vm.name)
         if settings.verbose(config):
             logger.debug('bootstrap command: {}'.format(script_cmd))
-        proc = crypto.connect_or_exec_ssh_command(
-            ip, port, ssh_priv_key, username, sync=False,
-            command=['sudo', script_cmd])
-        stdout, stderr = proc.communicate()
-        if util.is_not_empty(stdout):
-            stdout = stdout.decode('utf8')
-            if util.on_windows():
-                stdout = stdout.replace('\n', os.linesep)
-        if util.is_not_empty(stderr):
-            stderr = stderr.decode('utf8')
-            if util.on_windows():
-                stderr = stderr.replace('\n', os.linesep)
-        vms[offset]['status'] = proc.returncode
-        vms[offset]['stdout'] = '>>stdout>> {}:{}{}'.format(
+        targets.append((offset, ip, port, ['sudo', script_cmd]))
+    # execute bootstrap scripts via ssh on all vms concurrently
+    for result in crypto.fan_out_ssh_command(
+            targets, ssh_priv_key, username, None):
+        vm = vms[result.key]['vm']
+        stdout = result.stdout
+        stderr = result.stderr
+        if util.is_not_empty(stdout) and util.on_windows():
+            stdout = stdout.replace('\n', os.linesep)
+        if util.is_not_empty(stderr) and util.on_windows():
+            stderr = stderr.replace('\n', os.linesep)
+        vms[result.key]['status'] = result.returncode
+        vms[result.key]['stdout'] = '>>stdout>> {}:{}{}'.format(
             vm.name, os.linesep, stdout)
-        vms[offset]['stderr'] = '>>stderr>> {}:{}{}'.format(
+        vms[result.key]['stderr'] = '>>stderr>> {}:{}{}'.format(
             vm.name, os.linesep, stderr)
     logger.info('disk attach operations completed')
     succeeded = True
@@ -2072,6 +2079,210 @@ def start_storage_cluster(compute_client, config, sc_id, wait=False):
         logger.info('{} virtual machines started'.format(len(async_ops)))
 
 
+class StorageClusterResolver(object):
+    """Resolve virtual machines and their network interfaces and public ips
+    of a storage cluster concurrently. Lookups are cached for the lifetime
+    of the resolver, which is intended to be a single command."""
+    def __init__(self, compute_client, network_client, rfs):
+        # type: (StorageClusterResolver,
+        #        azure.mgmt.compute.ComputeManagementClient,
+        #        azure.mgmt.network.NetworkManagementClient,
+        #        settings.RemoteFsSettings) -> None
+        """Ctor for StorageClusterResolver
+        :param StorageClusterResolver self: this
+        :param azure.mgmt.compute.ComputeManagementClient compute_client:
+            compute client
+        :param azure.mgmt.network.NetworkManagementClient network_client:
+            network client
+        :param settings.RemoteFsSettings rfs: remote filesystem settings
+        """
+        self._compute_client = compute_client
+        self._network_client = network_client
+        self._sc = rfs.storage_cluster
+        # vm name -> (vm, nic, pip, has instance view)
+        self._cache = {}
+
+    def _get_virtual_machine(self, vm_name, instance_view):
+        # type: (StorageClusterResolver, str, bool) ->
+        #        computemodels.VirtualMachine
+        """Get a virtual machine
+        :param StorageClusterResolver self: this
+        :param str vm_name: vm name
+        :param bool instance_view: expand instance view
+        :rtype: computemodels.VirtualMachine
+        :return: vm or None if not found
+        """
+        kwargs = {}
+        if instance_view:
+            kwargs['expand'] = self._compute_client.virtual_machines.models.\
+                InstanceViewTypes.instance_view
+        try:
+            return self._compute_client.virtual_machines.get(
+                resource_group_name=self._sc.resource_group,
+                vm_name=vm_name,
+                **kwargs
+            )
+        except msrestazure.azure_exceptions.CloudError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    def _get_by_name(self, client, **kwargs):
+        # type: (StorageClusterResolver, object, dict) -> object
+        """Get a network resource by name
+        :param StorageClusterResolver self: this
+        :param object client: network client operations
+        :param dict kwargs: resource name arguments
+        :rtype: object
+        :return: resource or None if not found
+        """
+        try:
+            return client.get(
+                resource_group_name=self._sc.resource_group, **kwargs)
+        except msrestazure.azure_exceptions.CloudError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    def _resolve_network(self, vm, nic, pip):
+        # type: (StorageClusterResolver, computemodels.VirtualMachine,
+        #        networkmodels.NetworkInterface,
+        #        networkmodels.PublicIPAddress) ->
+        #        Tuple[networkmodels.NetworkInterface,
+        #        networkmodels.PublicIPAddress]
+        """Resolve the network interface and public ip of a virtual machine,
+        discarding resources retrieved by generated name which are not
+        attached to the virtual machine
+        :param StorageClusterResolver self: this
+        :param computemodels.VirtualMachine vm: vm
+        :param networkmodels.NetworkInterface nic: nic by generated name
+        :param networkmodels.PublicIPAddress pip: pip by generated name
+        :rtype: tuple
+        :return: (nic, pip)
+        """
+        nic_id = vm.network_profile.network_interfaces[0].id
+        if nic is None or nic.id.lower() != nic_id.lower():
+            nic = resource.get_nic_from_virtual_machine(
+                self._network_client, self._sc.resource_group, vm)
+        pip_ref = nic.ip_configurations[0].public_ip_address
+        if pip_ref is None:
+            return nic, None
+        if pip is None or pip.id.lower() != pip_ref.id.lower():
+            _, pip = resource.get_nic_and_pip_from_virtual_machine(
+                self._network_client, self._sc.resource_group, vm, nic=nic)
+        return nic, pip
+
+    def resolve(self, vm_names, instance_view=False):
+        # type: (StorageClusterResolver, List[str], bool) ->
+        #        collections.OrderedDict
+        """Resolve virtual machines with their network interfaces and
+        public ips. Virtual machines, network interfaces and public ips
+        are retrieved concurrently by their generated names, falling back
+        to lookups through the virtual machine if names do not match.
+        :param StorageClusterResolver self: this
+        :param list vm_names: vm names
+        :param bool instance_view: expand instance view of vms
+        :rtype: collections.OrderedDict
+        :return: ordered dict of vm name -> (vm, nic, pip), with None
+            in place of the tuple for vms which do not exist
+        """
+        pending = [
+            x for x in vm_names
+            if x not in self._cache or
+            (instance_view and not self._cache[x][3])
+        ]
+        if len(pending) > 0:
+            logger.debug('resolving {} virtual machines in {}'.format(
+                len(pending), self._sc.resource_group))
+            self._resolve(pending, instance_view)
+        ret = collections.OrderedDict()
+        for vm_name in vm_names:
+            entry = self._cache[vm_name]
+            ret[vm_name] = entry[:3] if entry[0] is not None else None
+        return ret
+
+    def _resolve(self, vm_names, instance_view):
+        # type: (StorageClusterResolver, List[str], bool) -> None
+        """Resolve and cache virtual machines
+        :param StorageClusterResolver self: this
+        :param list vm_names: vm names
+        :param bool instance_view: expand instance view of vms
+        """
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(
+                    (_MAX_RESOLVER_WORKERS, len(vm_names) * 3))) as executor:
+            futures = {}
+            for vm_name in vm_names:
+                futures[vm_name] = [
+                    executor.submit(
+                        self._get_virtual_machine, vm_name, instance_view),
+                ]
+                # network resources are named after the vm offset
+                try:
+                    offset = settings.get_offset_from_virtual_machine_name(
+                        vm_name)
+                except ValueError:
+                    continue
+                futures[vm_name].append(executor.submit(
+                    self._get_by_name,
+                    self._network_client.network_interfaces,
+                    network_interface_name=settings.
+                    generate_network_interface_name(self._sc, offset)))
+                if self._sc.public_ip.enabled:
+                    futures[vm_name].append(executor.submit(
+                        self._get_by_name,
+                        self._network_client.public_ip_addresses,
+                        public_ip_address_name=settings.
+                        generate_public_ip_name(self._sc, offset)))
+            results = {}
+            for vm_name in vm_names:
+                res = [x.result() for x in futures[vm_name]]
+                res.extend([None] * (3 - len(res)))
+                results[vm_name] = res
+            # resolve nics and pips not found by name through the vm
+            network = {}
+            for vm_name in vm_names:
+                vm, nic, pip = results[vm_name]
+                if vm is not None:
+                    network[vm_name] = executor.submit(
+                        self._resolve_network, vm, nic, pip)
+            for vm_name in vm_names:
+                vm = results[vm_name][0]
+                if vm is None:
+                    self._cache[vm_name] = (None, None, None, instance_view)
+                else:
+                    nic, pip = network[vm_name].result()
+                    self._cache[vm_name] = (vm, nic, pip, instance_view)
+
+    def resolve_cluster(self, instance_view=False):
+        # type: (StorageClusterResolver, bool) -> collections.OrderedDict
+        """Resolve all virtual machines of the storage cluster
+        :param StorageClusterResolver self: this
+        :param bool instance_view: expand instance view of vms
+        :rtype: collections.OrderedDict
+        :return: ordered dict of vm name -> (vm, nic, pip), with None
+            in place of the tuple for vms which do not exist
+        """
+        return self.resolve(
+            [settings.generate_virtual_machine_name(self._sc, i)
+             for i in range(self._sc.vm_count)],
+            instance_view=instance_view)
+
+    def get_ip_address(self, nic, pip):
+        # type: (StorageClusterResolver, networkmodels.NetworkInterface,
+        #        networkmodels.PublicIPAddress) -> str
+        """Get the ip address to connect to a virtual machine
+        :param StorageClusterResolver self: this
+        :param networkmodels.NetworkInterface nic: network interface
+        :param networkmodels.PublicIPAddress pip: public ip
+        :rtype: str
+        :return: ip address
+        """
+        if self._sc.public_ip.enabled:
+            return pip.ip_address
+        return nic.ip_configurations[0].private_ip_address
+
+
 def stat_storage_cluster(
         compute_client, network_client, config, sc_id, status_script,
         detail=False, hosts=False):
@@ -2093,25 +2304,15 @@ def stat_storage_cluster(
     if util.is_none_or_empty(sc_id):
         raise ValueError('storage cluster id not specified')
     rfs = settings.remotefs_settings(config, sc_id)
-    # retrieve all vms
+    # retrieve all vms with their nics and pips
+    resolver = StorageClusterResolver(compute_client, network_client, rfs)
     vms = []
-    for i in range(rfs.storage_cluster.vm_count):
-        vm_name = settings.generate_virtual_machine_name(
-            rfs.storage_cluster, i)
-        try:
-            vm = compute_client.virtual_machines.get(
-                resource_group_name=rfs.storage_cluster.resource_group,
-                vm_name=vm_name,
-                expand=compute_client.virtual_machines.models.
-                InstanceViewTypes.instance_view,
-            )
-        except msrestazure.azure_exceptions.CloudError as e:
-            if e.status_code == 404:
-                logger.error('virtual machine {} not found'.format(vm_name))
-            else:
-                raise
+    for vm_name, entry in resolver.resolve_cluster(
+            instance_view=True).items():
+        if entry is None:
+            logger.error('virtual machine {} not found'.format(vm_name))
         else:
-            vms.append((vm, i))
+            vms.append(entry)
     if len(vms) == 0:
         logger.error(
             'no virtual machines to query for storage cluster {}'.format(
@@ -2120,7 +2321,7 @@ def stat_storage_cluster(
     # fetch vm status
     fsstatus = []
     vmstatus = {}
-    for vm, offset in vms:
+    for vm, nic, pip in vms:
         powerstate = None
         for status in vm.instance_view.statuses:
             if status.code.startswith('PowerState'):
@@ -2130,9 +2331,6 @@ def stat_storage_cluster(
             for disk in vm.instance_view.disks:
                 for status in disk.statuses:
                     diskstates.append(status.code)
-        # get nic/pip connected to vm
-        nic, pip = resource.get_nic_and_pip_from_virtual_machine(
-            network_client, rfs.storage_cluster.resource_group, vm)
         # get resource names (pass cached data to prevent another lookup)
         _, _, subnet, vnet, nsg = _get_resource_names_from_virtual_machine(
             compute_client, network_client, rfs, vm, nic=nic, pip=pip)
@@ -2152,7 +2350,7 @@ def stat_storage_cluster(
         if detail:
             ssh_priv_key, port, username, ip = _get_ssh_info(
                 compute_client, network_client, config, sc_id, None, vm.name,
-                nic=nic, pip=pip)
+                resolver=resolver)
             offset = settings.get_offset_from_virtual_machine_name(vm.name)
             script_cmd = '/opt/batch-shipyard/{sf} {c}{f}{m}{n}{r}{s}'.format(
                 sf=status_script,
@@ -2233,11 +2431,10 @@ def stat_storage_cluster(
 
 def _get_ssh_info(
         compute_client, network_client, config, sc_id, cardinal, hostname,
-        nic=None, pip=None):
+        resolver=None):
     # type: (azure.mgmt.compute.ComputeManagementClient,
     #        azure.mgmt.network.NetworkManagementClient, dict, str, int,
-    #        str, networkmodes.NetworkInterface,
-    #        networkmodels.PublicIPAddress) ->
+    #        str, StorageClusterResolver) ->
     #        Tuple[pathlib.Path, int, str, str]
     """SSH to a node in storage cluster
     :param azure.mgmt.compute.ComputeManagementClient compute_client:
@@ -2248,8 +2445,7 @@ def _get_ssh_info(
     :param str sc_id: storage cluster id
     :param int cardinal: cardinal number
     :param str hostname: hostname
-    :param networkmodels.NetworkInterface nic: network interface
-    :param networkmodels.PublicIPAddress pip: public ip
+    :param StorageClusterResolver resolver: storage cluster resolver
     :rtype: tuple
     :return (ssh private key, port, username, ip)
     """
@@ -2263,28 +2459,14 @@ def _get_ssh_info(
             rfs.storage_cluster, cardinal)
     else:
         vm_name = hostname
-    try:
-        vm = compute_client.virtual_machines.get(
-            resource_group_name=rfs.storage_cluster.resource_group,
-            vm_name=vm_name,
-        )
-    except msrestazure.azure_exceptions.CloudError as e:
-        if e.status_code == 404:
-            raise RuntimeError('virtual machine {} not found'.format(vm_name))
-        else:
-            raise
+    if resolver is None:
+        resolver = StorageClusterResolver(compute_client, network_client, rfs)
+    entry = resolver.resolve([vm_name])[vm_name]
+    if entry is None:
+        raise RuntimeError('virtual machine {} not found'.format(vm_name))
+    vm, nic, pip = entry
     # get connection ip
-    if rfs.storage_cluster.public_ip.enabled:
-        # get pip connected to vm
-        if pip is None:
-            _, pip = resource.get_nic_and_pip_from_virtual_machine(
-                network_client, rfs.storage_cluster.resource_group, vm)
-        ip_address = pip.ip_address
-    else:
-        if nic is None:
-            nic, _ = resource.get_nic_and_pip_from_virtual_machine(
-                network_client, rfs.storage_cluster.resource_group, vm)
-        ip_address = nic.ip_configurations[0].private_ip_address
+    ip_address = resolver.get_ip_address(nic, pip)
     # return connection info for vm
     if rfs.storage_cluster.ssh.ssh_private_key is not None:
         ssh_priv_key = rfs.storage_cluster.ssh.ssh_private_key
@@ -35,8 +35,6 @@ import logging
 import random
 import time
 # non-stdlib imports
-import azure.mgmt.network.models as networkmodels
-import azure.mgmt.resource.resources.models as rgmodels
 import msrest.exceptions
 import msrestazure.azure_exceptions
 # local imports
@@ -45,6 +43,10 @@ from . import util
 # create logger
 logger = logging.getLogger(__name__)
 util.setup_logger(logger)
+# management models are imported on first use as importing them is
+# expensive and they are not required by every command
+networkmodels = util.LazyModule('azure.mgmt.network.models')
+rgmodels = util.LazyModule('azure.mgmt.resource.resources.models')
 
 
 class AsyncOperation(object):
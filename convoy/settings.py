@@ -180,6 +180,7 @@ SSHSettings = collections.namedtuple(
         'username', 'expiry_days', 'ssh_public_key', 'ssh_public_key_data',
         'ssh_private_key', 'generate_docker_tunnel_script',
         'generated_file_export_path', 'hpn_server_swap',
+        'cache_remote_login_settings',
     ]
 )
 RDPSettings = collections.namedtuple(
@@ -248,7 +249,13 @@ DataTransferSettings = collections.namedtuple(
         'method', 'ssh_private_key', 'scp_ssh_extra_options',
         'rsync_extra_options', 'split_files_megabytes',
         'max_parallel_transfers_per_node', 'is_file_share',
-        'remote_path', 'blobxfer_extra_options',
+        'remote_path', 'blobxfer_extra_options', 'tar_batch_megabytes',
+        'tar_batch_files', 'compression', 'incremental', 'delete_removed',
+    ]
+)
+DataTransferCompressionSettings = collections.namedtuple(
+    'DataTransferCompressionSettings', [
+        'codec', 'level', 'threads', 'auto',
     ]
 )
 JobScheduleSettings = collections.namedtuple(
@@ -289,6 +296,16 @@ TaskSettings = collections.namedtuple(
         'multi_instance',
     ]
 )
+TaskContextSettings = collections.namedtuple(
+    'TaskContextSettings', [
+        'pool_id', 'vm_size', 'native', 'is_windows', 'is_custom_image',
+        'publisher', 'offer', 'node_agent', 'inter_node_comm', 'is_gpu_pool',
+        'is_rdma_pool', 'remove_container_after_exit', 'shm_size',
+        'user_identity_option', 'data_volumes', 'data_volume_binds',
+        'shared_data_volumes', 'shared_data_volume_binds', 'retention_time',
+        'gpu', 'infiniband',
+    ]
+)
 MultiInstanceSettings = collections.namedtuple(
     'MultiInstanceSettings', [
         'num_instances', 'coordination_command', 'resource_files',
@@ -943,6 +960,7 @@ def pool_settings(config):
         ssh_gen_docker_tunnel = None
         ssh_gen_file_path = '.'
         ssh_hpn = None
+        ssh_cache_rls = False
     else:
         ssh_expiry_days = _kv_read(sshconf, 'expiry_days', 30)
         if ssh_expiry_days <= 0:
@@ -969,6 +987,8 @@ def pool_settings(config):
         ssh_gen_file_path = _kv_read_checked(
             sshconf, 'generated_file_export_path', '.')
         ssh_hpn = _kv_read(sshconf, 'hpn_server_swap', False)
+        ssh_cache_rls = _kv_read(
+            sshconf, 'cache_remote_login_settings', False)
     # rdp settings
     try:
         rdpconf = conf['rdp']
@@ -1019,6 +1039,7 @@ def pool_settings(config):
             generate_docker_tunnel_script=ssh_gen_docker_tunnel,
             generated_file_export_path=ssh_gen_file_path,
             hpn_server_swap=ssh_hpn,
+            cache_remote_login_settings=ssh_cache_rls,
         ),
         rdp=RDPSettings(
             username=rdp_username,
@@ -1970,6 +1991,44 @@ def files_destination_settings(fdict):
             split <<= 20
     except KeyError:
         split = None
+    # tar batch limits: convert megabytes to bytes
+    tar_batch_mb = _kv_read(data_transfer, 'tar_batch_megabytes')
+    if tar_batch_mb is None or tar_batch_mb <= 0:
+        tar_batch_mb = 64
+    tar_batch_files = _kv_read(data_transfer, 'tar_batch_files')
+    if tar_batch_files is None or tar_batch_files <= 0:
+        tar_batch_files = 4096
+    compression = _kv_read_checked(data_transfer, 'compression')
+    if compression is not None:
+        codec = _kv_read_checked(compression, 'codec', default='zstd').lower()
+        if codec not in ('lz4', 'zstd'):
+            raise ValueError(
+                'invalid compression codec {} for data transfer of source: '
+                '{}'.format(codec, files_source_settings(fdict).path))
+        max_level = 19 if codec == 'zstd' else 12
+        level = _kv_read(compression, 'level')
+        if level is None:
+            level = 3 if codec == 'zstd' else 1
+        elif level < 1 or level > max_level:
+            raise ValueError(
+                'invalid {} compression level {} for data transfer of '
+                'source: {}, must be between 1 and {}'.format(
+                    codec, level, files_source_settings(fdict).path,
+                    max_level))
+        threads = _kv_read(compression, 'threads')
+        if threads is None:
+            threads = 1
+        elif threads < 0:
+            raise ValueError(
+                'invalid compression threads {} for data transfer of '
+                'source: {}'.format(
+                    threads, files_source_settings(fdict).path))
+        compression = DataTransferCompressionSettings(
+            codec=codec,
+            level=level,
+            threads=threads,
+            auto=_kv_read(compression, 'auto', default=False),
+        )
     ssh_private_key = _kv_read_checked(data_transfer, 'ssh_private_key')
     if util.is_not_empty(ssh_private_key):
         ssh_private_key = pathlib.Path(ssh_private_key)
@@ -1987,6 +2046,12 @@ def files_destination_settings(fdict):
             rsync_extra_options=rsync_eo,
             split_files_megabytes=split,
             max_parallel_transfers_per_node=mpt,
+            tar_batch_megabytes=tar_batch_mb << 20,
+            tar_batch_files=tar_batch_files,
+            compression=compression,
+            incremental=_kv_read(data_transfer, 'incremental', default=False),
+            delete_removed=_kv_read(
+                data_transfer, 'delete_removed', default=False),
         )
     )
 
@@ -2753,43 +2818,86 @@ def set_task_id(conf, id):
     conf['id'] = id
 
 
-def task_settings(cloud_pool, config, poolconf, jobspec, conf):
-    # type: (azure.batch.models.CloudPool, dict, PoolSettings, dict,
-    #        dict) -> TaskSettings
-    """Get task settings
+def _data_volume_bind(dv, dvkey):
+    # type: (dict, str) -> str
+    """Get bind specification of a data volume
+    :param dict dv: data volumes
+    :param str dvkey: data volume key
+    :rtype: str
+    :return: bind specification without the bind parameter
+    """
+    try:
+        hostpath = _kv_read_checked(dv[dvkey], 'host_path')
+    except KeyError:
+        raise ValueError(
+            ('ensure that the {} data volume exists in the '
+             'global configuration').format(dvkey))
+    bindopt = _kv_read_checked(dv[dvkey], 'bind_options', default='')
+    if util.is_not_empty(bindopt):
+        bindopt = ':{}'.format(bindopt)
+    if util.is_not_empty(hostpath):
+        return '{}:{}{}'.format(
+            hostpath, dv[dvkey]['container_path'], bindopt)
+    elif util.is_not_empty(bindopt):
+        return '{cp}:{cp}{bo}'.format(
+            cp=dv[dvkey]['container_path'], bo=bindopt)
+    else:
+        return dv[dvkey]['container_path']
+
+
+def _shared_data_volume_bind(config, sdv, sdvkey, is_windows):
+    # type: (dict, dict, str, bool) -> str
+    """Get bind specification of a shared data volume
+    :param dict config: configuration dict
+    :param dict sdv: shared data volumes
+    :param str sdvkey: shared data volume key
+    :param bool is_windows: is windows pool
+    :rtype: str
+    :return: bind specification without the bind parameter
+    """
+    try:
+        bindopt = _kv_read_checked(sdv[sdvkey], 'bind_options', default='')
+    except KeyError:
+        raise ValueError(
+            ('ensure that the {} shared data volume exists in the '
+             'global configuration').format(sdvkey))
+    if util.is_not_empty(bindopt):
+        bindopt = ':{}'.format(bindopt)
+    if is_shared_data_volume_gluster_on_compute(sdv, sdvkey):
+        hmp = '{}/{}'.format(_HOST_MOUNTS_DIR, get_gluster_on_compute_volume())
+    elif is_shared_data_volume_storage_cluster(sdv, sdvkey):
+        hmp = '{}/{}'.format(_HOST_MOUNTS_DIR, sdvkey)
+    elif is_shared_data_volume_azure_blob(sdv, sdvkey):
+        sa = credentials_storage(
+            config, azure_storage_account_settings(sdv, sdvkey))
+        cont_name = azure_blob_container_name(sdv, sdvkey)
+        hmp = azure_blob_host_mount_path(sa.account, cont_name)
+    elif is_shared_data_volume_azure_file(sdv, sdvkey):
+        sa = credentials_storage(
+            config, azure_storage_account_settings(sdv, sdvkey))
+        share_name = azure_file_share_name(sdv, sdvkey)
+        hmp = azure_file_host_mount_path(sa.account, share_name, is_windows)
+    else:
+        raise RuntimeError(
+            'unknown shared data volume type: {}'.format(sdvkey))
+    return '{}:{}{}'.format(
+        hmp, shared_data_volume_container_path(sdv, sdvkey), bindopt)
+
+
+def task_context_settings(cloud_pool, config, poolconf, jobspec):
+    # type: (azure.batch.models.CloudPool, dict, PoolSettings,
+    #        dict) -> TaskContextSettings
+    """Get pool and job settings which are common to all tasks of a job.
+    This should be retrieved once per job and passed to task_settings.
     :param azure.batch.models.CloudPool cloud_pool: cloud pool object
     :param dict config: configuration dict
     :param PoolSettings poolconf: pool settings
     :param dict jobspec: job specification
-    :param dict conf: task configuration object
-    :rtype: TaskSettings
-    :return: task settings
+    :rtype: TaskContextSettings
+    :return: task context settings
     """
     native = is_native_docker_pool(config, vm_config=poolconf.vm_configuration)
     is_windows = is_windows_pool(config, vm_config=poolconf.vm_configuration)
-    # id must be populated by the time this function is invoked
-    task_id = conf['id']
-    if util.is_none_or_empty(task_id):
-        raise ValueError('task id is invalid')
-    # check task id length
-    if len(task_id) > 64:
-        raise ValueError('task id exceeds 64 characters')
-    docker_image = task_docker_image(conf)
-    singularity_image = _kv_read_checked(conf, 'singularity_image')
-    if (util.is_none_or_empty(docker_image) and
-            util.is_none_or_empty(singularity_image)):
-        raise ValueError('Container image is unspecified or invalid')
-    if (util.is_not_empty(docker_image) and
-            util.is_not_empty(singularity_image)):
-        raise ValueError(
-            'Cannot specify both a Docker and Singularity image for a task')
-    if util.is_not_empty(singularity_image) and native:
-        raise ValueError(
-            'Cannot run Singularity containers on native container '
-            'support pools')
-    if is_windows and util.is_not_empty(singularity_image):
-        raise ValueError(
-            'Cannot run Singularity containers on windows pools')
     # get some pool props
     publisher = None
     offer = None
@@ -2820,6 +2928,129 @@ def task_settings(cloud_pool, config, poolconf, jobspec, conf):
                 image_reference.publisher.lower()
             offer = cloud_pool.virtual_machine_configuration.\
                 image_reference.offer.lower()
+    # get user identity settings
+    uiopt = None
+    if not is_windows:
+        ui = _kv_read_checked(jobspec, 'user_identity', {})
+        ui_default_pool_admin = _kv_read(ui, 'default_pool_admin', False)
+        ui_specific = _kv_read(ui, 'specific_user', {})
+        ui_specific_uid = _kv_read(ui_specific, 'uid')
+        ui_specific_gid = _kv_read(ui_specific, 'gid')
+        del ui
+        del ui_specific
+        if ui_default_pool_admin and ui_specific_uid is not None:
+            raise ValueError(
+                'cannot specify both default_pool_admin and '
+                'specific_user:uid/gid at the same time')
+        ui = UserIdentitySettings(
+            default_pool_admin=ui_default_pool_admin,
+            specific_user_uid=ui_specific_uid,
+            specific_user_gid=ui_specific_gid,
+        )
+        if ui.default_pool_admin:
+            # run as the default pool admin user. note that this is
+            # *undocumented* behavior and may break at anytime
+            uiopt = '-u `id -u _azbatch`:`id -g _azbatch`'
+        elif ui.specific_user_uid is not None:
+            if ui.specific_user_gid is None:
+                raise ValueError(
+                    'cannot specify a user identity uid without a gid')
+            uiopt = '-u {}:{}'.format(
+                ui.specific_user_uid, ui.specific_user_gid)
+        del ui
+    # get data volumes
+    data_volumes = tuple(
+        _kv_read_checked(jobspec, 'data_volumes', default=None) or ())
+    if util.is_not_empty(data_volumes):
+        dv = global_resources_data_volumes(config)
+        data_volume_binds = tuple(
+            [_data_volume_bind(dv, dvkey) for dvkey in data_volumes])
+        del dv
+    else:
+        data_volume_binds = ()
+    shared_data_volumes = tuple(
+        _kv_read_checked(jobspec, 'shared_data_volumes', default=None) or ())
+    if util.is_not_empty(shared_data_volumes):
+        sdv = global_resources_shared_data_volumes(config)
+        shared_data_volume_binds = tuple([
+            _shared_data_volume_bind(config, sdv, sdvkey, is_windows)
+            for sdvkey in shared_data_volumes])
+        del sdv
+    else:
+        shared_data_volume_binds = ()
+    # constraints
+    retention_time = _kv_read_checked(jobspec, 'retention_time')
+    if util.is_not_empty(retention_time):
+        retention_time = util.convert_string_to_timedelta(retention_time)
+    return TaskContextSettings(
+        pool_id=pool_id,
+        vm_size=vm_size,
+        native=native,
+        is_windows=is_windows,
+        is_custom_image=is_custom_image,
+        publisher=publisher,
+        offer=offer,
+        node_agent=node_agent,
+        inter_node_comm=inter_node_comm,
+        is_gpu_pool=is_gpu_pool(vm_size),
+        is_rdma_pool=is_rdma_pool(vm_size),
+        remove_container_after_exit=_kv_read(
+            jobspec, 'remove_container_after_exit', default=True),
+        shm_size=_kv_read_checked(jobspec, 'shm_size'),
+        user_identity_option=uiopt,
+        data_volumes=data_volumes,
+        data_volume_binds=data_volume_binds,
+        shared_data_volumes=shared_data_volumes,
+        shared_data_volume_binds=shared_data_volume_binds,
+        retention_time=retention_time,
+        gpu=_kv_read(jobspec, 'gpu'),
+        infiniband=_kv_read(jobspec, 'infiniband'),
+    )
+
+
+def task_settings(cloud_pool, config, poolconf, jobspec, conf, context=None):
+    # type: (azure.batch.models.CloudPool, dict, PoolSettings, dict,
+    #        dict, TaskContextSettings) -> TaskSettings
+    """Get task settings
+    :param azure.batch.models.CloudPool cloud_pool: cloud pool object
+    :param dict config: configuration dict
+    :param PoolSettings poolconf: pool settings
+    :param dict jobspec: job specification
+    :param dict conf: task configuration object
+    :param TaskContextSettings context: task context settings of the job
+    :rtype: TaskSettings
+    :return: task settings
+    """
+    if context is None:
+        context = task_context_settings(cloud_pool, config, poolconf, jobspec)
+    native = context.native
+    is_windows = context.is_windows
+    pool_id = context.pool_id
+    vm_size = context.vm_size
+    inter_node_comm = context.inter_node_comm
+    # id must be populated by the time this function is invoked
+    task_id = conf['id']
+    if util.is_none_or_empty(task_id):
+        raise ValueError('task id is invalid')
+    # check task id length
+    if len(task_id) > 64:
+        raise ValueError('task id exceeds 64 characters')
+    docker_image = task_docker_image(conf)
+    singularity_image = _kv_read_checked(conf, 'singularity_image')
+    if (util.is_none_or_empty(docker_image) and
+            util.is_none_or_empty(singularity_image)):
+        raise ValueError('Container image is unspecified or invalid')
+    if (util.is_not_empty(docker_image) and
+            util.is_not_empty(singularity_image)):
+        raise ValueError(
+            'Cannot specify both a Docker and Singularity image for a task')
+    if util.is_not_empty(singularity_image) and native:
+        raise ValueError(
+            'Cannot run Singularity containers on native container '
+            'support pools')
+    if is_windows and util.is_not_empty(singularity_image):
+        raise ValueError(
+            'Cannot run Singularity containers on windows pools')
     # get depends on
     try:
         depends_on = conf['depends_on']
@@ -2887,16 +3118,12 @@ def task_settings(cloud_pool, config, poolconf, jobspec, conf):
         # parse remove container option
         rm_container = _kv_read(conf, 'remove_container_after_exit')
         if rm_container is None:
-            rm_container = _kv_read(
-                jobspec, 'remove_container_after_exit', default=True)
+            rm_container = context.remove_container_after_exit
         if rm_container and '--rm' not in run_opts:
             run_opts.append('--rm')
         del rm_container
         # parse /dev/shm option
-        shm_size = (
-            _kv_read(conf, 'shm_size') or
-            _kv_read_checked(jobspec, 'shm_size')
-        )
+        shm_size = _kv_read(conf, 'shm_size') or context.shm_size
         if (util.is_not_empty(shm_size) and
                 not any(x.startswith('--shm-size=') for x in run_opts)):
             run_opts.append('--shm-size={}'.format(shm_size))
@@ -2924,62 +3151,26 @@ def task_settings(cloud_pool, config, poolconf, jobspec, conf):
         if util.is_not_empty(entrypoint):
             run_opts.append('--entrypoint {}'.format(entrypoint))
         del entrypoint
-        # get user identity settings
-        if not is_windows:
-            ui = _kv_read_checked(jobspec, 'user_identity', {})
-            ui_default_pool_admin = _kv_read(ui, 'default_pool_admin', False)
-            ui_specific = _kv_read(ui, 'specific_user', {})
-            ui_specific_uid = _kv_read(ui_specific, 'uid')
-            ui_specific_gid = _kv_read(ui_specific, 'gid')
-            del ui
-            del ui_specific
-            if ui_default_pool_admin and ui_specific_uid is not None:
-                raise ValueError(
-                    'cannot specify both default_pool_admin and '
-                    'specific_user:uid/gid at the same time')
-            ui = UserIdentitySettings(
-                default_pool_admin=ui_default_pool_admin,
-                specific_user_uid=ui_specific_uid,
-                specific_user_gid=ui_specific_gid,
-            )
-            # append user identity options
-            uiopt = None
-            attach_ui = False
-            if ui.default_pool_admin:
-                # run as the default pool admin user. note that this is
-                # *undocumented* behavior and may break at anytime
-                uiopt = '-u `id -u _azbatch`:`id -g _azbatch`'
-                attach_ui = True
-            elif ui.specific_user_uid is not None:
-                if ui.specific_user_gid is None:
-                    raise ValueError(
-                        'cannot specify a user identity uid without a gid')
-                uiopt = '-u {}:{}'.format(
-                    ui.specific_user_uid, ui.specific_user_gid)
-                attach_ui = True
-            if util.is_not_empty(uiopt):
-                run_opts.append(uiopt)
-                docker_exec_options.append(uiopt)
-            if attach_ui:
-                run_opts.append('-v /etc/passwd:/etc/passwd:ro')
-                run_opts.append('-v /etc/group:/etc/group:ro')
-                run_opts.append('-v /etc/sudoers:/etc/sudoers:ro')
-            del attach_ui
-            del ui
-            del uiopt
+        # append user identity options
+        if util.is_not_empty(context.user_identity_option):
+            run_opts.append(context.user_identity_option)
+            docker_exec_options.append(context.user_identity_option)
+            run_opts.append('-v /etc/passwd:/etc/passwd:ro')
+            run_opts.append('-v /etc/group:/etc/group:ro')
+            run_opts.append('-v /etc/sudoers:/etc/sudoers:ro')
     # get command
     command = _kv_read_checked(conf, 'command')
     # parse data volumes
-    data_volumes = _kv_read_checked(jobspec, 'data_volumes')
+    data_volume_binds = list(context.data_volume_binds)
     tdv = _kv_read_checked(conf, 'data_volumes')
     if util.is_not_empty(tdv):
-        if util.is_not_empty(data_volumes):
-            # check for intersection
-            if len(set(data_volumes).intersection(set(tdv))) > 0:
-                raise ValueError('data volumes must be unique')
-            data_volumes.extend(tdv)
-        else:
-            data_volumes = tdv
+        # check for intersection
+        if len(set(context.data_volumes).intersection(set(tdv))) > 0:
+            raise ValueError('data volumes must be unique')
+        dv = global_resources_data_volumes(config)
+        data_volume_binds.extend(
+            [_data_volume_bind(dv, dvkey) for dvkey in tdv])
+        del dv
     del tdv
     # binding order matters for Singularity
     bindparm = '-v' if util.is_not_empty(docker_image) else '-B'
@@ -3005,95 +3196,26 @@ def task_settings(cloud_pool, config, poolconf, jobspec, conf):
         else:
             if not any(x.startswith('--pwd ') for x in run_opts):
                 run_opts.append('--pwd $AZ_BATCH_TASK_WORKING_DIR')
-    if util.is_not_empty(data_volumes):
-        dv = global_resources_data_volumes(config)
-        for dvkey in data_volumes:
-            try:
-                hostpath = _kv_read_checked(dv[dvkey], 'host_path')
-            except KeyError:
-                raise ValueError(
-                    ('ensure that the {} data volume exists in the '
-                     'global configuration').format(dvkey))
-            bindopt = _kv_read_checked(dv[dvkey], 'bind_options', default='')
-            if util.is_not_empty(bindopt):
-                bindopt = ':{}'.format(bindopt)
-            if util.is_not_empty(hostpath):
-                run_opts.append('{} {}:{}{}'.format(
-                    bindparm, hostpath, dv[dvkey]['container_path'], bindopt))
-            else:
-                if util.is_not_empty(bindopt):
-                    run_opts.append('{bp} {cp}:{cp}{bo}'.format(
-                        bp=bindparm, cp=dv[dvkey]['container_path'],
-                        bo=bindopt))
-                else:
-                    run_opts.append('{} {}'.format(
-                        bindparm, dv[dvkey]['container_path']))
-    del data_volumes
+    for bind in data_volume_binds:
+        run_opts.append('{} {}'.format(bindparm, bind))
+    del data_volume_binds
     # parse shared data volumes
-    shared_data_volumes = _kv_read_checked(jobspec, 'shared_data_volumes')
+    shared_data_volume_binds = list(context.shared_data_volume_binds)
     tsdv = _kv_read_checked(conf, 'shared_data_volumes')
     if util.is_not_empty(tsdv):
-        if util.is_not_empty(shared_data_volumes):
-            # check for intersection
-            if len(set(shared_data_volumes).intersection(set(tsdv))) > 0:
-                raise ValueError('shared data volumes must be unique')
-            shared_data_volumes.extend(tsdv)
-        else:
-            shared_data_volumes = tsdv
-    del tsdv
-    if util.is_not_empty(shared_data_volumes):
+        # check for intersection
+        if len(set(context.shared_data_volumes).intersection(
+                set(tsdv))) > 0:
+            raise ValueError('shared data volumes must be unique')
         sdv = global_resources_shared_data_volumes(config)
-        for sdvkey in shared_data_volumes:
-            try:
-                bindopt = _kv_read_checked(
-                    sdv[sdvkey], 'bind_options', default='')
-            except KeyError:
-                raise ValueError(
-                    ('ensure that the {} shared data volume exists in the '
-                     'global configuration').format(sdvkey))
-            if util.is_not_empty(bindopt):
-                bindopt = ':{}'.format(bindopt)
-            if is_shared_data_volume_gluster_on_compute(sdv, sdvkey):
-                run_opts.append('{} {}/{}:{}{}'.format(
-                    bindparm,
-                    _HOST_MOUNTS_DIR,
-                    get_gluster_on_compute_volume(),
-                    shared_data_volume_container_path(sdv, sdvkey),
-                    bindopt))
-            elif is_shared_data_volume_storage_cluster(sdv, sdvkey):
-                run_opts.append('{} {}/{}:{}{}'.format(
-                    bindparm,
-                    _HOST_MOUNTS_DIR,
-                    sdvkey,
-                    shared_data_volume_container_path(sdv, sdvkey),
-                    bindopt))
-            elif is_shared_data_volume_azure_blob(sdv, sdvkey):
-                sa = credentials_storage(
-                    config,
-                    azure_storage_account_settings(sdv, sdvkey))
-                cont_name = azure_blob_container_name(sdv, sdvkey)
-                hmp = azure_blob_host_mount_path(sa.account, cont_name)
-                run_opts.append('{} {}:{}{}'.format(
-                    bindparm,
-                    hmp,
-                    shared_data_volume_container_path(sdv, sdvkey),
-                    bindopt))
-            elif is_shared_data_volume_azure_file(sdv, sdvkey):
-                sa = credentials_storage(
-                    config,
-                    azure_storage_account_settings(sdv, sdvkey))
-                share_name = azure_file_share_name(sdv, sdvkey)
-                hmp = azure_file_host_mount_path(
-                    sa.account, share_name, is_windows)
-                run_opts.append('{} {}:{}{}'.format(
-                    bindparm,
-                    hmp,
-                    shared_data_volume_container_path(sdv, sdvkey),
-                    bindopt))
-            else:
-                raise RuntimeError(
-                    'unknown shared data volume type: {}'.format(sdvkey))
-    del shared_data_volumes
+        shared_data_volume_binds.extend([
+            _shared_data_volume_bind(config, sdv, sdvkey, is_windows)
+            for sdvkey in tsdv])
+        del sdv
+    del tsdv
+    for bind in shared_data_volume_binds:
+        run_opts.append('{} {}'.format(bindparm, bind))
+    del shared_data_volume_binds
     # env vars
     env_vars = _kv_read_checked(conf, 'environment_variables', default={})
     ev_secid = _kv_read_checked(
@@ -3103,25 +3225,24 @@ def task_settings(cloud_pool, config, poolconf, jobspec, conf):
     max_wall_time = _kv_read_checked(conf, 'max_wall_time')
     if util.is_not_empty(max_wall_time):
         max_wall_time = util.convert_string_to_timedelta(max_wall_time)
-    retention_time = (
-        _kv_read_checked(conf, 'retention_time') or
-        _kv_read_checked(jobspec, 'retention_time')
-    )
+    retention_time = _kv_read_checked(conf, 'retention_time')
     if util.is_not_empty(retention_time):
         retention_time = util.convert_string_to_timedelta(retention_time)
+    else:
+        retention_time = context.retention_time
     # gpu
     gpu = _kv_read(conf, 'gpu')
     if gpu is None:
-        gpu = _kv_read(jobspec, 'gpu')
+        gpu = context.gpu
     # if not specified check for gpu pool and implicitly enable
     if gpu is None:
-        if is_gpu_pool(vm_size) and not is_windows:
+        if context.is_gpu_pool and not is_windows:
             gpu = True
         else:
             gpu = False
     # adjust for gpu settings
     if gpu:
-        if not is_gpu_pool(vm_size):
+        if not context.is_gpu_pool:
             raise RuntimeError(
                 ('cannot initialize a gpu task on nodes without '
                  'gpus: pool={} vm_size={}').format(pool_id, vm_size))
@@ -3137,10 +3258,10 @@ def task_settings(cloud_pool, config, poolconf, jobspec, conf):
     # infiniband
     infiniband = _kv_read(conf, 'infiniband')
     if infiniband is None:
-        _kv_read(jobspec, 'infiniband')
+        infiniband = context.infiniband
     # if not specified, check for rdma pool and implicitly enable
     if infiniband is None:
-        if is_rdma_pool(vm_size) and inter_node_comm and not is_windows:
+        if context.is_rdma_pool and inter_node_comm and not is_windows:
             infiniband = True
         else:
             infiniband = False
@@ -3151,7 +3272,7 @@ def task_settings(cloud_pool, config, poolconf, jobspec, conf):
                 ('cannot initialize an infiniband task on a '
                  'non-internode communication enabled '
                  'pool: {}').format(pool_id))
-        if not is_rdma_pool(vm_size):
+        if not context.is_rdma_pool:
             raise RuntimeError(
                 ('cannot initialize an infiniband task on nodes '
                  'without RDMA: pool={} vm_size={}').format(
@@ -3193,15 +3314,17 @@ def task_settings(cloud_pool, config, poolconf, jobspec, conf):
                 except ValueError:
                     pass
             # only centos-hpc and sles-hpc are supported for infiniband
-            if ((publisher == 'openlogic' and offer == 'centos-hpc') or
-                    (is_custom_image and
-                     node_agent.startswith('batch.node.centos'))):
+            if ((context.publisher == 'openlogic' and
+                 context.offer == 'centos-hpc') or
+                    (context.is_custom_image and
+                     context.node_agent.startswith('batch.node.centos'))):
                 run_opts.append('{} /etc/rdma:/etc/rdma:ro'.format(bindparm))
                 run_opts.append(
                     '{} /etc/rdma/dat.conf:/etc/dat.conf:ro'.format(bindparm))
-            elif ((publisher == 'suse' and offer == 'sles-hpc') or
-                  (is_custom_image and
-                   node_agent.startswith('batch.node.opensuse'))):
+            elif ((context.publisher == 'suse' and
+                   context.offer == 'sles-hpc') or
+                  (context.is_custom_image and
+                   context.node_agent.startswith('batch.node.opensuse'))):
                 run_opts.append('{} /etc/dat.conf:/etc/dat.conf:ro'.format(
                     bindparm))
                 run_opts.append(
@@ -3211,7 +3334,7 @@ def task_settings(cloud_pool, config, poolconf, jobspec, conf):
             else:
                 raise ValueError(
                     ('Unsupported infiniband VM config, publisher={} '
-                     'offer={}').format(publisher, offer))
+                     'offer={}').format(context.publisher, context.offer))
     # always add option for envfile
     envfile = None
     if util.is_not_empty(docker_image):
@@ -3708,6 +3831,7 @@ def remotefs_settings(config, sc_id=None):
                 generate_docker_tunnel_script=False,
                 generated_file_export_path=sc_ssh_gen_file_path,
                 hpn_server_swap=False,
+                cache_remote_login_settings=False,
             ),
             vm_disk_map=disk_map,
         ),
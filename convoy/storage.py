@@ -30,9 +30,18 @@ from builtins import (  # noqa
     bytes, dict, int, list, object, range, str, ascii, chr, hex, input,
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
+import concurrent.futures
 import datetime
 import hashlib
+import json
 import logging
+import os
+try:
+    import pathlib2 as pathlib
+except ImportError:
+    import pathlib
+import tempfile
+import threading
 # non-stdlib imports
 import azure.common
 import azure.cosmosdb.table as azuretable
@@ -47,6 +56,18 @@ logger = logging.getLogger(__name__)
 util.setup_logger(logger)
 # global defines
 _DEFAULT_SAS_EXPIRY_DAYS = 365 * 30
+_MAX_UPLOAD_WORKERS = 8
+_BLOCK_UPLOAD_THRESHOLD = 33554432
+_BLOCK_UPLOAD_MAX_CONNECTIONS = 8
+_MAX_DELETE_WORKERS = 16
+_MAX_INFLIGHT_TABLE_BATCHES = 8
+_TABLE_BATCH_SIZE = 100
+_DIGEST_CACHE_FILE = pathlib.Path(
+    os.path.expanduser('~'), '.batch-shipyard', 'digestcache.json')
+_DIGEST_CACHE_MAX_ENTRIES = 1024
+_DIGEST_CACHE = None
+_DIGEST_CACHE_DIRTY = False
+_DIGEST_CACHE_LOCK = threading.Lock()
 _STORAGEACCOUNT = None
 _STORAGEACCOUNTKEY = None
 _STORAGEACCOUNTEP = None
@@ -302,6 +323,82 @@ def populate_global_resource_blobs(blob_client, table_client, config):
         blob_client, table_client, config, pk, dr, 'singularity_images')
 
 
+def _load_digest_cache():
+    # type: (None) -> None
+    """Load local file digest cache from disk if not loaded"""
+    global _DIGEST_CACHE
+    if _DIGEST_CACHE is not None:
+        return
+    try:
+        with _DIGEST_CACHE_FILE.open('r') as f:
+            _DIGEST_CACHE = json.load(f)
+        if not isinstance(_DIGEST_CACHE, dict):
+            raise ValueError()
+    except (IOError, OSError, ValueError):
+        _DIGEST_CACHE = {}
+
+
+def _save_digest_cache():
+    # type: (None) -> None
+    """Save local file digest cache to disk if modified, evicting entries
+    of files which no longer exist and the oldest entries beyond the
+    maximum number of entries"""
+    global _DIGEST_CACHE_DIRTY
+    with _DIGEST_CACHE_LOCK:
+        if not _DIGEST_CACHE_DIRTY:
+            return
+        for key in [x for x in _DIGEST_CACHE if not os.path.exists(x)]:
+            _DIGEST_CACHE.pop(key)
+        if len(_DIGEST_CACHE) > _DIGEST_CACHE_MAX_ENTRIES:
+            keys = sorted(
+                _DIGEST_CACHE, key=lambda x: _DIGEST_CACHE[x][1],
+                reverse=True)
+            for key in keys[_DIGEST_CACHE_MAX_ENTRIES:]:
+                _DIGEST_CACHE.pop(key)
+        data = json.dumps(_DIGEST_CACHE)
+        _DIGEST_CACHE_DIRTY = False
+    try:
+        cachedir = _DIGEST_CACHE_FILE.parent
+        if not cachedir.exists():
+            os.makedirs(str(cachedir), 0o700)
+        fd, tmpfile = tempfile.mkstemp(dir=str(cachedir))
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+        try:
+            os.replace(tmpfile, str(_DIGEST_CACHE_FILE))
+        except AttributeError:
+            if _DIGEST_CACHE_FILE.exists():
+                _DIGEST_CACHE_FILE.unlink()
+            os.rename(tmpfile, str(_DIGEST_CACHE_FILE))
+    except (IOError, OSError) as e:
+        logger.debug('cannot write digest cache {}: {}'.format(
+            _DIGEST_CACHE_FILE, e))
+
+
+def _compute_md5_for_file_cached(file):
+    # type: (pathlib.Path) -> tuple
+    """Compute MD5 hash for file, reusing a previously computed digest if
+    the file size and modification time have not changed
+    :param pathlib.Path file: file to compute md5 for
+    :rtype: tuple
+    :return: (base64 encoded md5, file size)
+    """
+    global _DIGEST_CACHE_DIRTY
+    path = os.path.abspath(str(file))
+    st = os.stat(path)
+    with _DIGEST_CACHE_LOCK:
+        _load_digest_cache()
+        entry = _DIGEST_CACHE.get(path)
+    if (entry is not None and entry[0] == st.st_size and
+            entry[1] == st.st_mtime):
+        return entry[2], st.st_size
+    md5 = util.compute_md5_for_file(path, True)
+    with _DIGEST_CACHE_LOCK:
+        _DIGEST_CACHE[path] = [st.st_size, st.st_mtime, md5]
+        _DIGEST_CACHE_DIRTY = True
+    return md5, st.st_size
+
+
 def _check_file_and_upload(blob_client, file, container):
     # type: (azure.storage.blob.BlockBlobService, tuple, str) -> None
     """Upload file to blob storage if necessary
@@ -311,23 +408,56 @@ def _check_file_and_upload(blob_client, file, container):
     """
     if file[0] is None:
         return
-    upload = True
+    md5, size = _compute_md5_for_file_cached(file[1])
     # check if blob exists
     try:
         prop = blob_client.get_blob_properties(
             _STORAGE_CONTAINERS[container], file[0])
-        if (prop.properties.content_settings.content_md5 ==
-                util.compute_md5_for_file(file[1], True)):
+        if prop.properties.content_settings.content_md5 == md5:
             logger.debug(
                 'remote file is the same for {}, skipping'.format(
                     file[0]))
-            upload = False
+            return
     except azure.common.AzureMissingResourceHttpError:
         pass
-    if upload:
-        logger.info('uploading file {} as {!r}'.format(file[1], file[0]))
-        blob_client.create_blob_from_path(
-            _STORAGE_CONTAINERS[container], file[0], str(file[1]))
+    logger.info('uploading file {} as {!r}'.format(file[1], file[0]))
+    # set md5 explicitly as it is not populated for blobs uploaded in
+    # blocks, upload large files with concurrent block uploads
+    blob_client.create_blob_from_path(
+        _STORAGE_CONTAINERS[container], file[0], str(file[1]),
+        content_settings=azureblob.ContentSettings(content_md5=md5),
+        max_connections=(
+            _BLOCK_UPLOAD_MAX_CONNECTIONS if size > _BLOCK_UPLOAD_THRESHOLD
+            else 1
+        ))
+
+
+def _check_files_and_upload(blob_client, files, container):
+    # type: (azure.storage.blob.BlockBlobService, List[tuple], str) -> None
+    """Concurrently upload files to blob storage if necessary
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param list files: files to upload
+    :param str container: blob container ref
+    """
+    files = [x for x in files if x[0] is not None]
+    if len(files) == 0:
+        return
+    start = datetime.datetime.now()
+    workers = min((len(files), _MAX_UPLOAD_WORKERS))
+    try:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _check_file_and_upload, blob_client, file, container)
+                for file in files
+            ]
+            for fut in concurrent.futures.as_completed(futures):
+                fut.result()
+    finally:
+        _save_digest_cache()
+    logger.debug('checked and uploaded {} files in {:.2f} sec'.format(
+        len(files), (datetime.datetime.now() - start).total_seconds()))
 
 
 def upload_resource_files(blob_client, config, files):
@@ -339,9 +469,9 @@ def upload_resource_files(blob_client, config, files):
     :rtype: dict
     :return: sas url dict
     """
+    _check_files_and_upload(blob_client, files, 'blob_resourcefiles')
     sas_urls = {}
     for file in files:
-        _check_file_and_upload(blob_client, file, 'blob_resourcefiles')
         sas_urls[file[0]] = 'https://{}.blob.{}/{}/{}?{}'.format(
             _STORAGEACCOUNT, _STORAGEACCOUNTEP,
             _STORAGE_CONTAINERS['blob_resourcefiles'], file[0],
@@ -364,9 +494,9 @@ def upload_for_remotefs(blob_client, files):
     :rtype: list
     :return: list of file urls
     """
+    _check_files_and_upload(blob_client, files, 'blob_remotefs')
     ret = []
     for file in files:
-        _check_file_and_upload(blob_client, file, 'blob_remotefs')
         ret.append('https://{}.blob.{}/{}/{}'.format(
             _STORAGEACCOUNT, _STORAGEACCOUNTEP,
             _STORAGE_CONTAINERS['blob_remotefs'], file[0]))
@@ -398,6 +528,48 @@ def delete_storage_containers(
             table_client.delete_table(_STORAGE_CONTAINERS[key])
 
 
+def _execute_with_bounded_pending(func, argsiter, max_workers):
+    # type: (function, iterable, int) -> int
+    """Execute a function concurrently for each set of arguments, bounding
+    the number of pending calls such that arguments are consumed lazily
+    :param function func: function to execute
+    :param iterable argsiter: iterable of argument tuples
+    :param int max_workers: maximum number of concurrent calls
+    :rtype: int
+    :return: number of calls
+    """
+    count = 0
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers) as executor:
+        pending = set()
+        for args in argsiter:
+            if len(pending) >= max_workers * 2:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for fut in done:
+                    fut.result()
+            pending.add(executor.submit(func, *args))
+            count += 1
+        for fut in concurrent.futures.as_completed(pending):
+            fut.result()
+    return count
+
+
+def _delete_blobs(blob_client, container, blobs):
+    # type: (azureblob.BlockBlobService, str, iterable) -> None
+    """Delete blobs in container concurrently
+    :param azure.storage.blob.BlockBlobService blob_client: blob client
+    :param str container: container to delete blobs from
+    :param iterable blobs: blobs to delete
+    """
+    start = datetime.datetime.now()
+    count = _execute_with_bounded_pending(
+        blob_client.delete_blob, ((container, x.name) for x in blobs),
+        _MAX_DELETE_WORKERS)
+    logger.debug('deleted {} blobs from {} in {:.2f} sec'.format(
+        count, container, (datetime.datetime.now() - start).total_seconds()))
+
+
 def _clear_blobs(blob_client, container):
     # type: (azureblob.BlockBlobService, str) -> None
     """Clear blobs in container
@@ -410,8 +582,7 @@ def _clear_blobs(blob_client, container):
     except azure.common.AzureMissingResourceHttpError:
         logger.warning('container not found: {}'.format(container))
     else:
-        for blob in blobs:
-            blob_client.delete_blob(container, blob.name)
+        _delete_blobs(blob_client, container, blobs)
 
 
 def _clear_blob_task_resourcefiles(blob_client, container, config):
@@ -429,13 +600,13 @@ def _clear_blob_task_resourcefiles(blob_client, container, config):
     except azure.common.AzureMissingResourceHttpError:
         logger.warning('container not found: {}'.format(container))
     else:
-        for blob in blobs:
-            blob_client.delete_blob(container, blob.name)
+        _delete_blobs(blob_client, container, blobs)
 
 
 def _clear_table(table_client, table_name, config, pool_id=None):
     # type: (azuretable.TableService, str, dict, str) -> None
-    """Clear table entities
+    """Clear table entities. Batch deletes are committed while entities
+    are being queried with a bounded number of batches in flight.
     :param azure.cosmosdb.table.TableService table_client: table client
     :param str table_name: table name
     :param dict config: configuration dict
@@ -444,26 +615,38 @@ def _clear_table(table_client, table_name, config, pool_id=None):
     pk = _construct_partition_key_from_config(config, pool_id=pool_id)
     logger.debug('clearing table (pk={}): {}'.format(pk, table_name))
     ents = table_client.query_entities(
-        table_name, filter='PartitionKey eq \'{}\''.format(pk))
-    # batch delete entities
-    i = 0
-    bet = azuretable.TableBatch()
-    for ent in ents:
-        bet.delete_entity(ent['PartitionKey'], ent['RowKey'])
-        i += 1
-        if i == 100:
-            table_client.commit_batch(table_name, bet)
-            bet = azuretable.TableBatch()
-            i = 0
-    if i > 0:
-        table_client.commit_batch(table_name, bet)
+        table_name, filter='PartitionKey eq \'{}\''.format(pk),
+        select='PartitionKey,RowKey')
+
+    def _batches():
+        # batch delete entities
+        i = 0
+        bet = azuretable.TableBatch()
+        for ent in ents:
+            bet.delete_entity(ent['PartitionKey'], ent['RowKey'])
+            i += 1
+            if i == _TABLE_BATCH_SIZE:
+                yield table_name, bet
+                bet = azuretable.TableBatch()
+                i = 0
+        if i > 0:
+            yield table_name, bet
+
+    start = datetime.datetime.now()
+    count = _execute_with_bounded_pending(
+        table_client.commit_batch, _batches(), _MAX_INFLIGHT_TABLE_BATCHES)
+    logger.debug(
+        'committed {} delete batches to {} in {:.2f} sec'.format(
+            count, table_name,
+            (datetime.datetime.now() - start).total_seconds()))
 
 
 def clear_storage_containers(
         blob_client, table_client, config, tables_only=False, pool_id=None):
     # type: (azureblob.BlockBlobService, azuretable.TableService, dict,
     #        bool, str) -> None
-    """Clear storage containers
+    """Clear storage containers. Containers and tables are cleared
+    concurrently.
     :param azure.storage.blob.BlockBlobService blob_client: blob client
     :param azure.cosmosdb.table.TableService table_client: table client
     :param dict config: configuration dict
@@ -471,20 +654,32 @@ def clear_storage_containers(
     :param str pool_id: use specified pool id instead
     """
     bs = settings.batch_shipyard_settings(config)
+    ops = []
     for key in _STORAGE_CONTAINERS:
         if not tables_only and key.startswith('blob_'):
             if key != 'blob_remotefs':
-                _clear_blobs(blob_client, _STORAGE_CONTAINERS[key])
+                ops.append((
+                    key, _clear_blobs,
+                    (blob_client, _STORAGE_CONTAINERS[key])))
         elif key.startswith('table_'):
             # TODO remove in a future release: unused registry table
             if key == 'table_registry':
                 continue
+            ops.append((
+                key, _clear_table,
+                (table_client, _STORAGE_CONTAINERS[key], config, pool_id)))
+    if len(ops) == 0:
+        return
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(ops)) as executor:
+        futures = {
+            executor.submit(func, *args): key for key, func, args in ops
+        }
+        for fut in concurrent.futures.as_completed(futures):
             try:
-                _clear_table(
-                    table_client, _STORAGE_CONTAINERS[key], config,
-                    pool_id=pool_id)
+                fut.result()
             except azure.common.AzureMissingResourceHttpError:
-                if key != 'table_perf' or bs.store_timing_metrics:
+                if futures[fut] != 'table_perf' or bs.store_timing_metrics:
                     raise
 
 
@@ -47,7 +47,16 @@ try:
 except ImportError:
     from scandir import scandir as scandir
 import platform
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+try:
+    import selectors
+except ImportError:
+    selectors = None
 import sys
+import threading
 import time
 # function remaps
 try:
@@ -59,7 +68,10 @@ except NameError:
 # global defines
 _PY2 = sys.version_info.major == 2
 _ON_WINDOWS = platform.system() == 'Windows'
+_ON_LINUX = platform.system() == 'Linux'
 _REGISTERED_LOGGER_HANDLERS = []
+_PROCESS_SUPERVISOR = None
+_PROCESS_SUPERVISOR_LOCK = threading.Lock()
 
 
 def on_python2():
@@ -80,6 +92,15 @@ def on_windows():
     return _ON_WINDOWS
 
 
+def on_linux():
+    # type: (None) -> bool
+    """Execution on Linux
+    :rtype: bool
+    :return: if on Linux
+    """
+    return _ON_LINUX
+
+
 def setup_logger(logger, logfile=None):
     # type: (logger, str) -> None
     """Set up logger"""
@@ -475,64 +496,322 @@ def subprocess_attach_stdin(cmd, shell=False):
     return subprocess.Popen(cmd, shell=shell, stdin=subprocess.PIPE)
 
 
-def subprocess_wait_all(procs, poll=True):
-    # type: (list, bool) -> list
-    """Wait for all processes in given list
-    :param list procs: list of processes to wait on
-    :param bool poll: use poll(), otherwise communicate() if using PIPEs
-    :rtype: list
-    :return: list of return codes
-    """
-    if procs is None or len(procs) == 0:
-        raise ValueError('procs is invalid')
-    rcodes = [None] * len(procs)
-    while True:
-        for i in range(0, len(procs)):
-            if rcodes[i] is None:
-                if poll and procs[i].poll() == 0:
-                    rcodes[i] = procs[i].returncode
+class ProcessSupervisor(object):
+    """Notify on exit of child processes without polling. Process exit is
+    detected through pidfds and a selector where supported, otherwise
+    through a thread blocked on wait() per process."""
+    def __init__(self):
+        # type: (ProcessSupervisor) -> None
+        """Ctor for ProcessSupervisor
+        :param ProcessSupervisor self: this
+        """
+        self._lock = threading.Lock()
+        self._pending = []
+        self._selector = None
+        self._wakefds = None
+        self._thread = None
+        self.use_pidfd = (
+            selectors is not None and hasattr(os, 'pidfd_open') and
+            not _ON_WINDOWS
+        )
+
+    def _start(self):
+        # type: (ProcessSupervisor) -> None
+        """Start selector thread
+        :param ProcessSupervisor self: this
+        """
+        self._selector = selectors.DefaultSelector()
+        self._wakefds = os.pipe()
+        self._selector.register(self._wakefds[0], selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        # type: (ProcessSupervisor) -> None
+        """Selector thread loop
+        :param ProcessSupervisor self: this
+        """
+        while True:
+            for key, _ in self._selector.select():
+                if key.fd == self._wakefds[0]:
+                    os.read(self._wakefds[0], 4096)
+                    with self._lock:
+                        pending = self._pending
+                        self._pending = []
+                    for pidfd, proc, callback in pending:
+                        self._selector.register(
+                            pidfd, selectors.EVENT_READ, (proc, callback))
                 else:
-                    procs[i].communicate()
-                    rcodes[i] = procs[i].returncode
-        if all(x is not None for x in rcodes):
-            break
-        time.sleep(0.03)
-    return rcodes
-
-
-def subprocess_wait_any(procs):
-    # type: (list) -> list
-    """Wait for any process in given list
-    :param list procs: list of processes to wait on
-    :rtype: tuple
-    :return: (integral position in procs list, return code)
-    """
-    if procs is None or len(procs) == 0:
-        raise ValueError('procs is invalid')
-    while True:
-        for i in range(0, len(procs)):
-            if procs[i].poll() == 0:
-                return i, procs[i].returncode
-        time.sleep(0.03)
-
-
-def subprocess_wait_multi(procs1, procs2):
-    # type: (list) -> list
-    """Wait for any process in given list
-    :param list procs: list of processes to wait on
-    :rtype: tuple
-    :return: (integral position in procs list, return code)
+                    self._selector.unregister(key.fd)
+                    os.close(key.fd)
+                    proc, callback = key.data
+                    callback(proc, proc.wait())
+
+    def _wait_in_thread(self, proc, callback):
+        # type: (ProcessSupervisor, subprocess.Popen, function) -> None
+        """Wait on process exit in a dedicated thread
+        :param ProcessSupervisor self: this
+        :param subprocess.Popen proc: process
+        :param function callback: callback
+        """
+        thr = threading.Thread(
+            target=lambda: callback(proc, proc.wait()))
+        thr.daemon = True
+        thr.start()
+
+    def watch(self, proc, callback):
+        # type: (ProcessSupervisor, subprocess.Popen, function) -> None
+        """Invoke callback with (proc, return code) once the process exits.
+        The callback is invoked on a supervisor thread.
+        :param ProcessSupervisor self: this
+        :param subprocess.Popen proc: process
+        :param function callback: callback
+        """
+        if not self.use_pidfd:
+            self._wait_in_thread(proc, callback)
+            return
+        try:
+            pidfd = os.pidfd_open(proc.pid)
+        except OSError:
+            # process has already been reaped
+            self._wait_in_thread(proc, callback)
+            return
+        with self._lock:
+            if self._thread is None:
+                self._start()
+            self._pending.append((pidfd, proc, callback))
+        os.write(self._wakefds[1], b'\0')
+
+
+def get_process_supervisor():
+    # type: (None) -> ProcessSupervisor
+    """Get the process supervisor shared by all callers
+    :rtype: ProcessSupervisor
+    :return: process supervisor
     """
-    if ((procs1 is None or len(procs1) == 0) and
-            (procs2 is None or len(procs2) == 0)):
-        raise ValueError('both procs1 and procs2 are invalid')
-    while True:
-        if procs1 is not None and len(procs1) > 0:
-            for i in range(0, len(procs1)):
-                if procs1[i].poll() == 0:
-                    return procs1, i, procs1[i].returncode
-        if procs2 is not None and len(procs2) > 0:
-            for i in range(0, len(procs2)):
-                if procs2[i].poll() == 0:
-                    return procs2, i, procs2[i].returncode
-        time.sleep(0.03)
+    global _PROCESS_SUPERVISOR
+    with _PROCESS_SUPERVISOR_LOCK:
+        if _PROCESS_SUPERVISOR is None:
+            _PROCESS_SUPERVISOR = ProcessSupervisor()
+        return _PROCESS_SUPERVISOR
+
+
+class ProcessGroup(object):
+    """Set of processes of a caller reported in order of completion,
+    including processes exiting with a non-zero return code"""
+    def __init__(self, supervisor=None):
+        # type: (ProcessGroup, ProcessSupervisor) -> None
+        """Ctor for ProcessGroup
+        :param ProcessGroup self: this
+        :param ProcessSupervisor supervisor: process supervisor
+        """
+        self._supervisor = supervisor or get_process_supervisor()
+        self._completed = queue.Queue()
+        self._active = 0
+
+    def __len__(self):
+        # type: (ProcessGroup) -> int
+        """Number of processes which have not been reported as completed
+        :param ProcessGroup self: this
+        :rtype: int
+        :return: number of active processes
+        """
+        return self._active
+
+    def add(self, proc, tag=None):
+        # type: (ProcessGroup, subprocess.Popen, object) -> None
+        """Add a process to the group
+        :param ProcessGroup self: this
+        :param subprocess.Popen proc: process
+        :param object tag: tag reported on completion
+        """
+        self._active += 1
+        self._supervisor.watch(
+            proc, lambda p, rc: self._completed.put((tag, p, rc)))
+
+    def wait_any(self):
+        # type: (ProcessGroup) -> tuple
+        """Wait for the next process to complete
+        :param ProcessGroup self: this
+        :rtype: tuple
+        :return: (tag, process, return code)
+        """
+        if self._active == 0:
+            raise ValueError('no active processes to wait on')
+        # wait with a timeout to allow interrupts on python2
+        while True:
+            try:
+                result = self._completed.get(timeout=3600)
+                break
+            except queue.Empty:
+                pass
+        self._active -= 1
+        return result
+
+    def wait_all(self):
+        # type: (ProcessGroup) -> list
+        """Wait for all processes to complete
+        :param ProcessGroup self: this
+        :rtype: list
+        :return: list of (tag, process, return code) in completion order
+        """
+        return [self.wait_any() for _ in range(self._active)]
+
+
+class ImportProfiler(object):
+    """Profile module import times by wrapping the import function"""
+    def __init__(self):
+        # type: (ImportProfiler) -> None
+        """Ctor for ImportProfiler
+        :param ImportProfiler self: this
+        """
+        if _PY2:
+            import __builtin__ as builtins_module
+        else:
+            import builtins as builtins_module
+        self._builtins = builtins_module
+        self._import = None
+        self._start = None
+        self._stack = []
+        self._times = {}
+
+    def install(self):
+        # type: (ImportProfiler) -> None
+        """Install import hook
+        :param ImportProfiler self: this
+        """
+        if self._import is not None:
+            return
+        self._start = time.time()
+        self._import = self._builtins.__import__
+        self._builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        # type: (ImportProfiler) -> None
+        """Uninstall import hook
+        :param ImportProfiler self: this
+        """
+        if self._import is None:
+            return
+        self._builtins.__import__ = self._import
+        self._import = None
+
+    def _resolve(self, name, globals, fromlist, level):
+        # type: (ImportProfiler, str, dict, tuple, int) -> str
+        """Resolve the module name which would be loaded by an import
+        :param ImportProfiler self: this
+        :param str name: module name
+        :param dict globals: globals of importer
+        :param tuple fromlist: from list
+        :param int level: relative import level
+        :rtype: str
+        :return: name of module to load or None if already loaded
+        """
+        if level > 0 and globals is not None:
+            package = globals.get('__package__') or globals.get(
+                '__name__', '').rpartition('.')[0]
+            if level > 1:
+                package = package.rsplit('.', level - 1)[0]
+            name = '{}.{}'.format(package, name) if name else package
+        module = sys.modules.get(name)
+        if module is None:
+            return name
+        # from imports of a package may load submodules
+        if fromlist and hasattr(module, '__path__'):
+            missing = [
+                x for x in fromlist if x != '*' and not hasattr(module, x)
+            ]
+            if len(missing) == 1:
+                return '{}.{}'.format(name, missing[0])
+            elif len(missing) > 1:
+                return '{}.{{{}}}'.format(name, ','.join(missing))
+        return None
+
+    def _timed_import(
+            self, name, globals=None, locals=None, fromlist=(), level=0):
+        # type: (ImportProfiler, str, dict, dict, tuple, int) -> object
+        """Import function which records import times of modules
+        :param ImportProfiler self: this
+        :param str name: module name
+        :param dict globals: globals of importer
+        :param dict locals: locals of importer
+        :param tuple fromlist: from list
+        :param int level: relative import level
+        :rtype: object
+        :return: module
+        """
+        try:
+            key = self._resolve(name, globals, fromlist, level)
+        except Exception:
+            key = None
+        if key is None:
+            return self._import(name, globals, locals, fromlist, level)
+        self._stack.append(0)
+        start = time.time()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.time() - start
+            nested = self._stack.pop()
+            if len(self._stack) > 0:
+                self._stack[-1] += elapsed
+            cumulative, own = self._times.get(key, (0, 0))
+            self._times[key] = (cumulative + elapsed, own + elapsed - nested)
+
+    def report(self, top=20):
+        # type: (ImportProfiler, int) -> str
+        """Report import time breakdown
+        :param ImportProfiler self: this
+        :param int top: number of modules to report
+        :rtype: str
+        :return: report
+        """
+        packages = {}
+        for key in self._times:
+            package = key.split('.')[0]
+            packages[package] = packages.get(package, 0) + self._times[key][1]
+        total = sum(packages.values())
+        lines = [
+            'import time: {:.3f} sec in {} imports, {:.3f} sec since '
+            'profiling started'.format(
+                total, len(self._times), time.time() - self._start),
+            '{:<50} {:>10}'.format('package', 'self(s)'),
+        ]
+        for package in sorted(
+                packages, key=packages.get, reverse=True)[:top]:
+            lines.append('{:<50} {:>10.3f}'.format(package, packages[package]))
+        lines.append('{:<50} {:>10} {:>10}'.format(
+            'module', 'cumul(s)', 'self(s)'))
+        for key in sorted(
+                self._times, key=lambda x: self._times[x][1],
+                reverse=True)[:top]:
+            lines.append('{:<50} {:>10.3f} {:>10.3f}'.format(
+                key, self._times[key][0], self._times[key][1]))
+        return os.linesep.join(lines)
+
+
+class LazyModule(object):
+    """Module proxy which defers importing a module until one of its
+    attributes is first accessed"""
+    def __init__(self, name):
+        # type: (LazyModule, str) -> None
+        """Ctor for LazyModule
+        :param LazyModule self: this
+        :param str name: fully qualified module name
+        """
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        # type: (LazyModule, str) -> object
+        """Import the module on first access and get an attribute of it
+        :param LazyModule self: this
+        :param str attr: attribute name
+        :rtype: object
+        :return: module attribute
+        """
+        if self._module is None:
+            __import__(self._name)
+            self._module = sys.modules[self._name]
+        return getattr(self._module, attr)
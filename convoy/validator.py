@@ -31,12 +31,16 @@ from builtins import (  # noqa
     next, oct, open, pow, round, super, filter, map, zip)
 # stdlib imports
 import enum
+import hashlib
 import logging
+import os
 import sys
 try:
     import pathlib2 as pathlib
 except ImportError:
     import pathlib
+import pickle
+import tempfile
 import warnings
 # non-stdlib imports
 import pykwalify.core
@@ -83,6 +87,12 @@ _SCHEMAS = {
         'schema': pathlib.Path(_ROOT_PATH, 'schemas/fs.yaml'),
     },
 }
+_CONFIG_CACHE_DIR = pathlib.Path(
+    os.path.expanduser('~'), '.batch-shipyard', 'configcache')
+_CONFIG_CACHE_VERSION = 2
+_CONFIG_CACHE_MAX_ENTRIES = 32
+# credentials are never cached on disk
+_CONFIG_CACHE_EXCLUDE = frozenset((ConfigType.Credentials,))
 
 # configure loggers
 _PYKWALIFY_LOGGER = logging.getLogger('pykwalify')
@@ -94,10 +104,107 @@ convoy.util.setup_logger(logger)
 warnings.simplefilter('ignore', ruamel.yaml.error.UnsafeLoaderWarning)
 
 
-def validate_config(config_type, config_file):
-    if config_file is None or not config_file.exists():
+def _load_config_file(config_file):
+    # type: (pathlib.Path) -> dict
+    """Load a yaml/json configuration file
+    :param pathlib.Path config_file: config file to load
+    :rtype: dict
+    :return: configuration
+    """
+    with config_file.open('r') as f:
+        return ruamel.yaml.load(f, Loader=ruamel.yaml.RoundTripLoader)
+
+
+def _config_cache_file(config_type, config_file):
+    # type: (ConfigType, pathlib.Path) -> pathlib.Path
+    """Get path of the cache entry of a configuration file which is keyed
+    by the content hashes of the configuration file and its schema
+    :param ConfigType config_type: config type
+    :param pathlib.Path config_file: config file
+    :rtype: pathlib.Path
+    :return: path to cache entry
+    """
+    schema = _SCHEMAS[config_type]
+    key = hashlib.sha256('{}:{}:{}'.format(
+        _CONFIG_CACHE_VERSION,
+        convoy.util.compute_sha256_for_file(config_file, False),
+        convoy.util.compute_sha256_for_file(schema['schema'], False),
+    ).encode('utf8')).hexdigest()
+    return _CONFIG_CACHE_DIR / '{}-{}.pickle'.format(
+        schema['name'].lower(), key)
+
+
+def _save_config_cache(cache_file, config):
+    # type: (pathlib.Path, dict) -> None
+    """Save a validated configuration to the cache and evict the least
+    recently used entries beyond the maximum number of entries. The
+    configuration is pickled such that the loaded types, e.g., ordered
+    round-trip maps and non-string keys, are preserved.
+    :param pathlib.Path cache_file: cache entry file
+    :param dict config: configuration
+    """
+    try:
+        data = pickle.dumps(
+            {'version': _CONFIG_CACHE_VERSION, 'config': config},
+            protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        logger.debug('cannot cache configuration {}: {}'.format(
+            cache_file.name, e))
         return
+    try:
+        if not _CONFIG_CACHE_DIR.exists():
+            os.makedirs(str(_CONFIG_CACHE_DIR), 0o700)
+        fd, tmpfile = tempfile.mkstemp(dir=str(_CONFIG_CACHE_DIR))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        try:
+            os.replace(tmpfile, str(cache_file))
+        except AttributeError:
+            if cache_file.exists():
+                cache_file.unlink()
+            os.rename(tmpfile, str(cache_file))
+        entries = sorted(
+            _CONFIG_CACHE_DIR.glob('*.pickle'),
+            key=lambda x: x.stat().st_mtime, reverse=True)
+        for entry in entries[_CONFIG_CACHE_MAX_ENTRIES:]:
+            entry.unlink()
+    except (IOError, OSError) as e:
+        logger.debug('cannot write configuration cache {}: {}'.format(
+            cache_file, e))
+
+
+def validate_config(config_type, config_file, use_cache=False):
+    # type: (ConfigType, pathlib.Path, bool) -> dict
+    """Validate a configuration file against its schema and load it. If
+    the cache is enabled, a configuration which was previously validated
+    with identical configuration and schema file contents is loaded from
+    the cache without parsing and validating the configuration file.
+    :param ConfigType config_type: config type
+    :param pathlib.Path config_file: config file
+    :param bool use_cache: use cache of validated configurations
+    :rtype: dict
+    :return: configuration or None if config file does not exist
+    """
+    if config_file is None or not config_file.exists():
+        return None
     schema = _SCHEMAS[config_type]
+    cache_file = None
+    if use_cache and config_type not in _CONFIG_CACHE_EXCLUDE:
+        cache_file = _config_cache_file(config_type, config_file)
+        try:
+            with cache_file.open('rb') as f:
+                data = pickle.load(f)
+            if data['version'] != _CONFIG_CACHE_VERSION:
+                raise ValueError('cache version mismatch')
+            config = data['config']
+            # refresh entry for eviction
+            os.utime(str(cache_file), None)
+            logger.debug('{} configuration {} loaded from cache'.format(
+                schema['name'], config_file))
+            return config
+        except (IOError, OSError, EOFError, ImportError, KeyError,
+                TypeError, ValueError, pickle.UnpicklingError):
+            pass
     validator = pykwalify.core.Core(
         source_file=str(config_file),
         schema_files=[str(schema['schema'])]
@@ -108,3 +215,7 @@ def validate_config(config_type, config_file):
     except pykwalify.errors.SchemaError as e:
         logger.error('{} Configuration {}'.format(schema['name'], e.msg))
         sys.exit(1)
+    config = _load_config_file(config_file)
+    if cache_file is not None:
+        _save_config_cache(cache_file, config)
+    return config
@@ -32,6 +32,7 @@ from builtins import (  # noqa
 # stdlib imports
 import json
 import logging
+import os
 try:
     import pathlib2 as pathlib
 except ImportError:
@@ -39,12 +40,9 @@ except ImportError:
 # non-stdlib imports
 import click
 import ruamel.yaml
-# local imports
-import convoy.clients
-import convoy.fleet
-import convoy.settings
+# local imports, modules depending on the Azure SDK are imported on demand
+# by _import_convoy_modules
 import convoy.util
-import convoy.validator
 
 # create logger
 logger = logging.getLogger('shipyard')
@@ -52,16 +50,30 @@ logger = logging.getLogger('shipyard')
 _CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 
 
+def _import_convoy_modules():
+    # type: (None) -> None
+    """Import convoy modules which depend on the Azure SDK. These imports
+    are deferred until a command is executed such that help and argument
+    validation do not incur the cost of importing the SDK."""
+    import convoy.clients  # noqa
+    import convoy.fleet  # noqa
+    import convoy.settings  # noqa
+    import convoy.validator  # noqa
+
+
 class CliContext(object):
     """CliContext class: holds context for CLI commands"""
     def __init__(self):
         """Ctor for CliContext"""
         self.show_config = False
+        self.config_cache = True
         self.verbose = False
         self.yes = False
         self.config = None
         self.conf_jobs = None
         self.conf_fs = None
+        self.startup_profiler = None
+        self._validated_configs = {}
         # clients
         self.batch_mgmt_client = None
         self.batch_client = None
@@ -90,6 +102,7 @@ class CliContext(object):
         """Initialize context for fs commands
         :param CliContext self: this
         """
+        _import_convoy_modules()
         self._read_credentials_config()
         self._set_global_cli_options()
         try:
@@ -112,6 +125,7 @@ class CliContext(object):
         """Initialize context for keyvault commands
         :param CliContext self: this
         """
+        _import_convoy_modules()
         self._read_credentials_config()
         self._set_global_cli_options()
         try:
@@ -131,6 +145,7 @@ class CliContext(object):
         """Initialize context for batch commands
         :param CliContext self: this
         """
+        _import_convoy_modules()
         self._read_credentials_config()
         self._set_global_cli_options()
         try:
@@ -155,6 +170,7 @@ class CliContext(object):
         """Initialize context for storage commands
         :param CliContext self: this
         """
+        _import_convoy_modules()
         self._read_credentials_config()
         self._set_global_cli_options()
         self.keyvault_client = convoy.clients.create_keyvault_client(self)
@@ -187,6 +203,12 @@ class CliContext(object):
         :param bool skip_global_config: skip global config
         :param bool skip_pool_config: skip pool config
         """
+        # report startup profile
+        if self.startup_profiler is not None:
+            self.startup_profiler.uninstall()
+            logger.info('startup profile:{}{}'.format(
+                os.linesep, self.startup_profiler.report()))
+            self.startup_profiler = None
         # free conf objects
         del self.conf_credentials
         del self.conf_fs
@@ -195,6 +217,7 @@ class CliContext(object):
         if not skip_pool_config:
             del self.conf_pool
             del self.conf_jobs
+        self._validated_configs = {}
         # free cli options
         del self.verbose
         del self.yes
@@ -215,14 +238,28 @@ class CliContext(object):
         :param CliContext self: this
         :param pathlib.Path config_file: config file to load
         """
-        with config_file.open('r') as f:
-            if self.config is None:
-                self.config = ruamel.yaml.load(
-                    f, Loader=ruamel.yaml.RoundTripLoader)
-            else:
-                self.config = convoy.util.merge_dict(
-                    self.config,
-                    ruamel.yaml.load(f, Loader=ruamel.yaml.RoundTripLoader))
+        # use config loaded during validation if available
+        conf = self._validated_configs.pop(str(config_file), None)
+        if conf is None:
+            with config_file.open('r') as f:
+                conf = ruamel.yaml.load(f, Loader=ruamel.yaml.RoundTripLoader)
+        if self.config is None:
+            self.config = conf
+        else:
+            self.config = convoy.util.merge_dict(self.config, conf)
+
+    def _validate_config_file(self, config_type, config_file):
+        # type: (CliContext, convoy.validator.ConfigType,
+        #        pathlib.Path) -> None
+        """Validate a config file and retain the loaded config for reading
+        :param CliContext self: this
+        :param convoy.validator.ConfigType config_type: config type
+        :param pathlib.Path config_file: config file to validate
+        """
+        conf = convoy.validator.validate_config(
+            config_type, config_file, use_cache=self.config_cache)
+        if conf is not None:
+            self._validated_configs[str(config_file)] = conf
 
     def _form_conf_path(self, conf_var, prefix):
         """Form configuration file path with configdir if applicable
@@ -298,17 +335,17 @@ class CliContext(object):
                 self.conf_fs, pathlib.Path)):
             self.conf_fs = pathlib.Path(self.conf_fs)
         # validate configuration files against schema
-        convoy.validator.validate_config(
+        self._validate_config_file(
             convoy.validator.ConfigType.Credentials, self.conf_credentials)
         if not skip_global_config:
-            convoy.validator.validate_config(
+            self._validate_config_file(
                 convoy.validator.ConfigType.Global, self.conf_config)
         if not skip_pool_config:
-            convoy.validator.validate_config(
+            self._validate_config_file(
                 convoy.validator.ConfigType.Pool, self.conf_pool)
-        convoy.validator.validate_config(
+        self._validate_config_file(
             convoy.validator.ConfigType.Jobs, self.conf_jobs)
-        convoy.validator.validate_config(
+        self._validate_config_file(
             convoy.validator.ConfigType.RemoteFS, self.conf_fs)
         # fetch credentials from keyvault, if conf file is missing
         kvcreds = None
@@ -417,6 +454,19 @@ def _show_config_option(f):
         callback=callback)(f)
 
 
+def _config_cache_option(f):
+    def callback(ctx, param, value):
+        clictx = ctx.ensure_object(CliContext)
+        clictx.config_cache = not value
+        return value
+    return click.option(
+        '--no-config-cache',
+        expose_value=False,
+        is_flag=True,
+        help='Do not use cache of validated configuration files',
+        callback=callback)(f)
+
+
 def _verbose_option(f):
     def callback(ctx, param, value):
         clictx = ctx.ensure_object(CliContext)
@@ -669,6 +719,7 @@ def common_options(f):
     f = _configdir_option(f)
     f = _verbose_option(f)
     f = _show_config_option(f)
+    f = _config_cache_option(f)
     # f = _log_file_option(f)
     f = _confirm_option(f)
     return f
@@ -713,11 +764,17 @@ def fs_cluster_options(f):
 
 @click.group(context_settings=_CONTEXT_SETTINGS)
 @click.version_option(version=convoy.__version__)
+@click.option(
+    '--profile-startup', is_flag=True,
+    help='Print an import time breakdown once the command is initialized')
 @click.pass_context
-def cli(ctx):
+def cli(ctx, profile_startup):
     """Batch Shipyard: Provision and execute container workloads on
     Azure Batch"""
-    pass
+    if profile_startup:
+        cli_ctx = ctx.ensure_object(CliContext)
+        cli_ctx.startup_profiler = convoy.util.ImportProfiler()
+        cli_ctx.startup_profiler.install()
 
 
 @cli.group()
@@ -1259,18 +1316,29 @@ def images(ctx):
     '--singularity-image', help='Singularity image[:tag] to update')
 @click.option(
     '--ssh', help='Update over SSH instead of using a Batch job')
+@click.option(
+    '--relay', is_flag=True,
+    help='Pull Docker images on seed nodes and relay to other nodes')
+@click.option(
+    '--relay-seeds', type=int,
+    help='Number of seed nodes pulling from the registry [2]')
+@click.option(
+    '--relay-fanout', type=int,
+    help='Number of nodes each node relays images to per round [4]')
 @common_options
 @batch_options
 @keyvault_options
 @aad_options
 @pass_cli_context
 def images_update(
-        ctx, docker_image, docker_image_digest, singularity_image, ssh):
+        ctx, docker_image, docker_image_digest, singularity_image, ssh,
+        relay, relay_seeds, relay_fanout):
     """Update container images in a pool"""
     ctx.initialize_for_batch()
     convoy.fleet.action_pool_images_update(
         ctx.batch_client, ctx.config, docker_image, docker_image_digest,
-        singularity_image, ssh)
+        singularity_image, ssh, relay=relay, relay_seeds=relay_seeds,
+        relay_fanout=relay_fanout)
 
 
 @images.command('list')
@@ -1669,17 +1737,27 @@ def data(ctx):
 @data.command('ingress')
 @click.option(
     '--to-fs', help='Ingress data to specified remote filesystem')
+@click.option(
+    '--plan-only', is_flag=True,
+    help='Show the data transfer plan without transferring data')
+@click.option(
+    '--relay', is_flag=True,
+    help='Ingress compute node destinations to one node and relay to other '
+    'nodes')
+@click.option(
+    '--relay-fanout', type=int,
+    help='Number of nodes each node relays data to per round [4]')
 @common_options
 @batch_options
 @keyvault_options
 @aad_options
 @pass_cli_context
-def data_ingress(ctx, to_fs):
+def data_ingress(ctx, to_fs, plan_only, relay, relay_fanout):
     """Ingress data into Azure"""
     ctx.initialize_for_batch()
     convoy.fleet.action_data_ingress(
         ctx.batch_client, ctx.compute_client, ctx.network_client, ctx.config,
-        to_fs)
+        to_fs, plan_only=plan_only, relay=relay, relay_fanout=relay_fanout)
 
 
 @data.group()
@@ -1724,6 +1802,23 @@ def files_stream(ctx, disk, filespec):
         ctx.batch_client, ctx.config, filespec, disk)
 
 
+@files.command('tail')
+@click.option(
+    '--filespec',
+    help='File specification as jobid,taskid_pattern,filename where '
+    'taskid_pattern is a task id glob or @RUNNING and multiple filenames '
+    'may be separated by :')
+@common_options
+@batch_options
+@keyvault_options
+@aad_options
+@pass_cli_context
+def files_tail(ctx, filespec):
+    """Tail files of multiple tasks as text to the local console"""
+    ctx.initialize_for_batch()
+    convoy.fleet.action_data_files_tail(ctx.batch_client, ctx.config, filespec)
+
+
 @files.command('task')
 @click.option(
     '--all', is_flag=True, help='Retrieve all files for given job/task')